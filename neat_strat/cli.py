@@ -0,0 +1,490 @@
+import argparse
+import pickle
+from enum import StrEnum, auto
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+# Only lightweight modules are imported here. Every subcommand imports what it
+# needs when it runs, so that e.g. headless training never loads arcade.
+
+DEFAULT_GENOME = "aggressive/generation_116_winner.pkl"
+DEFAULT_CHECKPOINT_DIR = "checkpoints"
+
+
+class GameVariation(StrEnum):
+    MODEL_VS_MODEL = auto()
+    PLAYER_VS_MODEL = auto()
+    PLAYER_VS_PLAYER = auto()
+
+
+def load_genome(path: Path | str, generation: Optional[int] = None) -> Any:
+    path = Path(path)
+    if path.is_dir():
+        from .network.checkpoint import CheckpointStore
+
+        return CheckpointStore(path).load_winner(generation)
+
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def run_play(args: argparse.Namespace):
+    from neat import FeedForwardNetwork
+
+    from .game import Game
+    from .network.constants import BOARD_SIZE
+    from .parameters import Params
+
+    board_size = args.board_size or BOARD_SIZE
+    width, height = Params.window_size(board_size)
+    variation = GameVariation(args.variation)
+    evaluator = None
+    if variation != GameVariation.PLAYER_VS_PLAYER:
+        genome = load_genome(args.genome, args.generation)
+        evaluator = FeedForwardNetwork.from_genome(genome).activate
+
+    game = Game(
+        width,
+        height,
+        Params.board_title,
+        board_size,
+        10,
+        evaluator,
+        args.player_starts,
+        variation == GameVariation.MODEL_VS_MODEL,
+    )
+    game.setup()
+    game.run()
+
+
+def run_train(args: argparse.Namespace):
+    import os
+
+    from .network import profiling
+    from .network.constants import BOARD_SIZE
+    from .network.neural_network import train
+
+    # Set in the environment, so that pool workers profile themselves too.
+    if args.profile is not None:
+        os.environ[profiling.PROFILE_ENV] = args.profile
+        os.environ[profiling.PROFILE_DIR_ENV] = args.profile_dir
+
+    board_size = args.board_size or BOARD_SIZE
+    train(
+        args.iterations,
+        args.checkpoint_dir,
+        args.resume,
+        board_size,
+        args.game_log_dir,
+        args.metrics,
+        memory_budget_MB=args.memory_budget,
+    )
+
+
+def run_arena(args: argparse.Namespace):
+    from neat import FeedForwardNetwork
+
+    from .network.constants import BOARD_SIZE, EndgameState
+    from .network.search import play
+
+    board_size = args.board_size or BOARD_SIZE
+    player = FeedForwardNetwork.from_genome(load_genome(args.player)).activate
+    opponent = FeedForwardNetwork.from_genome(load_genome(args.opponent)).activate
+
+    wins = losses = draws = unfinished = 0
+    for game in range(args.games):
+        # Alternate who starts. The side that starts always plays BLUE.
+        opponent_starts = bool(game % 2)
+        endgame_state, _ = play(
+            player, opponent, opponent_starts, args.rounds, args.depth, board_size
+        )
+        player_won = EndgameState.RED_WON if opponent_starts else EndgameState.BLUE_WON
+        if endgame_state == EndgameState.ONGOING:
+            unfinished += 1
+        elif endgame_state in (EndgameState.DRAW, EndgameState.REPETITION):
+            draws += 1
+        elif endgame_state == player_won:
+            wins += 1
+        else:
+            losses += 1
+
+    print(f"wins: {wins}, losses: {losses}, draws: {draws}, unfinished: {unfinished}")
+
+
+def run_analyse(args: argparse.Namespace):
+    from neat import FeedForwardNetwork
+
+    from .network.constants import BOARD_SIZE
+    from .network.search import STORAGE_SIZE_MB, Searcher, sample_opening
+    from .network.trace import TraceRecorder
+
+    board_size = args.board_size or BOARD_SIZE
+    evaluator = FeedForwardNetwork.from_genome(
+        load_genome(args.genome, args.generation)
+    ).activate
+    # Positions after the opening are reached through the best moves, picked at
+    # random among the ones within the margin.
+    state = sample_opening(
+        evaluator,
+        args.plies,
+        args.multipv,
+        args.depth,
+        args.margin,
+        args.seed,
+        board_size,
+    )
+    print(state.board)
+
+    searcher = Searcher(STORAGE_SIZE_MB, args.depth)
+    if args.trace:
+        searcher.trace = TraceRecorder(path=args.trace)
+    for rank, root_move in enumerate(
+        searcher.search_multipv(evaluator, state, args.multipv), 1
+    ):
+        pv = " ".join(str(move) for move in root_move.pv)
+        print(f"{rank}. {root_move.score:+.4f} {pv}")
+    if searcher.trace is not None:
+        searcher.trace.flush()
+
+
+def run_bench(args: argparse.Namespace):
+    from .network.benchmark import (
+        run_allocation_benchmark,
+        run_incremental_benchmark,
+        run_quiescence_benchmark,
+        run_scaling_benchmark,
+        run_search_benchmark,
+    )
+
+    if args.training:
+        run_training_bench(args)
+        return
+
+    if args.allocations:
+        for result in run_allocation_benchmark(args.depth):
+            print(
+                f"position {result.position}: {result.nodes} nodes, "
+                f"{result.peak_bytes_per_node:.1f} peak bytes per node, "
+                f"{result.retained_blocks_per_node:.2f} retained blocks per node"
+            )
+        return
+
+    if args.quiescence:
+        depths = list(range(1, args.depth + 1))
+        for result in run_quiescence_benchmark(depths, args.depth + 1):
+            print(
+                f"depth {result.depth}, quiescence {result.quiescence}: "
+                f"{result.best_moves}/{result.positions} best moves, "
+                f"{result.score_loss:.4f} score loss, "
+                f"{result.score_error:.4f} score error, {result.nodes} nodes, "
+                f"{result.qnodes} qnodes, {result.seconds:.3f}s"
+            )
+        return
+
+    if args.incremental:
+        full_seconds = incremental_seconds = 0.0
+        for result in run_incremental_benchmark(args.depth):
+            full_seconds += result.full_seconds
+            incremental_seconds += result.incremental_seconds
+            print(
+                f"position {result.position}: {result.nodes} nodes, "
+                f"{result.full_seconds:.3f}s full, "
+                f"{result.incremental_seconds:.3f}s incremental, "
+                f"{result.speedup:.2f}x"
+                + ("" if result.matches else ", searches differ")
+            )
+        speedup = full_seconds / incremental_seconds if incremental_seconds else 0.0
+        print(
+            f"total: {full_seconds:.3f}s full, {incremental_seconds:.3f}s "
+            f"incremental, {speedup:.2f}x"
+        )
+        return
+
+    if args.sizes:
+        for result in run_scaling_benchmark(args.sizes, args.depth):
+            print(
+                f"size {result.size}: {result.occupied_tiles:.1f} occupied tiles, "
+                f"branching factor {result.branching_factor:.1f} "
+                f"({result.effective_branching_factor:.1f} effective), "
+                f"{1e6 * result.movegen_seconds:.1f}us per generation, "
+                f"{result.nodes} nodes, {result.search_seconds:.3f}s search"
+            )
+        return
+
+    from .network.trace import TraceRecorder
+
+    trace = TraceRecorder(path=args.trace) if args.trace else None
+    total_nodes = 0
+    total_seconds = 0.0
+    for result in run_search_benchmark(
+        args.depth, quantized=args.quantized, trace=trace
+    ):
+        total_nodes += result.nodes
+        total_seconds += result.seconds
+        print(
+            f"position {result.position}: {result.nodes} nodes, "
+            f"{result.seconds:.3f}s, {result.nodes_per_second:.0f} nps, "
+            f"move {result.move}"
+        )
+
+    nps = total_nodes / total_seconds if total_seconds else 0.0
+    print(f"total: {total_nodes} nodes, {total_seconds:.3f}s, {nps:.0f} nps")
+    if trace is not None:
+        trace.flush()
+
+
+def run_training_bench(args: argparse.Namespace):
+    import multiprocessing
+
+    from .network.benchmark import (
+        get_baseline_result,
+        load_baseline,
+        run_training_benchmark,
+        save_baseline,
+    )
+
+    workers = args.workers
+    if not workers:
+        # Powers of two, up to every CPU.
+        cpus = multiprocessing.cpu_count()
+        workers = [2**i for i in range(cpus.bit_length()) if 2**i < cpus] + [cpus]
+
+    baseline = load_baseline(args.baseline) if args.baseline else []
+    results = run_training_benchmark(
+        workers,
+        args.generations,
+        args.networks == "synthetic",
+        args.seed,
+        args.board_size,
+    )
+    for result in results:
+        line = (
+            f"{result.workers} workers: {result.games} games, "
+            f"{result.games_per_second:.1f} games/s, "
+            f"{result.generation_seconds:.2f}s per generation, "
+            f"{result.cpu_utilisation:.0%} cpu per worker, "
+            f"{result.peak_worker_rss_MB:.0f}MB peak worker rss"
+        )
+        previous = get_baseline_result(baseline, result)
+        if previous is not None and previous.games_per_second:
+            change = result.games_per_second / previous.games_per_second - 1
+            line += f" ({change:+.1%} games/s against the baseline)"
+        print(line)
+
+    if args.save:
+        save_baseline(args.save, results)
+
+
+def run_trace(args: argparse.Namespace):
+    from .network.trace import format_trace_summary, read_trace, summarise_trace
+
+    summary = summarise_trace(read_trace(args.path))
+    print(format_trace_summary(summary, args.root_moves), end="")
+
+
+def run_serve(args: argparse.Namespace):
+    import sys
+
+    from .network.engine import ENGINE_STORAGE_SIZE_MB, EngineServer
+    from .network.memory import plan_memory
+
+    memory = plan_memory(1, args.memory_budget)
+    engine = EngineServer(
+        args.searchers,
+        memory.get_table_size_MB(args.searchers, ENGINE_STORAGE_SIZE_MB),
+        args.depth,
+    )
+    for genome in args.genome:
+        name, _, path = genome.partition("=")
+        if not engine.load_genome(name, load_genome(path or name)):
+            print(f"{name}: evaluated without batching", file=sys.stderr)
+
+    if args.port is None:
+        engine.serve_stream(sys.stdin, sys.stdout)
+        return
+
+    with engine.serve_socket(args.host, args.port) as server:
+        server.serve_forever()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="neat-strat")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    play = subparsers.add_parser("play", help="Open the game window.")
+    play.add_argument(
+        "--variation",
+        choices=[v.value for v in GameVariation],
+        default=GameVariation.PLAYER_VS_MODEL.value,
+    )
+    play.add_argument(
+        "--genome",
+        default=DEFAULT_GENOME,
+        help="Pickled genome or checkpoint directory.",
+    )
+    play.add_argument("--generation", type=int, default=None)
+    play.add_argument("--board-size", type=int, default=None)
+    play.add_argument(
+        "--player-starts", action=argparse.BooleanOptionalAction, default=True
+    )
+    play.set_defaults(handler=run_play)
+
+    train = subparsers.add_parser("train", help="Train a population.")
+    train.add_argument("--iterations", type=int, default=200)
+    train.add_argument("--checkpoint-dir", default=DEFAULT_CHECKPOINT_DIR)
+    train.add_argument("--resume", action=argparse.BooleanOptionalAction, default=True)
+    train.add_argument("--board-size", type=int, default=None)
+    train.add_argument(
+        "--game-log-dir", default=None, help="Log every training game to it."
+    )
+    train.add_argument(
+        "--metrics",
+        default=None,
+        help="JSON lines file of per generation metrics. Defaults to one in the "
+        "checkpoint directory.",
+    )
+    train.add_argument(
+        "--profile",
+        choices=["timers", "sample"],
+        default=None,
+        help="Time the search and training hot spots, and with 'sample', sample "
+        "the stacks of every worker. Reports are written every generation.",
+    )
+    train.add_argument("--profile-dir", default="profile")
+    train.add_argument(
+        "--memory-budget",
+        type=float,
+        default=None,
+        help="MB that the workers may take together. Defaults to "
+        "$NEAT_STRAT_MEMORY_MB, or 4096.",
+    )
+    train.set_defaults(handler=run_train)
+
+    arena = subparsers.add_parser("arena", help="Play two genomes against each other.")
+    arena.add_argument("player")
+    arena.add_argument("opponent")
+    arena.add_argument("--games", type=int, default=10)
+    arena.add_argument("--rounds", type=int, default=20)
+    arena.add_argument("--depth", type=int, default=3)
+    arena.add_argument("--board-size", type=int, default=None)
+    arena.set_defaults(handler=run_arena)
+
+    analyse = subparsers.add_parser(
+        "analyse", help="Print the best moves of a genome and their lines."
+    )
+    analyse.add_argument("--genome", default=DEFAULT_GENOME)
+    analyse.add_argument("--generation", type=int, default=None)
+    analyse.add_argument("--multipv", type=int, default=3)
+    analyse.add_argument("--depth", type=int, default=3)
+    analyse.add_argument(
+        "--plies", type=int, default=0, help="Opening moves to play before analysing."
+    )
+    analyse.add_argument("--margin", type=float, default=0.05)
+    analyse.add_argument("--seed", type=int, default=None)
+    analyse.add_argument("--board-size", type=int, default=None)
+    analyse.add_argument(
+        "--trace", default=None, help="Record every node of the search to a file."
+    )
+    analyse.set_defaults(handler=run_analyse)
+
+    bench = subparsers.add_parser("bench", help="Benchmark the search.")
+    bench.add_argument("--depth", type=int, default=3)
+    bench.add_argument(
+        "--sizes",
+        type=int,
+        nargs="*",
+        help="Measure how move generation and search scale with the board size.",
+    )
+    bench.add_argument(
+        "--allocations",
+        action="store_true",
+        help="Measure memory allocated per search node.",
+    )
+    bench.add_argument(
+        "--quiescence",
+        action="store_true",
+        help="Compare the moves of searches with and without quiescence to the "
+        "moves of a deeper search.",
+    )
+    bench.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Compare searches that evaluate the whole network input with "
+        "searches that keep the input sums of the network up to date.",
+    )
+    bench.add_argument(
+        "--quantized",
+        action="store_true",
+        help="Search with integer scores, calibrated to the evaluator.",
+    )
+    bench.add_argument(
+        "--trace", default=None, help="Record every node of the searches to a file."
+    )
+    bench.add_argument(
+        "--training",
+        action="store_true",
+        help="Measure the throughput of training from a seeded population.",
+    )
+    bench.add_argument(
+        "--workers",
+        type=int,
+        nargs="*",
+        help="Numbers of training workers. Defaults to powers of two up to every "
+        "CPU.",
+    )
+    bench.add_argument("--generations", type=int, default=3)
+    bench.add_argument(
+        "--networks",
+        choices=["synthetic", "genomes"],
+        default="synthetic",
+        help="Play training games with networks that all cost the same, or with "
+        "the networks of the genomes.",
+    )
+    bench.add_argument("--seed", type=int, default=0)
+    bench.add_argument("--board-size", type=int, default=None)
+    bench.add_argument("--save", default=None, help="Save the results as a baseline.")
+    bench.add_argument(
+        "--baseline", default=None, help="Compare the results to a saved baseline."
+    )
+    bench.set_defaults(handler=run_bench)
+
+    trace = subparsers.add_parser(
+        "trace", help="Summarise a trace of searches, see --trace of bench."
+    )
+    trace.add_argument("path")
+    trace.add_argument(
+        "--root-moves", type=int, default=10, help="Root moves to list."
+    )
+    trace.set_defaults(handler=run_trace)
+
+    serve = subparsers.add_parser(
+        "serve", help="Serve moves of genomes over stdin and stdout or a socket."
+    )
+    serve.add_argument(
+        "--genome",
+        action="append",
+        default=[],
+        metavar="NAME=PATH",
+        help="Genome to load once and serve under NAME. Can be repeated.",
+    )
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument(
+        "--port", type=int, default=None, help="Serve over stdin and stdout if unset."
+    )
+    serve.add_argument("--searchers", type=int, default=4)
+    serve.add_argument("--depth", type=int, default=3)
+    serve.add_argument(
+        "--memory-budget",
+        type=float,
+        default=None,
+        help="MB that the server may take. Defaults to $NEAT_STRAT_MEMORY_MB, or "
+        "4096.",
+    )
+    serve.set_defaults(handler=run_serve)
+
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    args = build_parser().parse_args(argv)
+    args.handler(args)
@@ -4,9 +4,8 @@ from enum import IntEnum
 import arcade.color as colors
 from arcade.types import Color
 
-from .network.constants import Player
+from .network.constants import BOARD_SIZE, MAX_TROOPS, Player
 
-STORAGE_SIZE_MB = 1024
 DEPTH = 3
 
 
@@ -27,8 +26,6 @@ class Theme(IntEnum):
     DARK = 1
 
 
-# Board is square shaped so, size = 6 corresponds to a 6x6 board
-BOARD_SIZE = 5
 # Radius of the circle outside of the hexagon
 HEX_RADIUS = 50
 # Padding between the hexagons
@@ -45,7 +42,6 @@ MENU_WIDTH = 600
 COLOR_THEME = Theme.DARK
 # Title of the window
 TITLE = "Sreak"
-MAX_TROOPS = 10
 
 
 # Half the radius of a hex
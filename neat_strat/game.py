@@ -10,7 +10,14 @@ from .constants import *
 from .menu import Menu
 from .network.constants import Evaluator
 from .network.game_state import make_move
-from .network.search import EndgameState, Searcher, get_default_state, get_endgame_state
+from .network.memory import plan_memory
+from .network.search import (
+    STORAGE_SIZE_MB,
+    EndgameState,
+    Searcher,
+    get_default_state,
+    get_endgame_state,
+)
 from .parameters import Params
 from .tile import Tile
 
@@ -43,7 +50,9 @@ class Game(arcade.Window):
         self.player_starts = player_starts
         self.model_plays_itself = model_plays_itself
         if self.evaluator is not None:
-            self.searcher = Searcher(STORAGE_SIZE_MB, DEPTH)
+            # The window is a process of its own, with a single table.
+            storage_size_MB = plan_memory(1).get_table_size_MB(1, STORAGE_SIZE_MB)
+            self.searcher = Searcher(storage_size_MB, DEPTH)
 
         self.paused: bool = True
 
@@ -52,7 +61,7 @@ class Game(arcade.Window):
             self.searcher.reset()
 
         self.round = 1
-        self.state = get_default_state()
+        self.state = get_default_state(self.board_size)
         self.start_tile_index: Optional[int] = None
         self.action = Action.MOVE
         self.player_move = ((0, 0), (0, 0))
@@ -93,10 +102,10 @@ class Game(arcade.Window):
         self.menu = Menu(menu_center, colors.BLACK, menu_width, menu_heigh)
 
         # A list with all the valid tile coordinates, meaning from (0, 0),
-        # (0, 1) ... (BOARD_SIZE, BOARD_SIZE)
+        # (0, 1) ... (board_size, board_size)
         tile_coords = [Coords(i) for i in product(range(self.board_size), repeat=2)]
         # A list that contains all of the tile instances. In this case, hexagons.
-        self.tiles = [Tile(i) for i in tile_coords]
+        self.tiles = [Tile(i, size=self.board_size) for i in tile_coords]
 
         # Populate the shape list with the default tile shapes.
         for tile in self.tiles:
@@ -352,7 +361,7 @@ class Game(arcade.Window):
         return x * self.board_size + y if x != -1 else -1
 
     def are_grid_coords_valid(self, x: int, y: int) -> bool:
-        return x >= 0 and x < BOARD_SIZE and y >= 0 and y < BOARD_SIZE
+        return x >= 0 and x < self.board_size and y >= 0 and y < self.board_size
 
     def reset_selected_troops(self):
         self.selected_troops[self.state.player_to_move] = 1
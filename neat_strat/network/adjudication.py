@@ -0,0 +1,233 @@
+from dataclasses import dataclass, field
+from itertools import product
+from typing import Optional, Protocol
+
+import numpy as np
+
+from .constants import BOARD_SIZE, Board, EndgameState, Evaluator, Player
+from .game_state import GameState, make_move, undo_move
+from .search import get_endgame_state, get_possible_moves, play
+from .transposition_table import is_win_score
+
+MATERIAL_RATIO = 2.0
+MATERIAL_PLIES = 4
+EVAL_SIGN_PLIES = 6
+EVAL_SIGN_MARGIN = 0.25
+
+
+def get_winner(player: Player) -> EndgameState:
+    return EndgameState.BLUE_WON if player == Player.BLUE else EndgameState.RED_WON
+
+
+class AdjudicationRule(Protocol):
+    def reset(self):
+        ...
+
+    def update(
+        self, state: GameState, mover: Player, score: float
+    ) -> Optional[EndgameState]:
+        """
+        Called after `mover` played a move that its search scored with `score`
+        (from the point of view of `mover`). Returns the adjudicated result, if the
+        game can be decided.
+        """
+        ...
+
+
+@dataclass
+class StreakRule:
+    """A side wins once it leads for `plies` consecutive plies. Subclasses have a
+    `plies` field and decide which side leads after every ply."""
+
+    _leader: Optional[Player] = field(default=None, init=False)
+    _streak: int = field(default=0, init=False)
+
+    def reset(self):
+        self._leader = None
+        self._streak = 0
+
+    def update(
+        self, state: GameState, mover: Player, score: float
+    ) -> Optional[EndgameState]:
+        leader = self.get_leader(state, mover, score)
+        if leader is None or leader != self._leader:
+            self._leader = leader
+            self._streak = 1 if leader is not None else 0
+        else:
+            self._streak += 1
+
+        if self._leader is not None and self._streak >= self.plies:
+            return get_winner(self._leader)
+        return None
+
+    def get_leader(
+        self, state: GameState, mover: Player, score: float
+    ) -> Optional[Player]:
+        raise NotImplementedError
+
+
+@dataclass
+class MaterialRule(StreakRule):
+    """A side wins once it has `ratio` times the troops and at least as many tiles
+    as its opponent, for `plies` consecutive plies."""
+
+    ratio: float = MATERIAL_RATIO
+    plies: int = MATERIAL_PLIES
+
+    def get_leader(
+        self, state: GameState, mover: Player, score: float
+    ) -> Optional[Player]:
+        board = state.board
+        blue_troops = int(board[board > 0].sum())
+        red_troops = int(-board[board < 0].sum())
+        blue_tiles = int(np.count_nonzero(board > 0))
+        red_tiles = int(np.count_nonzero(board < 0))
+
+        if blue_troops >= self.ratio * red_troops and blue_tiles >= red_tiles:
+            return Player.BLUE
+        if red_troops >= self.ratio * blue_troops and red_tiles >= blue_tiles:
+            return Player.RED
+        return None
+
+
+@dataclass
+class EvalSignRule(StreakRule):
+    """A side wins once the searches of both sides agree that it's ahead by at
+    least `margin` for `plies` consecutive plies."""
+
+    plies: int = EVAL_SIGN_PLIES
+    margin: float = EVAL_SIGN_MARGIN
+
+    def get_leader(
+        self, state: GameState, mover: Player, score: float
+    ) -> Optional[Player]:
+        if score >= self.margin:
+            return mover
+        if score <= -self.margin:
+            return Player(-mover)
+        return None
+
+
+@dataclass
+class ForcedWinRule:
+    """A side wins when the search of the mover found a forced win for it, or
+    when it can wipe out its opponent with its next move."""
+
+    def reset(self):
+        pass
+
+    def update(
+        self, state: GameState, mover: Player, score: float
+    ) -> Optional[EndgameState]:
+        if is_win_score(score):
+            return get_winner(mover if score > 0 else Player(-mover))
+
+        player = state.player_to_move
+        winner = get_winner(player)
+        board = state.board
+        for move in get_possible_moves(board, player):
+            # Only captures can remove the last enemy troops.
+            if len(move) == 2 or board[move[1]] * move[2] >= 0:
+                continue
+
+            make_move(state, move)
+            endgame_state = get_endgame_state(board)
+            undo_move(state)
+            if endgame_state == winner:
+                return winner
+
+        return None
+
+
+class Adjudicator:
+    def __init__(self, rules: list[AdjudicationRule]):
+        self.rules = rules
+        self.verdict: Optional[EndgameState] = None
+        self.verdict_ply: Optional[int] = None
+
+    def reset(self):
+        self.verdict = None
+        self.verdict_ply = None
+        for rule in self.rules:
+            rule.reset()
+
+    def update(
+        self, state: GameState, mover: Player, score: float
+    ) -> Optional[EndgameState]:
+        # Every rule sees every ply, so that rules which count plies stay in sync.
+        verdicts = [rule.update(state, mover, score) for rule in self.rules]
+        verdict = next((v for v in verdicts if v is not None), None)
+        if verdict is not None and self.verdict is None:
+            self.verdict = verdict
+            self.verdict_ply = len(state.history)
+
+        return verdict
+
+
+def get_default_adjudicator() -> Adjudicator:
+    return Adjudicator([MaterialRule(), ForcedWinRule()])
+
+
+@dataclass(frozen=True)
+class CalibrationReport:
+    games: int
+    adjudicated: int
+    agreed: int
+    # Adjudicated games that were still ongoing after being played out.
+    unresolved: int
+    plies_played: int
+    plies_saved: int
+
+    @property
+    def agreement(self) -> float:
+        resolved = self.adjudicated - self.unresolved
+        return self.agreed / resolved if resolved else 1.0
+
+
+def calibrate(
+    games: list[tuple[Evaluator, Evaluator, bool]],
+    rounds: int,
+    depth: int,
+    adjudicator: Adjudicator,
+    board_size: int = BOARD_SIZE,
+    positions: Optional[list[tuple[Board, Player]]] = None,
+) -> CalibrationReport:
+    """
+    Plays every game out while the adjudicator is watching, and compares its
+    verdicts to the results of the games. `rounds` should be long enough for most
+    games to finish, since verdicts on unfinished games can't be checked. With
+    `positions`, every game is played from each of them rather than from the
+    default board.
+    """
+    adjudicated = agreed = unresolved = plies_played = plies_saved = 0
+    starts = positions if positions is not None else [None]
+    for (player, opponent, opponent_starts), position in product(games, starts):
+        endgame_state, game_state = play(
+            player,
+            opponent,
+            opponent_starts,
+            rounds,
+            depth,
+            board_size,
+            adjudicator,
+            adjudicate=False,
+            position=position,
+        )
+        plies = len(game_state.history)
+        plies_played += plies
+        if adjudicator.verdict is None:
+            continue
+
+        adjudicated += 1
+        unresolved += endgame_state == EndgameState.ONGOING
+        agreed += adjudicator.verdict == endgame_state
+        plies_saved += plies - adjudicator.verdict_ply
+
+    return CalibrationReport(
+        len(games) * len(starts),
+        adjudicated,
+        agreed,
+        unresolved,
+        plies_played,
+        plies_saved,
+    )
@@ -0,0 +1,560 @@
+import gc
+import json
+import math
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from nptyping import NDArray
+
+from .compiled_network import BatchEvaluator, CompiledNetwork, IncrementalEvaluator
+from .constants import MAX_TROOPS, Board, EndgameState, Evaluator, Move, Player
+from .game_state import GameState, make_move, undo_move
+from .search import (
+    STORAGE_SIZE_MB,
+    Searcher,
+    get_default_board,
+    get_default_state,
+    get_endgame_state,
+    get_possible_moves,
+    sample_opening,
+)
+from .topology import get_topology
+from .trace import TraceRecorder
+from .zobrist import compute_zobri_hash
+
+BENCHMARK_SEED = 0
+SYNTHETIC_TILE_VALUE = 0.3
+SYNTHETIC_HIDDEN_NODES = 8
+# Positions of the scaling benchmark are openings whose length grows with the
+# number of tiles, so that the troops spread over boards of every size. Every
+# move is one of the best few moves of a synthetic evaluator.
+SCALING_PLIES_PER_TILE = 0.5
+SCALING_OPENING_MOVES = 4
+SCALING_OPENING_MARGIN = 0.1
+
+
+def get_benchmark_positions() -> list[tuple[Board, Player]]:
+    middlegame = np.asarray(
+        [
+            [0, 0, 0, -4, -6],
+            [0, 0, 2, -3, 0],
+            [0, 3, 0, -2, 0],
+            [4, 1, 0, 0, 0],
+            [5, 0, 0, 0, 0],
+        ],
+        dtype=np.int8,
+    )
+    exchange = np.asarray(
+        [
+            [0, 0, 0, 0, -7],
+            [0, 0, -5, 0, -2],
+            [0, 3, 6, -1, 0],
+            [2, 0, 0, 0, 0],
+            [8, 0, 0, 0, 0],
+        ],
+        dtype=np.int8,
+    )
+    return [
+        (get_default_board(), Player.BLUE),
+        (middlegame, Player.BLUE),
+        (middlegame, Player.RED),
+        (exchange, Player.RED),
+    ]
+
+
+def get_synthetic_evaluator(
+    size: int = 25, seed: int = BENCHMARK_SEED, sigmoid: bool = False
+) -> Evaluator:
+    # A fixed linear evaluator, so that benchmark results don't depend on a genome.
+    # With `sigmoid`, it values troops and tiles, and its output is squashed like
+    # the output of a network. A capture removes as many troops from each side, so
+    # only the tiles make captures matter.
+    weights = np.random.default_rng(seed).normal(size=size)
+    if not sigmoid:
+
+        def evaluator(board: NDArray) -> list[float]:
+            return [float(weights @ board)]
+
+        return evaluator
+
+    weights = (1 + weights / 2) / MAX_TROOPS
+
+    def sigmoid_evaluator(board: NDArray) -> list[float]:
+        score = float(weights @ board) + SYNTHETIC_TILE_VALUE * float(
+            np.sign(board).sum()
+        )
+        return [1 / (1 + math.exp(-score))]
+
+    return sigmoid_evaluator
+
+
+def get_synthetic_batch_evaluator(
+    size: int = 25, seed: int = BENCHMARK_SEED
+) -> BatchEvaluator:
+    # The sigmoid synthetic evaluator, for batches like a compiled network.
+    weights = (1 + np.random.default_rng(seed).normal(size=size) / 2) / MAX_TROOPS
+
+    def evaluate_batch(inputs: NDArray) -> NDArray:
+        scores = inputs @ weights + SYNTHETIC_TILE_VALUE * np.sign(inputs).sum(axis=1)
+        return (1 / (1 + np.exp(-scores)))[:, np.newaxis]
+
+    return evaluate_batch
+
+
+@dataclass(frozen=True)
+class SearchBenchmarkResult:
+    position: int
+    depth: int
+    move: Move
+    nodes: int
+    seconds: float
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.seconds if self.seconds else 0.0
+
+
+def run_search_benchmark(
+    depth: int,
+    evaluator: Evaluator | None = None,
+    storage_size_MB: int = STORAGE_SIZE_MB,
+    quantized: bool = False,
+    trace: Optional[TraceRecorder] = None,
+) -> list[SearchBenchmarkResult]:
+    from .quantization import calibrate
+
+    evaluator = evaluator or get_synthetic_evaluator()
+    quantization = calibrate(evaluator) if quantized else None
+    searcher = Searcher(storage_size_MB, depth, quantization=quantization)
+    searcher.trace = trace
+
+    results: list[SearchBenchmarkResult] = []
+    for index, (board, player) in enumerate(get_benchmark_positions()):
+        searcher.reset()
+        board = board.copy()
+        state = GameState(board, compute_zobri_hash(board, player), player)
+
+        start = time.perf_counter()
+        move = searcher.search(evaluator, state)
+        seconds = time.perf_counter() - start
+        results.append(
+            SearchBenchmarkResult(index, depth, move, searcher.nodes, seconds)
+        )
+
+    return results
+
+
+def get_synthetic_network(
+    size: int = 25, hidden: int = SYNTHETIC_HIDDEN_NODES, seed: int = BENCHMARK_SEED
+) -> CompiledNetwork:
+    # A fixed dense network with one hidden layer, so that the evaluator modes can
+    # be compared without a genome.
+    rng = np.random.default_rng(seed)
+    inputs = list(range(size))
+    hidden_nodes = list(range(size, size + hidden))
+    output = size + hidden
+    nodes = [
+        (node_id, float(rng.normal()), 1.0, "sigmoid", inputs, rng.normal(size=size))
+        for node_id in hidden_nodes
+    ]
+    nodes.append(
+        (output, 0.0, 1.0, "sigmoid", hidden_nodes, rng.normal(size=hidden))
+    )
+    return CompiledNetwork(inputs, [output], nodes)
+
+
+@dataclass(frozen=True)
+class IncrementalBenchmarkResult:
+    position: int
+    depth: int
+    nodes: int
+    full_seconds: float
+    incremental_seconds: float
+    # Whether both searches found the same move with the same number of nodes.
+    matches: bool
+
+    @property
+    def speedup(self) -> float:
+        if not self.incremental_seconds:
+            return 0.0
+        return self.full_seconds / self.incremental_seconds
+
+
+def run_incremental_benchmark(
+    depth: int,
+    network: CompiledNetwork | None = None,
+    storage_size_MB: int = STORAGE_SIZE_MB,
+) -> list[IncrementalBenchmarkResult]:
+    # Searches with the whole network input evaluated at every node, against
+    # searches with the input sums of the network kept up to date by the moves.
+    network = network or get_synthetic_network()
+    evaluators = [network.activate, IncrementalEvaluator(network)]
+    searcher = Searcher(storage_size_MB, depth)
+
+    results: list[IncrementalBenchmarkResult] = []
+    for index, (board, player) in enumerate(get_benchmark_positions()):
+        searches = []
+        for evaluator in evaluators:
+            searcher.reset()
+            state = GameState(board.copy(), compute_zobri_hash(board, player), player)
+            start = time.perf_counter()
+            move = searcher.search(evaluator, state)
+            seconds = time.perf_counter() - start
+            searches.append((move, searcher.nodes, seconds))
+
+        (full_move, nodes, full_seconds), (move, incremental_nodes, seconds) = searches
+        results.append(
+            IncrementalBenchmarkResult(
+                index,
+                depth,
+                nodes,
+                full_seconds,
+                seconds,
+                move == full_move and incremental_nodes == nodes,
+            )
+        )
+
+    return results
+
+
+def get_random_position(size: int, plies: int, seed: int) -> GameState:
+    rng = random.Random(seed)
+    state = get_default_state(size)
+    for _ in range(plies):
+        moves = get_possible_moves(state.board, state.player_to_move)
+        move = rng.choice(moves)
+        make_move(state, move)
+        if get_endgame_state(state.board) != EndgameState.ONGOING:
+            undo_move(state)
+            break
+
+    return state
+
+
+@dataclass(frozen=True)
+class ScalingBenchmarkResult:
+    size: int
+    depth: int
+    positions: int
+    # Mean number of tiles with troops.
+    occupied_tiles: float
+    # Mean number of legal moves.
+    branching_factor: float
+    movegen_seconds: float
+    nodes: int
+    search_seconds: float
+
+    @property
+    def effective_branching_factor(self) -> float:
+        # Nodes of a search grow by this factor with every ply of depth.
+        return (self.nodes / self.positions) ** (1 / self.depth)
+
+
+def get_scaling_positions(size: int, positions: int) -> list[GameState]:
+    plies = math.ceil(SCALING_PLIES_PER_TILE * get_topology(size).num_tiles)
+    evaluator = get_synthetic_evaluator(size * size, sigmoid=True)
+    return [
+        sample_opening(
+            evaluator,
+            plies,
+            SCALING_OPENING_MOVES,
+            1,
+            SCALING_OPENING_MARGIN,
+            BENCHMARK_SEED + i,
+            size,
+        )
+        for i in range(positions)
+    ]
+
+
+def run_scaling_benchmark(
+    sizes: list[int],
+    depth: int,
+    positions: int = 8,
+    storage_size_MB: int = STORAGE_SIZE_MB,
+) -> list[ScalingBenchmarkResult]:
+    results: list[ScalingBenchmarkResult] = []
+    for size in sizes:
+        states = get_scaling_positions(size, positions)
+        occupied = sum(np.count_nonzero(state.board) for state in states)
+
+        start = time.perf_counter()
+        moves = 0
+        for state in states:
+            moves += len(get_possible_moves(state.board, state.player_to_move))
+        movegen_seconds = (time.perf_counter() - start) / len(states)
+
+        evaluator = get_synthetic_evaluator(size * size)
+        searcher = Searcher(storage_size_MB, depth)
+        nodes = 0
+        start = time.perf_counter()
+        for state in states:
+            searcher.reset()
+            searcher.search(evaluator, state)
+            nodes += searcher.nodes
+        search_seconds = time.perf_counter() - start
+
+        results.append(
+            ScalingBenchmarkResult(
+                size,
+                depth,
+                len(states),
+                occupied / len(states),
+                moves / len(states),
+                movegen_seconds,
+                nodes,
+                search_seconds,
+            )
+        )
+
+    return results
+
+
+@dataclass(frozen=True)
+class AllocationBenchmarkResult:
+    position: int
+    nodes: int
+    peak_bytes: int
+    retained_blocks: int
+
+    @property
+    def peak_bytes_per_node(self) -> float:
+        return self.peak_bytes / self.nodes if self.nodes else 0.0
+
+    @property
+    def retained_blocks_per_node(self) -> float:
+        return self.retained_blocks / self.nodes if self.nodes else 0.0
+
+
+def run_allocation_benchmark(
+    depth: int,
+    evaluator: Evaluator | None = None,
+    storage_size_MB: int = 1,
+) -> list[AllocationBenchmarkResult]:
+    # Retained blocks include the transposition table entries that are stored
+    # while searching. Everything else a node needs is preallocated, so peak
+    # memory should barely grow with the number of nodes.
+    evaluator = evaluator or get_synthetic_evaluator()
+    searcher = Searcher(storage_size_MB, depth)
+
+    results: list[AllocationBenchmarkResult] = []
+    for index, (board, player) in enumerate(get_benchmark_positions()):
+        board = board.copy()
+        state = GameState(board, compute_zobri_hash(board, player), player)
+        # Warm up, so that buffers and caches exist before measuring.
+        searcher.search(evaluator, state)
+        searcher.reset()
+
+        gc.collect()
+        tracemalloc.start()
+        blocks = sys.getallocatedblocks()
+        searcher.search(evaluator, state)
+        retained_blocks = sys.getallocatedblocks() - blocks
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results.append(
+            AllocationBenchmarkResult(
+                index, searcher.nodes, peak_bytes, retained_blocks
+            )
+        )
+
+    return results
+
+
+@dataclass(frozen=True)
+class QuiescenceBenchmarkResult:
+    depth: int
+    quiescence: bool
+    positions: int
+    # Positions where the move is as good as the move of the reference search.
+    best_moves: int
+    # How much worse than the best move the moves are, according to the reference.
+    score_loss: float
+    # How far the scores of the searches are from the scores of the reference.
+    score_error: float
+    nodes: int
+    qnodes: int
+    seconds: float
+
+
+def get_quiescence_positions(positions: int, plies: int) -> list[GameState]:
+    states = [
+        GameState(board.copy(), compute_zobri_hash(board, player), player)
+        for board, player in get_benchmark_positions()
+    ]
+    for i in range(positions - len(states)):
+        states.append(get_random_position(get_default_board().shape[0], plies, i))
+    return states
+
+
+def run_quiescence_benchmark(
+    depths: list[int],
+    reference_depth: int,
+    positions: int = 16,
+    plies: int = 16,
+    evaluator: Evaluator | None = None,
+    storage_size_MB: int = 16,
+) -> list[QuiescenceBenchmarkResult]:
+    # Moves of shallow searches, with and without quiescence, are scored by a
+    # deeper search with quiescence.
+    evaluator = evaluator or get_synthetic_evaluator(sigmoid=True)
+    states = get_quiescence_positions(positions, plies)
+    reference = Searcher(storage_size_MB, reference_depth)
+    best_scores = []
+    for state in states:
+        reference.reset()
+        reference.search(evaluator, state)
+        best_scores.append(reference.score)
+
+    reference.depth = reference_depth - 1
+    move_scores: dict[tuple[int, Move], float] = {}
+
+    def get_move_score(index: int, move: Move) -> float:
+        key = (index, move)
+        if key not in move_scores:
+            state = states[index]
+            make_move(state, move)
+            if get_endgame_state(state.board) == EndgameState.ONGOING:
+                reference.reset()
+                reference.search(evaluator, state)
+                move_scores[key] = -reference.score
+            else:
+                # Only a win can end the game with the move of the winner.
+                move_scores[key] = best_scores[index]
+            undo_move(state)
+        return move_scores[key]
+
+    results: list[QuiescenceBenchmarkResult] = []
+    for depth in depths:
+        for quiescence in (False, True):
+            searcher = Searcher(storage_size_MB, depth, quiescence)
+            moves = []
+            score_error = 0.0
+            nodes = qnodes = 0
+            start = time.perf_counter()
+            for state, best_score in zip(states, best_scores):
+                searcher.reset()
+                moves.append(searcher.search(evaluator, state))
+                score_error += abs(searcher.score - best_score)
+                nodes += searcher.nodes
+                qnodes += searcher.qnodes
+            seconds = time.perf_counter() - start
+
+            losses = [
+                max(best_scores[i] - get_move_score(i, move), 0.0)
+                for i, move in enumerate(moves)
+            ]
+            results.append(
+                QuiescenceBenchmarkResult(
+                    depth,
+                    quiescence,
+                    len(states),
+                    sum(loss == 0.0 for loss in losses),
+                    sum(losses) / len(losses),
+                    score_error / len(states),
+                    nodes,
+                    qnodes,
+                    seconds,
+                )
+            )
+
+    return results
+
+
+@dataclass(frozen=True)
+class TrainingBenchmarkResult:
+    workers: int
+    synthetic: bool
+    generations: int
+    games: int
+    seconds: float
+    games_per_second: float
+    generation_seconds: float
+    # CPU time of the workers, over the time they were available for games.
+    cpu_utilisation: float
+    peak_worker_rss_MB: float
+
+
+def get_training_benchmark_result(
+    workers: int, synthetic: bool, metrics: list[dict]
+) -> TrainingBenchmarkResult:
+    games = sum(m["games_played"] for m in metrics)
+    seconds = sum(m["seconds"] for m in metrics)
+    games_seconds = sum(m["phases"].get("games", 0.0) for m in metrics)
+    cpu_seconds = sum(
+        m["cpu_utilisation"] * m["phases"].get("games", 0.0) for m in metrics
+    )
+    return TrainingBenchmarkResult(
+        workers,
+        synthetic,
+        len(metrics),
+        games,
+        seconds,
+        games / seconds if seconds else 0.0,
+        seconds / len(metrics) if metrics else 0.0,
+        cpu_seconds / games_seconds if games_seconds else 0.0,
+        max((m["peak_worker_rss_MB"] for m in metrics), default=0.0),
+    )
+
+
+def run_training_benchmark(
+    workers: list[int],
+    generations: int,
+    synthetic: bool = True,
+    seed: int = BENCHMARK_SEED,
+    board_size: Optional[int] = None,
+) -> list[TrainingBenchmarkResult]:
+    # Trains a population from the same seed with every number of workers, with
+    # the real configuration. Synthetic networks cost the same for every genome,
+    # so that results only depend on the search and the scheduling of games.
+    from .constants import BOARD_SIZE
+    from .metrics import read_metrics
+    from .neural_network import train
+
+    results: list[TrainingBenchmarkResult] = []
+    for count in workers:
+        with tempfile.TemporaryDirectory() as directory:
+            metrics_path = Path(directory) / "metrics.jsonl"
+            train(
+                generations,
+                board_size=board_size or BOARD_SIZE,
+                metrics_path=metrics_path,
+                workers=count,
+                seed=seed,
+                synthetic=synthetic,
+                winner_path=None,
+            )
+            metrics = read_metrics(metrics_path)
+        results.append(get_training_benchmark_result(count, synthetic, metrics))
+
+    return results
+
+
+def save_baseline(path: Path | str, results: list[TrainingBenchmarkResult]):
+    with open(path, "w") as f:
+        json.dump([asdict(result) for result in results], f, indent=2)
+
+
+def load_baseline(path: Path | str) -> list[TrainingBenchmarkResult]:
+    with open(path) as f:
+        return [TrainingBenchmarkResult(**result) for result in json.load(f)]
+
+
+def get_baseline_result(
+    baseline: list[TrainingBenchmarkResult], result: TrainingBenchmarkResult
+) -> Optional[TrainingBenchmarkResult]:
+    for candidate in baseline:
+        if (candidate.workers, candidate.synthetic) == (
+            result.workers,
+            result.synthetic,
+        ):
+            return candidate
+    return None
@@ -0,0 +1,215 @@
+import pickle
+import queue
+import re
+import struct
+import threading
+import zlib
+from dataclasses import dataclass
+from enum import IntEnum
+from pathlib import Path
+from typing import Any, Optional
+
+DATA_FILENAME = "checkpoints.dat"
+INDEX_FILENAME = "checkpoints.idx"
+COMPRESSION_LEVEL = 6
+
+# generation, record kind, offset in the data file, record length.
+INDEX_ENTRY = struct.Struct("<IBQI")
+LEGACY_FILENAME = re.compile(r"generation_(\d+)_(winner|stats)\.pkl")
+
+
+class RecordKind(IntEnum):
+    POPULATION = 0
+    WINNER = 1
+    STATS = 2
+
+
+@dataclass(frozen=True)
+class IndexEntry:
+    generation: int
+    kind: RecordKind
+    offset: int
+    length: int
+
+
+class CheckpointStore:
+    """
+    Append-only store of per generation training snapshots.
+
+    Records are compressed pickles appended to a single data file. A fixed width
+    index file maps (generation, kind) to the location of each record, so any
+    record can be loaded without touching the rest of the history. The index
+    entry of a record is only written after its data, which means that a crash
+    can at worst leave an unindexed tail that is ignored on load.
+    """
+
+    def __init__(self, directory: Path | str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.data_path = self.directory / DATA_FILENAME
+        self.index_path = self.directory / INDEX_FILENAME
+
+        self._index: dict[tuple[int, RecordKind], IndexEntry] = {}
+        self._lock = threading.Lock()
+        self._queue: queue.Queue[Optional[tuple[int, RecordKind, bytes]]] = (
+            queue.Queue()
+        )
+        self._writer: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+        self._load_index()
+
+    def __enter__(self) -> "CheckpointStore":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    @property
+    def generations(self) -> list[int]:
+        with self._lock:
+            return sorted({generation for generation, _ in self._index})
+
+    def latest_generation(self, kind: RecordKind = RecordKind.POPULATION) -> int:
+        with self._lock:
+            generations = [g for g, k in self._index if k == kind]
+
+        if not generations:
+            raise LookupError(f"Store has no {kind.name.lower()} records.")
+
+        return max(generations)
+
+    def save(
+        self,
+        generation: int,
+        population: Any = None,
+        winner: Any = None,
+        stats: Any = None,
+    ):
+        # Objects are pickled on the calling thread, so that the snapshot reflects
+        # their state at the time of the call. Compression and disk writes happen
+        # on the background writer.
+        records = (
+            (RecordKind.POPULATION, population),
+            (RecordKind.WINNER, winner),
+            (RecordKind.STATS, stats),
+        )
+        for kind, obj in records:
+            if obj is not None:
+                self.save_raw(generation, kind, pickle.dumps(obj))
+
+    def save_raw(self, generation: int, kind: RecordKind, payload: bytes):
+        self._raise_writer_error()
+        self._ensure_writer()
+        self._queue.put((generation, kind, payload))
+
+    def flush(self):
+        if self._writer is not None:
+            self._queue.join()
+        self._raise_writer_error()
+
+    def close(self):
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+        self._raise_writer_error()
+
+    def load(self, generation: int, kind: RecordKind) -> Any:
+        return pickle.loads(self.load_raw(generation, kind))
+
+    def load_raw(self, generation: int, kind: RecordKind) -> bytes:
+        with self._lock:
+            entry = self._index.get((generation, kind))
+
+        if entry is None:
+            raise LookupError(f"No {kind.name.lower()} record for {generation=}.")
+
+        with open(self.data_path, "rb") as f:
+            f.seek(entry.offset)
+            return zlib.decompress(f.read(entry.length))
+
+    def load_winner(self, generation: Optional[int] = None) -> Any:
+        if generation is None:
+            generation = self.latest_generation(RecordKind.WINNER)
+        return self.load(generation, RecordKind.WINNER)
+
+    def load_stats(self, generation: Optional[int] = None) -> Any:
+        if generation is None:
+            generation = self.latest_generation(RecordKind.STATS)
+        return self.load(generation, RecordKind.STATS)
+
+    def load_population(self, generation: Optional[int] = None) -> Any:
+        if generation is None:
+            generation = self.latest_generation(RecordKind.POPULATION)
+        return self.load(generation, RecordKind.POPULATION)
+
+    def _load_index(self):
+        if not self.index_path.exists():
+            return
+
+        raw = self.index_path.read_bytes()
+        # A partially written trailing entry is ignored.
+        usable = len(raw) - len(raw) % INDEX_ENTRY.size
+        for generation, kind, offset, length in INDEX_ENTRY.iter_unpack(raw[:usable]):
+            entry = IndexEntry(generation, RecordKind(kind), offset, length)
+            # Later records of the same generation (e.g. after a resume) win.
+            self._index[(generation, entry.kind)] = entry
+
+    def _ensure_writer(self):
+        if self._writer is not None:
+            return
+
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def _write_loop(self):
+        with open(self.data_path, "ab") as data, open(self.index_path, "ab") as index:
+            while True:
+                item = self._queue.get()
+                try:
+                    if item is None:
+                        return
+
+                    generation, kind, payload = item
+                    if self._error is None:
+                        self._write_record(data, index, generation, kind, payload)
+                except BaseException as error:
+                    self._error = error
+                finally:
+                    self._queue.task_done()
+
+    def _write_record(self, data, index, generation: int, kind: RecordKind, payload):
+        compressed = zlib.compress(payload, COMPRESSION_LEVEL)
+        offset = data.seek(0, 2)
+        data.write(compressed)
+        data.flush()
+
+        entry = IndexEntry(generation, kind, offset, len(compressed))
+        index.write(INDEX_ENTRY.pack(generation, kind, offset, len(compressed)))
+        index.flush()
+
+        with self._lock:
+            self._index[(generation, kind)] = entry
+
+    def _raise_writer_error(self):
+        if self._error is not None:
+            raise RuntimeError("Checkpoint writer failed.") from self._error
+
+
+def import_legacy_directory(directory: Path | str, store: CheckpointStore) -> int:
+    """
+    Packs `generation_N_winner.pkl` / `generation_N_stats.pkl` files into `store`.
+    The pickles are copied as is, without being unpickled. Returns the number of
+    imported files.
+    """
+    kinds = {"winner": RecordKind.WINNER, "stats": RecordKind.STATS}
+    files: list[tuple[int, RecordKind, Path]] = []
+    for path in Path(directory).iterdir():
+        if match := LEGACY_FILENAME.fullmatch(path.name):
+            files.append((int(match[1]), kinds[match[2]], path))
+
+    for generation, kind, path in sorted(files):
+        store.save_raw(generation, kind, path.read_bytes())
+
+    store.flush()
+    return len(files)
@@ -0,0 +1,295 @@
+import math
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Iterator, Optional
+
+import numpy as np
+from nptyping import NDArray
+
+from .constants import Board, Evaluator, Player
+
+if TYPE_CHECKING:
+    from neat import Genome
+
+    from .game_state import GameState
+
+# Evaluates a batch of network inputs, one per row, and returns one row of outputs
+# per input.
+BatchEvaluator = Callable[[NDArray], NDArray]
+
+VERIFICATION_SAMPLES = 16
+VERIFICATION_TOLERANCE = 1e-6
+
+ACTIVATIONS: dict[str, Callable[[NDArray], NDArray]] = {
+    "sigmoid": lambda x: 1 / (1 + np.exp(-x)),
+    "tanh": np.tanh,
+    "relu": lambda x: np.maximum(x, 0),
+    "identity": lambda x: x,
+}
+
+
+def sigmoid(x: float) -> float:
+    if x >= 0:
+        return 1 / (1 + math.exp(-x))
+    # Keeps math.exp from overflowing.
+    z = math.exp(x)
+    return z / (1 + z)
+
+
+SCALAR_ACTIVATIONS: dict[str, Callable[[float], float]] = {
+    "sigmoid": sigmoid,
+    "tanh": math.tanh,
+    "relu": lambda x: max(x, 0.0),
+    "identity": lambda x: x,
+}
+
+
+def get_gene_name(value) -> str:
+    # Node types, activations and aggregations are enums of their names.
+    return str(getattr(value, "value", value)).lower()
+
+
+class CompiledNetwork:
+    """
+    Feed forward network of a genome that evaluates whole batches of inputs with
+    numpy. Nodes are evaluated in topological order, each one for every input of
+    the batch at once.
+    """
+
+    def __init__(
+        self,
+        inputs: list[int],
+        outputs: list[int],
+        nodes: list[tuple[int, float, float, str, list[int], NDArray]],
+    ):
+        self.inputs = inputs
+        self.outputs = outputs
+        # (id, bias, response, activation, input ids, weights), in topological order.
+        self.nodes = nodes
+        ids = inputs + [node[0] for node in nodes]
+        self._columns = {node_id: column for column, node_id in enumerate(ids)}
+        self._layout = [
+            (
+                self._columns[node_id],
+                bias,
+                response,
+                ACTIVATIONS[activation],
+                [self._columns[i] for i in in_nodes],
+                weights,
+            )
+            for node_id, bias, response, activation, in_nodes, weights in nodes
+        ]
+        self._output_columns = [self._columns[node_id] for node_id in outputs]
+
+        # The sums of the inputs of every node are linear in the network input,
+        # so they can be kept up to date as the board changes (see `Accumulator`).
+        # Only the rest of the network is then evaluated per position.
+        input_indices = {node_id: index for index, node_id in enumerate(inputs)}
+        node_indices = {node[0]: index for index, node in enumerate(nodes)}
+        self.input_weights = np.zeros((len(nodes), len(inputs)))
+        self._accumulated_layout = []
+        for index, (_, bias, response, activation, in_nodes, weights) in enumerate(
+            nodes
+        ):
+            hidden_indices = []
+            hidden_weights = []
+            for in_node, weight in zip(in_nodes, weights.tolist()):
+                if in_node in input_indices:
+                    self.input_weights[index, input_indices[in_node]] += weight
+                else:
+                    hidden_indices.append(node_indices[in_node])
+                    hidden_weights.append(weight)
+            self._accumulated_layout.append(
+                (
+                    bias,
+                    response,
+                    SCALAR_ACTIVATIONS[activation],
+                    hidden_indices,
+                    hidden_weights,
+                )
+            )
+        self._output_indices = [node_indices[node_id] for node_id in outputs]
+
+    @classmethod
+    def from_genome(cls, genome: "Genome") -> "CompiledNetwork":
+        node_types = {
+            node_id: get_gene_name(node.node_type)
+            for node_id, node in genome.nodes.items()
+        }
+        inputs = sorted(i for i, kind in node_types.items() if kind == "input")
+        outputs = sorted(i for i, kind in node_types.items() if kind == "output")
+
+        incoming: dict[int, list[tuple[int, float]]] = {
+            node_id: [] for node_id in genome.nodes
+        }
+        for link in genome.links.values():
+            if link.enabled:
+                incoming[link.out_node].append((link.in_node, link.weight))
+
+        nodes = []
+        evaluated = set(inputs)
+        remaining = [i for i in sorted(genome.nodes) if i not in evaluated]
+        while remaining:
+            ready = [
+                i
+                for i in remaining
+                if all(in_node in evaluated for in_node, _ in incoming[i])
+            ]
+            if not ready:
+                raise ValueError("the network of the genome has a cycle")
+
+            for node_id in ready:
+                node = genome.nodes[node_id]
+                activation = get_gene_name(node.activator)
+                aggregation = get_gene_name(node.aggregator)
+                if activation not in ACTIVATIONS or aggregation != "sum":
+                    raise ValueError(
+                        f"unsupported node {node_id}: {activation}, {aggregation}"
+                    )
+
+                links = sorted(incoming[node_id])
+                nodes.append(
+                    (
+                        node_id,
+                        float(node.bias),
+                        float(node.response),
+                        activation,
+                        [in_node for in_node, _ in links],
+                        np.asarray([weight for _, weight in links]),
+                    )
+                )
+                evaluated.add(node_id)
+            remaining = [i for i in remaining if i not in evaluated]
+
+        return cls(inputs, outputs, nodes)
+
+    def activate_batch(self, inputs: NDArray) -> NDArray:
+        inputs = np.asarray(inputs, dtype=np.float64)
+        values = np.empty((inputs.shape[0], len(self._columns)))
+        values[:, : len(self.inputs)] = inputs
+        for column, bias, response, activation, in_columns, weights in self._layout:
+            total = values[:, in_columns] @ weights if in_columns else 0.0
+            values[:, column] = activation(bias + response * total)
+
+        return values[:, self._output_columns]
+
+    def activate(self, inputs: NDArray) -> list[float]:
+        return self.activate_batch(np.asarray(inputs)[np.newaxis])[0].tolist()
+
+    def activate_accumulated(self, input_sums: list[float]) -> list[float]:
+        # `input_sums` are the weighted sums of the network input of every node.
+        # Networks have few nodes, so they're evaluated one by one with floats.
+        values = []
+        for bias, response, activation, hidden, weights in self._accumulated_layout:
+            total = input_sums[len(values)]
+            for index, weight in zip(hidden, weights):
+                total += weight * values[index]
+            values.append(activation(bias + response * total))
+
+        return [values[index] for index in self._output_indices]
+
+
+class Accumulator:
+    """
+    Weighted sums of the network input of every node, for both sides, kept up to
+    date by `make_move` and `undo_move`. Every ply has its sums on a stack, and a
+    move changes at most two tiles, so only the weights of those tiles are added
+    to the sums of the previous ply. RED sees the board rotated by 180 degrees
+    and negated.
+    """
+
+    def __init__(self, network: CompiledNetwork):
+        self.network = network
+        self.size = int(round(len(network.inputs) ** 0.5))
+        weights = network.input_weights
+        # Change of the sums per troop on a tile, by tile. The sums of BLUE come
+        # first, followed by the sums of RED.
+        self._deltas: list[list[float]] = np.concatenate(
+            [weights.T, -weights[:, ::-1].T], axis=1
+        ).tolist()
+        self._nodes = len(network.nodes)
+        self._sums: list[list[float]] = []
+
+    def bind(self, board: Board):
+        sums = np.asarray(self._deltas).T @ board.reshape(-1)
+        self._sums = [sums.tolist()]
+
+    def push(self):
+        self._sums.append(self._sums[-1])
+
+    def pop(self):
+        self._sums.pop()
+
+    def update(self, x: int, y: int, troops: int):
+        # Sums are replaced rather than changed in place, since the sums of the
+        # previous ply can be the same list.
+        deltas = self._deltas[x * self.size + y]
+        self._sums[-1] = [
+            total + delta * troops for total, delta in zip(self._sums[-1], deltas)
+        ]
+
+    def evaluate(self, side: Player) -> list[float]:
+        sums = self._sums[-1]
+        if side == Player.RED:
+            sums = sums[self._nodes :]
+        return self.network.activate_accumulated(sums)
+
+
+class IncrementalEvaluator:
+    """
+    Evaluator mode of a compiled network for searches. When a search attaches it
+    to the game state, positions are evaluated from the accumulated sums instead
+    of the whole network input. Called directly, it evaluates the whole input.
+    """
+
+    def __init__(self, network: CompiledNetwork):
+        self.network = network
+        self.accumulator = Accumulator(network)
+
+    def __call__(self, inputs: NDArray) -> list[float]:
+        return self.network.activate(inputs)
+
+    @contextmanager
+    def attach(self, state: "GameState") -> Iterator[Accumulator]:
+        self.accumulator.bind(state.board)
+        previous = state.accumulator
+        state.accumulator = self.accumulator
+        try:
+            yield self.accumulator
+        finally:
+            state.accumulator = previous
+
+
+def get_fallback_batch_evaluator(evaluator: Evaluator) -> BatchEvaluator:
+    def evaluate_batch(inputs: NDArray) -> NDArray:
+        return np.asarray([evaluator(row) for row in inputs])
+
+    return evaluate_batch
+
+
+def compile_network(
+    genome: "Genome",
+    reference: Evaluator,
+    samples: int = VERIFICATION_SAMPLES,
+    seed: Optional[int] = 0,
+) -> tuple[BatchEvaluator, bool]:
+    """
+    Compiles the network of `genome` for batches, if the compiled network gives
+    the same outputs as `reference` on random boards. Otherwise, inputs of batches
+    are evaluated one by one with `reference`. Also returns whether the network
+    was compiled.
+    """
+    try:
+        network = CompiledNetwork.from_genome(genome)
+    except ValueError:
+        return get_fallback_batch_evaluator(reference), False
+
+    rng = np.random.default_rng(seed)
+    boards = rng.integers(-10, 11, size=(samples, len(network.inputs)))
+    compiled = network.activate_batch(boards)
+    expected = np.asarray([reference(board) for board in boards.astype(np.float64)])
+    if compiled.shape != expected.shape or not np.allclose(
+        compiled, expected, atol=VERIFICATION_TOLERANCE
+    ):
+        return get_fallback_batch_evaluator(reference), False
+
+    return network.activate_batch, True
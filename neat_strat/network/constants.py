@@ -15,16 +15,24 @@ class EndgameState(IntEnum):
     RED_WON = 1
     BLUE_WON = 2
     ONGOING = 3
+    # A position was repeated, which is scored as a draw.
+    REPETITION = 4
 
 
-# Board is square shaped so, size = 5 corresponds to a 5x5 board
+# Board is square shaped so, size = 5 corresponds to a 5x5 board. This is the
+# default size, other sizes are supported through `topology.get_topology`.
 BOARD_SIZE = 5
 MAX_TROOPS = 10
+# Score of a won position. Wins are scored `WIN_SCORE - plies to the win`, so that
+# faster wins score higher. Evaluations must stay well below it.
+WIN_SCORE = 100_000
+# Bound of every score, so that windows of integer searches stay integers.
+INFINITE_SCORE = WIN_SCORE + 1
 
 # Type definitions
 Coords = tuple[int, int]
 Point = tuple[float, float]
-Board = NDArray[Shape[f"{BOARD_SIZE}, {BOARD_SIZE}"], Int]
+Board = NDArray[Shape["*, *"], Int]
 Move = tuple[Coords, Coords] | tuple[Coords, Coords, int]
 MovesRecord = list[Move]
 Evaluator = Callable[[NDArray], list[float]]
@@ -0,0 +1,383 @@
+import json
+import math
+import socketserver
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import IO, Any, Iterator, Optional
+
+import numpy as np
+from nptyping import NDArray
+
+from .compiled_network import BatchEvaluator
+from .constants import EndgameState, Move, Player
+from .game_state import GameState
+from .search import Searcher, get_endgame_state
+from .zobrist import compute_zobri_hash
+
+ENGINE_STORAGE_SIZE_MB = 16
+ENGINE_SEARCHERS = 4
+ENGINE_DEPTH = 3
+MAX_BATCH_SIZE = 64
+# Longest time an evaluation waits for the evaluations of other searches.
+MAX_BATCH_WAIT = 0.002
+LATENCY_WINDOW = 10_000
+LATENCY_PERCENTILES = (50, 90, 99)
+
+Request = dict[str, Any]
+Response = dict[str, Any]
+
+
+class BatchingEvaluator:
+    """
+    Evaluator that can be shared by searches running in different threads. The
+    evaluations they request are collected and evaluated together, once every
+    active search is waiting for one, the batch is full, or the oldest one waited
+    for `max_wait` seconds.
+    """
+
+    def __init__(
+        self,
+        batch_evaluator: BatchEvaluator,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_wait: float = MAX_BATCH_WAIT,
+    ):
+        self.batch_evaluator = batch_evaluator
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self.evaluations = 0
+        self._condition = threading.Condition()
+        # Inputs and the slots their output, or the error of their batch, is put in.
+        self._pending: list[tuple[NDArray, list[list[float] | Exception]]] = []
+        self._active = 0
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.evaluations / self.batches if self.batches else 0.0
+
+    @contextmanager
+    def session(self) -> Iterator["BatchingEvaluator"]:
+        # Searches that use the evaluator, so that a batch doesn't wait for
+        # searches that won't add to it.
+        with self._condition:
+            self._active += 1
+        try:
+            yield self
+        finally:
+            with self._condition:
+                self._active -= 1
+                if self._pending and len(self._pending) >= self._active:
+                    self._flush()
+
+    def __call__(self, inputs: NDArray) -> list[float]:
+        # Searches reuse their input buffer, so it's copied.
+        result: list[list[float] | Exception] = []
+        with self._condition:
+            self._pending.append((np.array(inputs, dtype=np.float64), result))
+            if len(self._pending) >= min(self._active, self.max_batch_size):
+                self._flush()
+
+            while not result:
+                if not self._condition.wait(self.max_wait) and not result:
+                    self._flush()
+
+        if isinstance(result[0], Exception):
+            raise result[0]
+        return result[0]
+
+    def _flush(self):
+        if not self._pending:
+            return
+
+        batch = self._pending
+        self._pending = []
+        try:
+            outputs = self.batch_evaluator(np.stack([inputs for inputs, _ in batch]))
+        except Exception as e:
+            # Every search of the batch fails, instead of waiting for its output.
+            for _, result in batch:
+                result.append(e)
+        else:
+            for (_, result), output in zip(batch, outputs):
+                result.append(np.asarray(output).tolist())
+
+            self.batches += 1
+            self.evaluations += len(batch)
+        self._condition.notify_all()
+
+
+class SearcherPool:
+    """
+    Searchers that are kept between requests, so their transposition tables are
+    allocated once and stay warm. Entries depend on the network, so a searcher is
+    preferably given to requests for the genome it last searched for.
+    """
+
+    def __init__(self, size: int, storage_size_MB: float):
+        self.size = size
+        self.storage_size_MB = storage_size_MB
+        self._idle: list[tuple[str, Searcher]] = []
+        self._created = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, genome: str) -> Searcher:
+        with self._condition:
+            while True:
+                for index, (name, searcher) in enumerate(self._idle):
+                    if name == genome:
+                        del self._idle[index]
+                        return searcher
+
+                if self._created < self.size:
+                    self._created += 1
+                    searcher = Searcher(self.storage_size_MB, ENGINE_DEPTH)
+                    # Evaluations are batched over the concurrent searches, one
+                    # input at a time.
+                    searcher.frontier_batching = False
+                    return searcher
+
+                if self._idle:
+                    _, searcher = self._idle.pop(0)
+                    searcher.reset()
+                    return searcher
+
+                self._condition.wait()
+
+    def release(self, genome: str, searcher: Searcher):
+        with self._condition:
+            self._idle.append((genome, searcher))
+            self._condition.notify()
+
+
+class LatencyTracker:
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.requests = 0
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.requests += 1
+            self._latencies.append(seconds)
+
+    def get_percentiles(
+        self, percentiles: tuple[int, ...] = LATENCY_PERCENTILES
+    ) -> dict[str, float]:
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return {}
+
+        return {
+            f"p{p}": latencies[max(math.ceil(p / 100 * len(latencies)) - 1, 0)]
+            for p in percentiles
+        }
+
+
+def encode_move(move: Move) -> list:
+    return [list(move[0]), list(move[1]), *move[2:]]
+
+
+def decode_move(move: list) -> Move:
+    return (tuple(move[0]), tuple(move[1]), *move[2:])
+
+
+class EngineServer:
+    """
+    Long running engine that serves moves of named networks. Requests and
+    responses are JSON objects, one per line:
+
+        {"id": 1, "type": "move", "genome": "aggressive", "board": [[...]],
+         "side": 1, "depth": 3}
+        {"id": 1, "move": [[4, 0], [3, 1], 10], "score": 0.2, "nodes": 120,
+         "seconds": 0.01}
+
+        {"id": 2, "type": "stats"}
+        {"id": 2, "requests": 1, "latency": {"p50": 0.01, ...}, "batches": {...}}
+
+    Failed requests get a response with an "error" instead.
+    """
+
+    def __init__(
+        self,
+        searchers: int = ENGINE_SEARCHERS,
+        storage_size_MB: float = ENGINE_STORAGE_SIZE_MB,
+        depth: int = ENGINE_DEPTH,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_wait: float = MAX_BATCH_WAIT,
+    ):
+        self.depth = depth
+        self.searchers = searchers
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.networks: dict[str, BatchingEvaluator] = {}
+        self.pool = SearcherPool(searchers, storage_size_MB)
+        self.latency = LatencyTracker()
+
+    def add_network(self, name: str, batch_evaluator: BatchEvaluator):
+        self.networks[name] = BatchingEvaluator(
+            batch_evaluator, self.max_batch_size, self.max_wait
+        )
+
+    def load_genome(self, name: str, genome: Any) -> bool:
+        # Returns whether the network could be compiled for batches.
+        from neat import FeedForwardNetwork
+
+        from .compiled_network import compile_network
+
+        reference = FeedForwardNetwork.from_genome(genome).activate
+        batch_evaluator, compiled = compile_network(genome, reference)
+        self.add_network(name, batch_evaluator)
+        return compiled
+
+    def handle(self, request: Request) -> Response:
+        response: Response = {"id": request.get("id")}
+        try:
+            kind = request.get("type", "move")
+            if kind == "move":
+                response.update(self.get_move(request))
+            elif kind == "stats":
+                response.update(self.get_stats())
+            else:
+                raise ValueError(f"unknown request type {kind!r}")
+        except Exception as e:
+            # Every request gets a response, so that clients never wait for one
+            # that won't come.
+            response["error"] = str(e) if not isinstance(e, KeyError) else repr(e)
+
+        return response
+
+    def handle_line(self, line: str) -> str:
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            return json.dumps({"id": None, "error": str(e)})
+
+        return json.dumps(self.handle(request))
+
+    def get_move(self, request: Request) -> Response:
+        start = time.perf_counter()
+        name = request["genome"]
+        if name not in self.networks:
+            raise ValueError(f"unknown genome {name!r}")
+
+        board = np.asarray(request["board"], dtype=np.int8)
+        if board.ndim != 2 or board.shape[0] != board.shape[1]:
+            raise ValueError("the board must be square")
+
+        endgame_state = get_endgame_state(board)
+        if endgame_state != EndgameState.ONGOING:
+            raise ValueError(f"the game is over: {endgame_state.name}")
+
+        player = Player(request["side"])
+        state = GameState(board, compute_zobri_hash(board, player), player)
+        evaluator = self.networks[name]
+        searcher = self.pool.acquire(name)
+        try:
+            searcher.depth = int(request.get("depth", self.depth))
+            with evaluator.session():
+                move = searcher.search(evaluator, state)
+            response = {
+                "move": encode_move(move),
+                "score": searcher.score,
+                "nodes": searcher.nodes + searcher.qnodes,
+            }
+        finally:
+            self.pool.release(name, searcher)
+
+        seconds = time.perf_counter() - start
+        self.latency.record(seconds)
+        response["seconds"] = seconds
+        return response
+
+    def get_stats(self) -> Response:
+        return {
+            "requests": self.latency.requests,
+            "latency": self.latency.get_percentiles(),
+            "batches": {
+                name: {
+                    "batches": evaluator.batches,
+                    "mean_size": evaluator.mean_batch_size,
+                }
+                for name, evaluator in self.networks.items()
+            },
+        }
+
+    def serve_stream(self, reader: IO[str], writer: IO[str]):
+        # Requests of a stream are handled concurrently, so responses can arrive
+        # in a different order than the requests. Their ids tell them apart.
+        lock = threading.Lock()
+
+        def respond(line: str):
+            response = self.handle_line(line)
+            with lock:
+                writer.write(response + "\n")
+                writer.flush()
+
+        with ThreadPoolExecutor(self.searchers) as executor:
+            for line in reader:
+                if line.strip():
+                    executor.submit(respond, line)
+
+    def serve_socket(self, host: str, port: int) -> socketserver.ThreadingTCPServer:
+        # Every connection is served by its own thread. Call `serve_forever` on
+        # the returned server to start serving.
+        engine = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if line.strip():
+                        response = engine.handle_line(line.decode())
+                        self.wfile.write(response.encode() + b"\n")
+
+        server = socketserver.ThreadingTCPServer((host, port), Handler)
+        server.daemon_threads = True
+        return server
+
+
+class LocalEngineClient:
+    """
+    Client of an engine in the same process. Requests go through the same JSON
+    encoding as requests of other processes, without a socket.
+    """
+
+    def __init__(self, server: EngineServer):
+        self.server = server
+        self._ids = 0
+        self._lock = threading.Lock()
+
+    def request(self, request: Request) -> Response:
+        with self._lock:
+            self._ids += 1
+            request = {"id": self._ids, **request}
+
+        response = json.loads(self.server.handle_line(json.dumps(request)))
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response
+
+    def get_move(
+        self,
+        genome: str,
+        board: NDArray,
+        side: Player,
+        depth: Optional[int] = None,
+    ) -> tuple[Move, float]:
+        request: Request = {
+            "type": "move",
+            "genome": genome,
+            "board": np.asarray(board).tolist(),
+            "side": int(side),
+        }
+        if depth is not None:
+            request["depth"] = depth
+
+        response = self.request(request)
+        return decode_move(response["move"]), response["score"]
+
+    def get_stats(self) -> Response:
+        return self.request({"type": "stats"})
@@ -0,0 +1,32 @@
+import hashlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from neat import Genome
+
+
+def get_genome_fingerprint(genome: "Genome") -> str:
+    """
+    Hash of everything that affects the network built from `genome`. Genomes with
+    the same structure and parameters get the same fingerprint, regardless of their
+    id or fitness.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for node_id in sorted(genome.nodes):
+        node = genome.nodes[node_id]
+        node_data = (
+            node_id,
+            str(node.node_type),
+            node.bias,
+            node.response,
+            str(node.activator),
+            str(node.aggregator),
+        )
+        digest.update(repr(node_data).encode())
+
+    # Disabled links don't take part in the network.
+    links = [link for link in genome.links.values() if link.enabled]
+    for link in sorted(links, key=lambda link: (link.in_node, link.out_node)):
+        digest.update(repr((link.in_node, link.out_node, link.weight)).encode())
+
+    return digest.hexdigest()
@@ -0,0 +1,59 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+FITNESS_CACHE_SIZE = 200_000
+
+
+@dataclass(frozen=True)
+class GameKey:
+    genome: str
+    opponent: str
+    opponent_starts: bool
+    depth: int
+    max_moves: int
+    board_size: int
+    # Size of the tables of the searches, which changes what they find.
+    storage_size_MB: float
+
+
+class FitnessCache:
+    """
+    Fitness of already played games, keyed by the fingerprints of the two genomes
+    and the game settings, the size of the tables included. Searches are
+    deterministic, so replaying a game with the same key gives the same result.
+    """
+
+    def __init__(self, max_size: int = FITNESS_CACHE_SIZE):
+        self.max_size = max_size
+        self.entries: OrderedDict[GameKey, float] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key: GameKey) -> Optional[float]:
+        fitness = self.entries.get(key)
+        if fitness is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return fitness
+
+    def add(self, key: GameKey, fitness: float):
+        self.entries[key] = fitness
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
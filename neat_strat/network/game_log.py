@@ -0,0 +1,219 @@
+import mmap
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .constants import EndgameState, Move, Player
+from .game_state import GameState
+
+DATA_SUFFIX = ".dat"
+INDEX_SUFFIX = ".idx"
+LOG_PREFIX = "games-"
+BLOCK_GAMES = 256
+NO_GENOME = bytes(16)
+
+# player, opponent, opponent starts, result, BLUE captures, RED captures, board
+# size, number of moves. Genomes are identified by their fingerprints.
+GAME_HEADER = struct.Struct("<16s16s?BHHBH")
+# Source tile, target tile and troops. Tiles are indices into the flattened board,
+# and productions have no troops.
+MOVE = struct.Struct("<HHh")
+# Largest board whose size fits in the header. Its tile indices fit in a move.
+MAX_BOARD_SIZE = 255
+# offset in the data file, length, number of games.
+BLOCK_ENTRY = struct.Struct("<QII")
+
+
+@dataclass(frozen=True)
+class GameRecord:
+    player: Optional[str]
+    opponent: Optional[str]
+    opponent_starts: bool
+    result: EndgameState
+    captures: tuple[int, int]
+    board_size: int
+    moves: list[Move]
+
+
+@dataclass(frozen=True)
+class BlockEntry:
+    offset: int
+    length: int
+    games: int
+
+
+def pack_genome(fingerprint: Optional[str]) -> bytes:
+    return bytes.fromhex(fingerprint) if fingerprint is not None else NO_GENOME
+
+
+def unpack_genome(raw: bytes) -> Optional[str]:
+    return raw.hex() if raw != NO_GENOME else None
+
+
+def pack_game(
+    player: Optional[str],
+    opponent: Optional[str],
+    opponent_starts: bool,
+    result: EndgameState,
+    state: GameState,
+) -> bytes:
+    size = state.topology.size
+    if size > MAX_BOARD_SIZE:
+        raise ValueError(
+            f"games on boards larger than {MAX_BOARD_SIZE}x{MAX_BOARD_SIZE} "
+            f"can't be logged, the board is {size}x{size}"
+        )
+
+    moves = []
+    for move in state.history:
+        (source_x, source_y), (target_x, target_y) = move[0], move[1]
+        troops = move[2] if len(move) == 3 else 0
+        moves.append(
+            MOVE.pack(source_x * size + source_y, target_x * size + target_y, troops)
+        )
+    header = GAME_HEADER.pack(
+        pack_genome(player),
+        pack_genome(opponent),
+        opponent_starts,
+        result,
+        state.captures[Player.BLUE],
+        state.captures[Player.RED],
+        size,
+        len(moves),
+    )
+    return header + b"".join(moves)
+
+
+def unpack_games(
+    buffer: bytes | mmap.mmap, games: int, offset: int = 0
+) -> Iterator[GameRecord]:
+    for _ in range(games):
+        player, opponent, opponent_starts, result, blue, red, size, count = (
+            GAME_HEADER.unpack_from(buffer, offset)
+        )
+        offset += GAME_HEADER.size
+
+        moves: list[Move] = []
+        for source, target, troops in MOVE.iter_unpack(
+            buffer[offset : offset + count * MOVE.size]
+        ):
+            source_coords = divmod(source, size)
+            target_coords = divmod(target, size)
+            if troops:
+                moves.append((source_coords, target_coords, troops))
+            else:
+                moves.append((source_coords, target_coords))
+        offset += count * MOVE.size
+
+        yield GameRecord(
+            unpack_genome(player),
+            unpack_genome(opponent),
+            opponent_starts,
+            EndgameState(result),
+            (blue, red),
+            size,
+            moves,
+        )
+
+
+class GameLogWriter:
+    """
+    Append-only log of finished games. Games are packed into a buffer and written
+    in blocks, each followed by its entry in a fixed width index file, like the
+    records of `CheckpointStore`. Every process writes its own pair of files, so
+    pool workers can log games without locks.
+    """
+
+    def __init__(
+        self,
+        directory: Path | str,
+        name: Optional[str] = None,
+        block_games: int = BLOCK_GAMES,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        name = name if name is not None else f"{LOG_PREFIX}{os.getpid()}"
+        self.data_path = self.directory / f"{name}{DATA_SUFFIX}"
+        self.index_path = self.directory / f"{name}{INDEX_SUFFIX}"
+        self.block_games = block_games
+        self.games = 0
+        self._buffer = bytearray()
+        self._buffered_games = 0
+
+    def __enter__(self) -> "GameLogWriter":
+        return self
+
+    def __exit__(self, *_):
+        self.flush()
+
+    def add(
+        self,
+        player: Optional[str],
+        opponent: Optional[str],
+        opponent_starts: bool,
+        result: EndgameState,
+        state: GameState,
+    ):
+        self._buffer += pack_game(player, opponent, opponent_starts, result, state)
+        self._buffered_games += 1
+        self.games += 1
+        if self._buffered_games >= self.block_games:
+            self.flush()
+
+    def flush(self):
+        if not self._buffered_games:
+            return
+
+        with open(self.data_path, "ab") as data:
+            offset = data.seek(0, 2)
+            data.write(self._buffer)
+        with open(self.index_path, "ab") as index:
+            index.write(
+                BLOCK_ENTRY.pack(offset, len(self._buffer), self._buffered_games)
+            )
+
+        self._buffer = bytearray()
+        self._buffered_games = 0
+
+
+class GameLogReader:
+    """
+    Reads the games that every writer logged to `directory`. Data files are memory
+    mapped, so a block is only read from disk when its games are unpacked.
+    """
+
+    def __init__(self, directory: Path | str):
+        self.directory = Path(directory)
+        self.blocks: list[tuple[Path, BlockEntry]] = []
+        for index_path in sorted(self.directory.glob(f"{LOG_PREFIX}*{INDEX_SUFFIX}")):
+            data_path = index_path.with_suffix(DATA_SUFFIX)
+            raw = index_path.read_bytes()
+            # A partially written trailing entry is ignored.
+            usable = len(raw) - len(raw) % BLOCK_ENTRY.size
+            for offset, length, games in BLOCK_ENTRY.iter_unpack(raw[:usable]):
+                self.blocks.append((data_path, BlockEntry(offset, length, games)))
+
+    def __len__(self) -> int:
+        return sum(entry.games for _, entry in self.blocks)
+
+    def __iter__(self) -> Iterator[GameRecord]:
+        for data_path, entries in self._get_blocks_by_file():
+            with open(data_path, "rb") as f, mmap.mmap(
+                f.fileno(), 0, access=mmap.ACCESS_READ
+            ) as data:
+                for entry in entries:
+                    yield from unpack_games(data, entry.games, entry.offset)
+
+    def read_block(self, index: int) -> list[GameRecord]:
+        data_path, entry = self.blocks[index]
+        with open(data_path, "rb") as f:
+            f.seek(entry.offset)
+            return list(unpack_games(f.read(entry.length), entry.games))
+
+    def _get_blocks_by_file(self) -> list[tuple[Path, list[BlockEntry]]]:
+        files: dict[Path, list[BlockEntry]] = {}
+        for data_path, entry in self.blocks:
+            files.setdefault(data_path, []).append(entry)
+        return list(files.items())
@@ -1,30 +1,50 @@
 from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Optional
 
-from . import zobrist
 from .constants import Board, Move, Player
+from .topology import Topology, get_topology
 
+if TYPE_CHECKING:
+    from .compiled_network import Accumulator
 
-@dataclass
+
+@dataclass(slots=True)
 class GameState:
     board: Board
     hash: int
     player_to_move: Player
     history: list[Move] = field(default_factory=list)
-    captures: dict[Player, int] = field(
-        default_factory=lambda: {
-            Player.RED: 0,
-            Player.BLUE: 0,
-        }
+    # Captures of each player, indexed by the player. RED (-1) is the last item.
+    captures: list[int] = field(default_factory=lambda: [0, 0, 0])
+    # Hashes of the positions before every move of `history`, and for every
+    # position, how many reversible moves in a row led to it.
+    hashes: list[int] = field(default_factory=list)
+    reversible_plies: list[int] = field(default_factory=lambda: [0])
+    # Network input sums that follow the moves, while a search evaluates with them.
+    accumulator: Optional["Accumulator"] = field(
+        default=None, repr=False, compare=False
     )
+    topology: Topology = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.topology = get_topology(self.board.shape[0])
 
 
 def make_move(state: GameState, move: Move):
+    topology = state.topology
+    accumulator = state.accumulator
+    if accumulator is not None:
+        accumulator.push()
+    state.hashes.append(state.hash)
+    # Productions add troops and captures remove them, so neither can be undone
+    # by later moves.
+    is_reversible = False
     # If it's a production move.
     if len(move) == 2:
         x, y = move[0]
 
         previous_value = state.board[x][y]
-        state.hash ^= zobrist.get_hash(x, y, previous_value)
+        state.hash ^= topology.get_hash(x, y, previous_value)
 
         if previous_value > 0:
             new_value = previous_value + 1
@@ -32,7 +52,9 @@ def make_move(state: GameState, move: Move):
             new_value = previous_value - 1
 
         state.board[x][y] = new_value
-        state.hash ^= zobrist.get_hash(x, y, new_value)
+        state.hash ^= topology.get_hash(x, y, new_value)
+        if accumulator is not None:
+            accumulator.update(x, y, new_value - previous_value)
 
     # If it's a reposition move.
     elif len(move) == 3:
@@ -41,46 +63,59 @@ def make_move(state: GameState, move: Move):
         troops = move[2]
 
         source_prev_value = state.board[source_x][source_y]
-        state.hash ^= zobrist.get_hash(source_x, source_y, source_prev_value)
+        state.hash ^= topology.get_hash(source_x, source_y, source_prev_value)
 
         source_new_value = source_prev_value - troops
         state.board[source_x][source_y] = source_new_value
         if source_new_value != 0:
-            state.hash ^= zobrist.get_hash(source_x, source_y, source_new_value)
+            state.hash ^= topology.get_hash(source_x, source_y, source_new_value)
 
         target_prev_value = state.board[target_x][target_y]
         if target_prev_value != 0:
-            state.hash ^= zobrist.get_hash(target_x, target_y, target_prev_value)
+            state.hash ^= topology.get_hash(target_x, target_y, target_prev_value)
 
         if target_prev_value * troops < 0:
             state.captures[state.player_to_move] += 1
+        else:
+            is_reversible = True
 
         target_new_value = target_prev_value + troops
         state.board[target_x][target_y] = target_new_value
-        state.hash ^= zobrist.get_hash(target_x, target_y, target_new_value)
+        # A capture can leave the target empty.
+        if target_new_value != 0:
+            state.hash ^= topology.get_hash(target_x, target_y, target_new_value)
+        if accumulator is not None:
+            accumulator.update(source_x, source_y, -troops)
+            accumulator.update(target_x, target_y, troops)
 
     state.history.append(move)
+    state.reversible_plies.append(
+        state.reversible_plies[-1] + 1 if is_reversible else 0
+    )
     switch_player_to_move(state)
 
 
 def undo_move(state: GameState):
     move = state.history.pop()
+    # The hash of the position before the move was kept, so it's restored as is.
+    previous_hash = state.hashes.pop()
+    state.reversible_plies.pop()
     switch_player_to_move(state)
+    state.hash = previous_hash
+    if state.accumulator is not None:
+        state.accumulator.pop()
 
     # If its a production move.
     if len(move) == 2:
         x, y = move[0]
 
         previous_value = state.board[x][y]
-        state.hash ^= zobrist.get_hash(x, y, previous_value)
-
         if previous_value > 0:
             new_value = previous_value - 1
         else:
             new_value = previous_value + 1
 
         state.board[x][y] = new_value
-        state.hash ^= zobrist.get_hash(x, y, new_value)
 
     # If its a reposition move.
     elif len(move) == 3:
@@ -88,29 +123,30 @@ def undo_move(state: GameState):
         target_x, target_y = move[1]
         troops = move[2]
 
-        source_prev_value = state.board[source_x][source_y]
-        if source_prev_value != 0:
-            state.hash ^= zobrist.get_hash(source_x, source_y, source_prev_value)
+        state.board[source_x][source_y] += troops
 
-        source_new_value = source_prev_value + troops
-        state.board[source_x][source_y] = source_new_value
-        state.hash ^= zobrist.get_hash(source_x, source_y, source_new_value)
-
-        target_prev_value = state.board[target_x][target_y]
-        state.hash ^= zobrist.get_hash(target_x, target_y, target_prev_value)
-
-        target_new_value = target_prev_value - troops
+        target_new_value = state.board[target_x][target_y] - troops
         if target_new_value * troops < 0:
             state.captures[state.player_to_move] -= 1
 
         state.board[target_x][target_y] = target_new_value
-        if target_new_value != 0:
-            state.hash ^= zobrist.get_hash(target_x, target_y, target_new_value)
 
 
 def switch_player_to_move(state: GameState):
-    state.hash ^= zobrist.SIDE_TO_MOVE
+    state.hash ^= state.topology.side_to_move_hash
     if state.player_to_move == Player.RED:
         state.player_to_move = Player.BLUE
     else:
         state.player_to_move = Player.RED
+
+
+def is_repetition(state: GameState) -> bool:
+    # Only positions since the last irreversible move can repeat, and only the
+    # ones with the same side to move. A side can't undo a move of the other side
+    # without a capture, so a position repeats four plies later at the earliest.
+    hashes = state.hashes
+    for plies in range(4, state.reversible_plies[-1] + 1, 2):
+        if hashes[-plies] == state.hash:
+            return True
+
+    return False
@@ -0,0 +1,93 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Generator, Optional, TypeVar
+
+import numpy as np
+from nptyping import NDArray
+
+from .compiled_network import BatchEvaluator
+
+T = TypeVar("T")
+# Steps of a game (see `search.PlaySteps`) whose networks evaluate batches.
+BatchedSteps = Generator[tuple[BatchEvaluator, NDArray], NDArray, T]
+
+
+@dataclass
+class LockstepStats:
+    batches: int = 0
+    evaluations: int = 0
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.evaluations / self.batches if self.batches else 0.0
+
+
+def run_lockstep(
+    games: list[BatchedSteps[T]], stats: Optional[LockstepStats] = None
+) -> list[T]:
+    """
+    Plays `games` together in one process. Every game runs until it needs an
+    evaluation, then the inputs that all games wait for are evaluated with one
+    batch per network and the games are resumed with their outputs. Returns the
+    results of the games, in the order of `games`.
+    """
+    results: list[Optional[T]] = [None] * len(games)
+    pending: dict[int, tuple[BatchEvaluator, NDArray]] = {}
+    for index in range(len(games)):
+        _advance(games, index, None, pending, results)
+
+    while pending:
+        requests: dict[BatchEvaluator, list[int]] = defaultdict(list)
+        for index, (network, _) in pending.items():
+            requests[network].append(index)
+
+        for network, indices in requests.items():
+            # Inputs are buffers of the searches, so they're copied by the stack
+            # before any game resumes.
+            inputs = [pending[i][1] for i in indices]
+            outputs = evaluate_batch(network, inputs)
+            if stats is not None:
+                stats.batches += 1
+                stats.evaluations += sum(
+                    len(rows) if rows.ndim == 2 else 1 for rows in inputs
+                )
+            for index, output in zip(indices, outputs):
+                _advance(games, index, output, pending, results)
+
+    return results
+
+
+def evaluate_batch(
+    network: BatchEvaluator, inputs: list[NDArray]
+) -> NDArray | list[NDArray]:
+    if all(rows.ndim == 1 for rows in inputs):
+        return network(np.stack(inputs))
+
+    # Frontier nodes of searches send the inputs of all their children as rows,
+    # and get as many rows of outputs back.
+    outputs = network(np.concatenate([np.atleast_2d(rows) for rows in inputs]))
+    results = []
+    start = 0
+    for rows in inputs:
+        if rows.ndim == 1:
+            results.append(outputs[start])
+            start += 1
+        else:
+            results.append(outputs[start : start + len(rows)])
+            start += len(rows)
+    return results
+
+
+def _advance(
+    games: list[BatchedSteps[T]],
+    index: int,
+    output: Optional[NDArray],
+    pending: dict[int, tuple[BatchEvaluator, NDArray]],
+    results: list[Optional[T]],
+):
+    try:
+        game = games[index]
+        pending[index] = next(game) if output is None else game.send(output)
+    except StopIteration as stop:
+        pending.pop(index, None)
+        results[index] = stop.value
@@ -0,0 +1,62 @@
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+# Environment variable of the budget, which pool workers inherit.
+MEMORY_BUDGET_ENV = "NEAT_STRAT_MEMORY_MB"
+# Memory that every process of a run may take together, tables included.
+MEMORY_BUDGET_MB = 4096
+# Memory of a process besides its tables: the interpreter, numpy and networks.
+PROCESS_OVERHEAD_MB = 128
+# Smaller tables barely help a search, so tables are never smaller, even if that
+# exceeds the budget.
+MIN_TABLE_SIZE_MB = 0.25
+
+
+@dataclass(frozen=True)
+class MemoryPlan:
+    budget_MB: float
+    processes: int
+    # What the tables of every process may take together.
+    process_tables_MB: float
+
+    @property
+    def total_MB(self) -> float:
+        return self.processes * (PROCESS_OVERHEAD_MB + self.process_tables_MB)
+
+    def get_table_size_MB(self, tables: int, max_size_MB: float) -> float:
+        return get_table_size_MB(self.process_tables_MB, tables, max_size_MB)
+
+
+def get_memory_budget_MB(budget_MB: Optional[float] = None) -> float:
+    if budget_MB is not None:
+        return budget_MB
+    return float(os.environ.get(MEMORY_BUDGET_ENV, MEMORY_BUDGET_MB))
+
+
+def plan_memory(processes: int, budget_MB: Optional[float] = None) -> MemoryPlan:
+    """
+    Splits the budget between `processes`, e.g. the workers of a pool. Every
+    process gets what is left of its share once its overhead is taken out.
+    """
+    budget_MB = get_memory_budget_MB(budget_MB)
+    processes = max(processes, 1)
+    share = budget_MB / processes - PROCESS_OVERHEAD_MB
+    return MemoryPlan(budget_MB, processes, max(share, 0.0))
+
+
+def get_table_size_MB(tables_MB: float, tables: int, max_size_MB: float) -> float:
+    # Tables share `tables_MB` evenly, but none grows beyond `max_size_MB`, which
+    # is as much as its searches can fill.
+    size = max(tables_MB / max(tables, 1), MIN_TABLE_SIZE_MB)
+    return min(size, max_size_MB)
+
+
+def format_memory_plan(plan: MemoryPlan) -> str:
+    line = (
+        f"memory: {plan.budget_MB:.0f}MB budget, {plan.processes} processes with "
+        f"{plan.process_tables_MB:.0f}MB of tables each"
+    )
+    if plan.total_MB > plan.budget_MB:
+        line += f", over budget by {plan.total_MB - plan.budget_MB:.0f}MB"
+    return line
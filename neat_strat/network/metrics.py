@@ -0,0 +1,220 @@
+import json
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, Optional, TextIO
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .transposition_table import TranspositionTable
+
+METRICS_FILENAME = "metrics.jsonl"
+FITNESS_PERCENTILES = (10, 50, 90)
+
+
+@dataclass
+class WorkerStats:
+    """What a worker did for one task. Workers return it along with the results."""
+
+    games: int = 0
+    searches: int = 0
+    nodes: int = 0
+    evaluations: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    # The largest peak resident memory of the workers.
+    peak_rss_MB: float = 0.0
+    # Memory of the tables of a task, which are allocated together, and the
+    # largest of them over tasks.
+    table_MB: float = 0.0
+    table_entries: int = 0
+    table_entries_used: int = 0
+
+    def add(self, other: "WorkerStats"):
+        self.games += other.games
+        self.searches += other.searches
+        self.nodes += other.nodes
+        self.evaluations += other.evaluations
+        self.batches += other.batches
+        self.seconds += other.seconds
+        self.cpu_seconds += other.cpu_seconds
+        self.peak_rss_MB = max(self.peak_rss_MB, other.peak_rss_MB)
+        self.table_MB = max(self.table_MB, other.table_MB)
+        self.table_entries += other.table_entries
+        self.table_entries_used += other.table_entries_used
+
+    def add_table(self, table: "TranspositionTable"):
+        self.table_MB += table.size_MB
+        self.table_entries += table.max_entries_count
+        self.table_entries_used += table.used
+
+
+@dataclass(frozen=True)
+class FitnessSummary:
+    best: float
+    mean: float
+    stdev: float
+    worst: float
+    percentiles: dict[str, float]
+
+    @classmethod
+    def from_fitnesses(cls, fitnesses: list[float]) -> "FitnessSummary":
+        if not fitnesses:
+            return cls(0.0, 0.0, 0.0, 0.0, {})
+
+        values = np.percentile(fitnesses, FITNESS_PERCENTILES)
+        return cls(
+            max(fitnesses),
+            statistics.fmean(fitnesses),
+            statistics.pstdev(fitnesses),
+            min(fitnesses),
+            {f"p{p}": float(v) for p, v in zip(FITNESS_PERCENTILES, values)},
+        )
+
+
+@dataclass(frozen=True)
+class GenerationMetrics:
+    generation: int
+    genomes: int
+    fitness: FitnessSummary
+    games_played: int
+    games_cached: int
+    seconds: float
+    games_per_second: float
+    nodes_per_search: float
+    evaluations: int
+    mean_batch_size: float
+    # Time the workers spent on games, over the time they were available for them.
+    worker_utilisation: float
+    # CPU time of the workers, over the time they were available for games.
+    cpu_utilisation: float
+    peak_worker_rss_MB: float
+    phases: dict[str, float]
+    # Genomes that were screened out before their games (see `prescreen`).
+    degenerate_genomes: int = 0
+    duplicate_genomes: int = 0
+    # Largest memory of the tables of a worker task, and the fraction of the
+    # entries of every table that were used.
+    worker_table_MB: float = 0.0
+    table_fill: float = 0.0
+
+
+class PhaseTimer:
+    """Wall time of the phases of a generation, e.g. games and checkpointing."""
+
+    def __init__(self):
+        self.phases: dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @property
+    def total(self) -> float:
+        return sum(self.phases.values())
+
+
+def get_generation_metrics(
+    generation: int,
+    fitnesses: list[float],
+    games_cached: int,
+    stats: WorkerStats,
+    timer: PhaseTimer,
+    workers: int,
+    degenerate_genomes: int = 0,
+    duplicate_genomes: int = 0,
+) -> GenerationMetrics:
+    games_seconds = timer.phases.get("games", 0.0)
+    available = games_seconds * workers
+    return GenerationMetrics(
+        generation=generation,
+        genomes=len(fitnesses),
+        fitness=FitnessSummary.from_fitnesses(fitnesses),
+        games_played=stats.games,
+        games_cached=games_cached,
+        seconds=timer.total,
+        games_per_second=stats.games / games_seconds if games_seconds else 0.0,
+        nodes_per_search=stats.nodes / stats.searches if stats.searches else 0.0,
+        evaluations=stats.evaluations,
+        mean_batch_size=stats.evaluations / stats.batches if stats.batches else 0.0,
+        worker_utilisation=min(stats.seconds / available, 1.0) if available else 0.0,
+        cpu_utilisation=stats.cpu_seconds / available if available else 0.0,
+        peak_worker_rss_MB=stats.peak_rss_MB,
+        phases=dict(timer.phases),
+        degenerate_genomes=degenerate_genomes,
+        duplicate_genomes=duplicate_genomes,
+        worker_table_MB=stats.table_MB,
+        table_fill=(
+            stats.table_entries_used / stats.table_entries
+            if stats.table_entries
+            else 0.0
+        ),
+    )
+
+
+def get_peak_rss_MB() -> float:
+    try:
+        import resource
+    except ImportError:
+        # Windows.
+        return 0.0
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere.
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def format_summary(metrics: GenerationMetrics) -> str:
+    phases = " ".join(
+        f"{name} {seconds:.1f}s" for name, seconds in metrics.phases.items()
+    )
+    return (
+        f"generation {metrics.generation}: "
+        f"fitness {metrics.fitness.best:.1f} best, {metrics.fitness.mean:.1f} mean | "
+        f"{metrics.games_played} games ({metrics.games_cached} cached), "
+        f"{metrics.degenerate_genomes + metrics.duplicate_genomes} screened, "
+        f"{metrics.games_per_second:.1f}/s | "
+        f"{metrics.nodes_per_search:.0f} nodes/search, "
+        f"batches of {metrics.mean_batch_size:.1f} | "
+        f"workers {metrics.worker_utilisation:.0%} busy, "
+        f"tables {metrics.worker_table_MB:.0f}MB {metrics.table_fill:.0%} full | "
+        f"{phases}"
+    )
+
+
+class MetricsLog:
+    """
+    Appends the metrics of every generation to a JSON lines file, and prints a
+    one line summary of them, so a run can be followed while it's in progress.
+    """
+
+    def __init__(self, path: Optional[Path | str], console: Optional[TextIO] = None):
+        self.path = Path(path) if path is not None else None
+        self.console = console
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def record(self, metrics: GenerationMetrics):
+        if self.path is not None:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(asdict(metrics)) + "\n")
+
+        if self.console is not None:
+            print(format_summary(metrics), file=self.console, flush=True)
+
+
+def read_metrics(path: Path | str) -> list[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
@@ -1,9 +1,15 @@
+import configparser
 import multiprocessing
 import pickle
 import random
+import sys
+import tempfile
+import time
+from collections import Counter
 from functools import partial
 from multiprocessing import Pool
 from pathlib import Path
+from typing import Optional
 
 import neat
 import math
@@ -11,44 +17,186 @@ import numpy as np
 from neat import FeedForwardNetwork, Genome
 from neat.utils import mean
 
-from .constants import EndgameState, Player
+from . import profiling
+from .adjudication import get_default_adjudicator
+from .benchmark import BENCHMARK_SEED, get_synthetic_batch_evaluator
+from .checkpoint import CheckpointStore
+from .compiled_network import BatchEvaluator, compile_network
+from .constants import BOARD_SIZE, EndgameState, Evaluator, Player
+from .fingerprint import get_genome_fingerprint
+from .fitness_cache import FitnessCache, GameKey
+from .game_log import GameLogWriter
 from .game_state import GameState
-from .search import play
+from .lockstep import LockstepStats, run_lockstep
+from .memory import format_memory_plan, plan_memory
+from .metrics import (
+    METRICS_FILENAME,
+    MetricsLog,
+    PhaseTimer,
+    WorkerStats,
+    get_generation_metrics,
+    get_peak_rss_MB,
+)
+from .prescreen import DEGENERATE_GAMES, Screening, screen_networks
+from .scheduler import Game, RacingScheduler
+from .search import play_steps
 
+MAX_MOVES = 20
+MAX_FITNESS = 400
+SEARCH_DEPTH = 3
+NETWORK_CACHE_SIZE = 1024
+# Self-play games are played together, so every game gets a small table. Searches
+# of SEARCH_DEPTH only fill a few thousand entries.
+SELF_PLAY_STORAGE_SIZE_MB = 1
 
-def fitness_func(
-    genome: Genome,
+# Networks compiled by this process, keyed by genome fingerprint. Pool workers
+# outlive generations, so elites and repeated opponents are compiled once.
+_networks: dict[str, Evaluator] = {}
+_batch_networks: dict[str, BatchEvaluator] = {}
+_synthetic_networks: dict[tuple[Optional[str], int], BatchEvaluator] = {}
+# Game logs of this process, by directory.
+_game_logs: dict[str, GameLogWriter] = {}
+
+
+def get_network(genome: Genome, fingerprint: Optional[str] = None) -> Evaluator:
+    if fingerprint is None:
+        return FeedForwardNetwork.from_genome(genome).activate
+
+    network = _networks.get(fingerprint)
+    if network is None:
+        if len(_networks) >= NETWORK_CACHE_SIZE:
+            _networks.clear()
+        network = FeedForwardNetwork.from_genome(genome).activate
+        _networks[fingerprint] = network
+
+    return network
+
+
+def get_batch_network(
+    genome: Genome, fingerprint: Optional[str] = None
+) -> BatchEvaluator:
+    network = _batch_networks.get(fingerprint) if fingerprint is not None else None
+    if network is None:
+        network, _ = compile_network(genome, get_network(genome, fingerprint))
+        if fingerprint is not None:
+            if len(_batch_networks) >= NETWORK_CACHE_SIZE:
+                _batch_networks.clear()
+            _batch_networks[fingerprint] = network
+
+    return network
+
+
+def get_synthetic_network(
+    fingerprint: Optional[str], board_size: int = BOARD_SIZE
+) -> BatchEvaluator:
+    # Stands in for the network of a genome with one that costs the same for every
+    # genome, e.g. to benchmark training. Every genome gets its own weights, so
+    # that games differ.
+    key = (fingerprint, board_size)
+    network = _synthetic_networks.get(key)
+    if network is None:
+        seed = int(fingerprint[:8], 16) if fingerprint is not None else BENCHMARK_SEED
+        network = get_synthetic_batch_evaluator(board_size**2, seed)
+        _synthetic_networks[key] = network
+
+    return network
+
+
+def get_game_log(directory: Path | str) -> GameLogWriter:
+    game_log = _game_logs.get(str(directory))
+    if game_log is None:
+        game_log = GameLogWriter(directory)
+        _game_logs[str(directory)] = game_log
+
+    return game_log
+
+
+def play_genomes_games(
+    tasks: list[tuple[Genome, Optional[str], list[Game]]],
     opponent_genomes: list[Genome],
-    min_opponents_count: int,
-) -> float:
-    player = FeedForwardNetwork.from_genome(genome).activate
-    opponents = [FeedForwardNetwork.from_genome(g).activate for g in opponent_genomes]
-
-    opponents_to_add = min_opponents_count - len(opponents)
-    if opponents_to_add > 0:
-        times_to_duplicate_opponents = opponents_to_add // len(opponents)
-        extra_opponents_to_add = opponents_to_add % len(opponents)
-        opponents.extend(opponents[:] * times_to_duplicate_opponents)
-
-        if extra_opponents_to_add:
-            opponents.extend(opponents[:extra_opponents_to_add])
-
-    max_moves = 20
-    max_fitness = 400
-    depth = 3
-
-    fitnesses: list[float] = []
-    for opponent in opponents:
-        opponent_starts = random.random() < 0.5
-        endstate, game_state = play(player, opponent, opponent_starts, max_moves, depth)
-        fitness = get_fitness(
-            endstate, game_state, opponent_starts, max_moves, max_fitness
+    board_size: int = BOARD_SIZE,
+    opponent_fingerprints: Optional[list[str]] = None,
+    game_log_dir: Optional[Path | str] = None,
+    synthetic: bool = False,
+    storage_size_MB: float = SELF_PLAY_STORAGE_SIZE_MB,
+) -> tuple[list[list[float]], WorkerStats]:
+    # The games of all genomes are played together, so the positions that every
+    # network evaluates are evaluated in batches.
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    stats = WorkerStats()
+
+    def get_player(genome: Genome, fingerprint: Optional[str]) -> BatchEvaluator:
+        if synthetic:
+            return get_synthetic_network(fingerprint, board_size)
+        return get_batch_network(genome, fingerprint)
+
+    opponents = {
+        index: get_player(
+            opponent_genomes[index],
+            opponent_fingerprints[index] if opponent_fingerprints else None,
         )
-        fitnesses.append(fitness)
+        for index in {index for _, _, games in tasks for index, _ in games}
+    }
 
-    fitness = mean(fitnesses)
-    print(f"Assigned fitness: {fitness}")
-    return fitness
+    steps = []
+    for genome, fingerprint, games in tasks:
+        player = get_player(genome, fingerprint)
+        for opponent_index, opponent_starts in games:
+            # Hopeless games are adjudicated instead of being played to the last
+            # move.
+            steps.append(
+                play_steps(
+                    player,
+                    opponents[opponent_index],
+                    opponent_starts,
+                    MAX_MOVES,
+                    SEARCH_DEPTH,
+                    board_size,
+                    get_default_adjudicator(),
+                    storage_size_MB=storage_size_MB,
+                    stats=stats,
+                )
+            )
+
+    lockstep_stats = LockstepStats()
+    results = iter(run_lockstep(steps, lockstep_stats))
+    game_log = get_game_log(game_log_dir) if game_log_dir is not None else None
+    fitnesses: list[list[float]] = []
+    for _, fingerprint, games in tasks:
+        genome_fitnesses = []
+        for (opponent_index, opponent_starts), (endstate, game_state) in zip(
+            games, results
+        ):
+            genome_fitnesses.append(
+                get_fitness(
+                    endstate, game_state, opponent_starts, MAX_MOVES, MAX_FITNESS
+                )
+            )
+            if game_log is not None:
+                opponent = (
+                    opponent_fingerprints[opponent_index]
+                    if opponent_fingerprints
+                    else None
+                )
+                game_log.add(
+                    fingerprint, opponent, opponent_starts, endstate, game_state
+                )
+        fitnesses.append(genome_fitnesses)
+
+    # Workers are never shut down cleanly, so every task ends with its games on
+    # disk.
+    if game_log is not None:
+        game_log.flush()
+
+    stats.games = len(steps)
+    stats.evaluations = lockstep_stats.evaluations
+    stats.batches = lockstep_stats.batches
+    stats.seconds = time.perf_counter() - start
+    stats.cpu_seconds = time.process_time() - cpu_start
+    stats.peak_rss_MB = get_peak_rss_MB()
+    profiling.dump()
+    return fitnesses, stats
 
 
 def get_fitness(
@@ -75,22 +223,24 @@ def get_fitness(
 
     if endstate == EndgameState.ONGOING:
         fitness += min(players_population * 3, fitness_threshold / 8)
+    elif endstate in (EndgameState.DRAW, EndgameState.REPETITION):
+        # A drawn game wasn't lost either, so it scores like one that ran out of
+        # moves.
+        fitness += min(players_population * 3, fitness_threshold / 8)
     elif endstate == won_status:
-        print(f"Status: {endstate.name.title()}")
         fitness += fitness_threshold / 8
         fitness += (max_moves - moves) * 2
     elif endstate == lost_status:
-        print(f"Status: {endstate.name.title()}")
         fitness += min(players_population * 2, fitness_threshold / 10)
 
     consider_move = lambda i: i % 2 if opponent_started else not i % 2
     moves_to_consider = [m for i, m in enumerate(move_record) if consider_move(i)]
 
     # Aggressive settings. Player will rush to the centre of the board.
-    # target = (2, 2)
+    # target = topology.centre
     # Defensive settings. Each player will try to remain on his own side of the board.
-    # target = (0, 4) if player == Player.RED else (4, 0)
-    target = (2, 2)
+    # target = (0, size - 1) if player == Player.RED else (size - 1, 0)
+    target = game_state.topology.centre
     for move in moves_to_consider:
         if len(move) == 2:
             fitness += 4
@@ -103,31 +253,235 @@ def get_fitness(
     return fitness
 
 
-def train(iterations: int) -> Genome:
-    local_path = Path(__file__).parent
-    config_path = local_path / "config.ini"
+CONFIG_PATH = Path(__file__).parent / "config.ini"
 
-    params = neat.Parameters(config_path)
-    population = neat.Population(params)
 
-    def evaluate(genomes: list[Genome], opponents: list[Genome]):
-        workers = multiprocessing.cpu_count()
-        pool = Pool(workers)
-        min_opponents_count = 5
+def read_config() -> configparser.ConfigParser:
+    config = configparser.ConfigParser()
+    config.read(CONFIG_PATH)
+    return config
+
+
+def get_params(board_size: int = BOARD_SIZE) -> neat.Parameters:
+    if board_size == BOARD_SIZE:
+        return neat.Parameters(CONFIG_PATH)
+
+    # The network has an input for every tile of the board.
+    config = read_config()
+    config["Genome"]["inputs"] = str(board_size**2)
+    with tempfile.TemporaryDirectory() as directory:
+        sized_config_path = Path(directory) / "config.ini"
+        with open(sized_config_path, "w") as f:
+            config.write(f)
+        return neat.Parameters(sized_config_path)
+
 
-        evaluator = partial(
-            fitness_func,
+def train(
+    iterations: int,
+    checkpoint_dir: Optional[Path | str] = None,
+    resume: bool = False,
+    board_size: int = BOARD_SIZE,
+    game_log_dir: Optional[Path | str] = None,
+    metrics_path: Optional[Path | str] = None,
+    workers: Optional[int] = None,
+    seed: Optional[int] = None,
+    synthetic: bool = False,
+    winner_path: Optional[Path | str] = "winner.pkl",
+    memory_budget_MB: Optional[float] = None,
+) -> Genome:
+    """
+    Evolves a population for `iterations` generations. With `seed`, the initial
+    population and the schedule of games are reproducible, and with `synthetic`,
+    games are played with stand-ins for the networks of the genomes that all cost
+    the same to evaluate (see `benchmark.run_training_benchmark`). The tables of
+    the workers share `memory_budget_MB` (see `memory.plan_memory`).
+    """
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+    params = get_params(board_size)
+    survival_rate = read_config().getfloat("Reproduction", "survival_rate")
+    fitness_cache = FitnessCache()
+    store = CheckpointStore(checkpoint_dir) if checkpoint_dir is not None else None
+    if metrics_path is None and store is not None:
+        metrics_path = store.directory / METRICS_FILENAME
+    metrics_log = MetricsLog(metrics_path, sys.stdout)
+    # Reproduction happens between evaluations, so its time is measured from the
+    # end of the previous evaluation and counted in the next generation.
+    evaluated_at: Optional[float] = None
+
+    generation = 0
+    if store is not None and resume and store.generations:
+        # The population is stored after its genomes were evaluated but before it
+        # reproduced, so the last stored generation is run again.
+        generation = store.latest_generation()
+        population = store.load_population(generation)
+    else:
+        population = neat.Population(params)
+
+    def evaluate(genomes: list[Genome], opponents: list[Genome]):
+        nonlocal generation, evaluated_at
+        timer = PhaseTimer()
+        if evaluated_at is not None:
+            timer.add("reproduction", time.perf_counter() - evaluated_at)
+        worker_stats = WorkerStats()
+        games_cached = 0
+        # Games are played in rounds. Genomes that are clearly in or out of the
+        # survivors stop playing, and the rest play more games. The population
+        # doesn't pass the species of the genomes to `evaluate`, so they race as
+        # one species.
+        scheduler = RacingScheduler(len(genomes), len(opponents), survival_rate)
+        fingerprints = [get_genome_fingerprint(g) for g in genomes]
+        opponent_fingerprints = [get_genome_fingerprint(g) for g in opponents]
+        screened: Counter[Screening] = Counter()
+        if not synthetic:
+            # Genomes whose networks can't tell positions apart play a single game,
+            # and near-duplicates share the games of the genome they duplicate.
+            with timer.phase("screening"):
+                networks = [
+                    get_batch_network(genome, fingerprint)
+                    for genome, fingerprint in zip(genomes, fingerprints)
+                ]
+                for index, result in enumerate(screen_networks(networks, board_size)):
+                    screened[result.screening] += 1
+                    if result.screening == Screening.DEGENERATE:
+                        scheduler.limit_games(index, DEGENERATE_GAMES)
+                    elif result.screening == Screening.DUPLICATE:
+                        scheduler.copy_games(index, result.duplicate_of)
+        player = partial(
+            play_genomes_games,
             opponent_genomes=opponents,
-            min_opponents_count=min_opponents_count,
+            board_size=board_size,
+            opponent_fingerprints=opponent_fingerprints,
+            game_log_dir=game_log_dir,
+            synthetic=synthetic,
         )
-        fitnesses = pool.map(evaluator, genomes)
 
+        def get_key(index: int, game: Game, storage_size_MB: float) -> GameKey:
+            opponent_index, opponent_starts = game
+            return GameKey(
+                fingerprints[index],
+                opponent_fingerprints[opponent_index],
+                opponent_starts,
+                SEARCH_DEPTH,
+                MAX_MOVES,
+                board_size,
+                storage_size_MB,
+            )
+
+        fitness_cache.reset_stats()
+        while True:
+            with timer.phase("scheduling"):
+                games = scheduler.next_round()
+                if not games:
+                    break
+
+                # The tables of every game of a round are as large, so that the
+                # size is known before the games are split between the workers.
+                # Workers get at most this many games of the round.
+                worker_games = math.ceil(len(games) / workers) * max(
+                    len(genome_games) for genome_games in games.values()
+                )
+                storage_size_MB = memory.get_table_size_MB(
+                    worker_games, SELF_PLAY_STORAGE_SIZE_MB
+                )
+
+                # Games that were already played, e.g. by an elite against the
+                # same opponents last generation, are taken from the cache.
+                tasks = []
+                for index, genome_games in games.items():
+                    cached = []
+                    missing = []
+                    for game in genome_games:
+                        fitness = fitness_cache.get(
+                            get_key(index, game, storage_size_MB)
+                        )
+                        if fitness is None:
+                            missing.append(game)
+                        else:
+                            cached.append(fitness)
+
+                    games_cached += len(cached)
+                    scheduler.record(index, cached)
+                    if missing:
+                        tasks.append((index, missing))
+
+                # Every worker plays the games of a chunk of the genomes together.
+                chunk_size = math.ceil(len(tasks) / workers) if tasks else 1
+                chunks = [
+                    [(genomes[i], fingerprints[i], missing) for i, missing in chunk]
+                    for chunk in (
+                        tasks[start : start + chunk_size]
+                        for start in range(0, len(tasks), chunk_size)
+                    )
+                ]
+
+            with timer.phase("games"):
+                chunk_results = pool.map(
+                    partial(player, storage_size_MB=storage_size_MB), chunks
+                )
+
+            results = []
+            for chunk_fitnesses, chunk_stats in chunk_results:
+                results.extend(chunk_fitnesses)
+                worker_stats.add(chunk_stats)
+            for (index, missing), fitnesses in zip(tasks, results):
+                for game, fitness in zip(missing, fitnesses):
+                    fitness_cache.add(get_key(index, game, storage_size_MB), fitness)
+                scheduler.record(index, fitnesses)
+
+        fitnesses = scheduler.fitnesses
         for fitness, genome in zip(fitnesses, genomes):
             genome.fitness = fitness
 
-    winner, statistical_data = population.run(evaluate, times=iterations)
+        if store is not None:
+            with timer.phase("checkpoint"):
+                winner = max(genomes, key=lambda g: g.fitness)
+                stats = {
+                    "generation": generation,
+                    "genomes": len(genomes),
+                    "best_fitness": winner.fitness,
+                    "mean_fitness": mean(fitnesses),
+                    "games_played": scheduler.games_played,
+                }
+                store.save(generation, population, winner, stats)
+
+        metrics_log.record(
+            get_generation_metrics(
+                generation,
+                fitnesses,
+                games_cached,
+                worker_stats,
+                timer,
+                workers,
+                degenerate_genomes=screened[Screening.DEGENERATE],
+                duplicate_genomes=screened[Screening.DUPLICATE],
+            )
+        )
+        if profiling.get_profiler() is not None:
+            profiling.write_report()
+        evaluated_at = time.perf_counter()
+        generation += 1
+
+    workers = workers or multiprocessing.cpu_count()
+    # The budget is split between the workers, whatever the number of cores.
+    memory = plan_memory(workers, memory_budget_MB)
+    print(format_memory_plan(memory))
+    profiling.enable_from_environment()
+    pool = Pool(workers, initializer=profiling.enable_from_environment)
+    try:
+        winner, statistical_data = population.run(
+            evaluate, times=iterations - generation
+        )
+    finally:
+        pool.close()
+        pool.join()
+        profiling.disable()
+        if store is not None:
+            store.close()
 
-    with open("winner.pkl", "wb") as f:
-        pickle.dump(winner, f)
+    if winner_path is not None:
+        with open(winner_path, "wb") as f:
+            pickle.dump(winner, f)
 
     return winner
@@ -0,0 +1,88 @@
+from dataclasses import dataclass
+from enum import StrEnum, auto
+from functools import cache
+from typing import Optional
+
+import numpy as np
+from nptyping import NDArray
+
+from .compiled_network import BatchEvaluator
+from .constants import BOARD_SIZE
+from .quantization import get_calibration_inputs
+
+PROBE_POSITIONS = 128
+PROBE_SEED = 1
+# Networks whose outputs vary less than this over the probes are degenerate: their
+# searches can't tell positions apart.
+DEGENERATE_STDEV = 1e-4
+# Networks whose outputs are all within this of the outputs of an earlier network
+# are near-duplicates of it.
+DUPLICATE_TOLERANCE = 1e-4
+# Games of degenerate genomes, which are enough to rank them low.
+DEGENERATE_GAMES = 1
+
+
+class Screening(StrEnum):
+    PLAY = auto()
+    DEGENERATE = auto()
+    DUPLICATE = auto()
+
+
+@dataclass(frozen=True)
+class ScreenResult:
+    screening: Screening
+    # The genome whose games a near-duplicate shares.
+    duplicate_of: Optional[int] = None
+
+
+@cache
+def get_probe_inputs(board_size: int = BOARD_SIZE) -> NDArray:
+    # The same positions every generation.
+    probes = get_calibration_inputs(board_size, PROBE_POSITIONS, seed=PROBE_SEED)
+    probes.flags.writeable = False
+    return probes
+
+
+def get_probe_outputs(networks: list[BatchEvaluator], probes: NDArray) -> NDArray:
+    # Every network evaluates all probes in one batch, into a row of outputs.
+    if not networks:
+        return np.empty((0, len(probes)))
+    return np.stack([np.asarray(network(probes)).sum(axis=1) for network in networks])
+
+
+def screen_outputs(
+    outputs: NDArray,
+    degenerate_stdev: float = DEGENERATE_STDEV,
+    duplicate_tolerance: float = DUPLICATE_TOLERANCE,
+) -> list[ScreenResult]:
+    """
+    Screens genomes by the outputs of their networks on the probes, one row per
+    genome. A near-duplicate refers to the first genome it duplicates, which is
+    never a duplicate itself.
+    """
+    degenerate = outputs.std(axis=1) < degenerate_stdev
+    results: list[ScreenResult] = []
+    originals: list[int] = []
+    for index, row in enumerate(outputs):
+        if degenerate[index]:
+            results.append(ScreenResult(Screening.DEGENERATE))
+            continue
+
+        if originals:
+            # Largest difference to the outputs of every genome that plays.
+            distances = np.abs(outputs[originals] - row).max(axis=1)
+            match = int(np.argmax(distances < duplicate_tolerance))
+            if distances[match] < duplicate_tolerance:
+                results.append(ScreenResult(Screening.DUPLICATE, originals[match]))
+                continue
+
+        originals.append(index)
+        results.append(ScreenResult(Screening.PLAY))
+
+    return results
+
+
+def screen_networks(
+    networks: list[BatchEvaluator], board_size: int = BOARD_SIZE
+) -> list[ScreenResult]:
+    return screen_outputs(get_probe_outputs(networks, get_probe_inputs(board_size)))
@@ -0,0 +1,314 @@
+import functools
+import importlib
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from enum import StrEnum, auto
+from pathlib import Path
+from types import FrameType
+from typing import Any, Callable, Optional
+
+# Profiling is off unless it's enabled, e.g. with NEAT_STRAT_PROFILE=timers. The
+# environment is inherited by pool workers, which enable it for themselves.
+PROFILE_ENV = "NEAT_STRAT_PROFILE"
+PROFILE_DIR_ENV = "NEAT_STRAT_PROFILE_DIR"
+DEFAULT_PROFILE_DIR = "profile"
+SAMPLE_INTERVAL = 0.005
+REPORT_FILENAME = "report.txt"
+STACKS_FILENAME = "stacks.collapsed"
+PROCESS_PREFIX = "process-"
+
+# Functions that get timers: timer name, module and attribute path. Functions with
+# the same timer name share it.
+TIMED_FUNCTIONS = (
+    # Searches, whether `Searcher.search` runs them or games in lockstep do.
+    ("search", "neat_strat.network.search", "Searcher.search_steps"),
+    ("get_possible_moves", "neat_strat.network.search", "get_possible_moves"),
+    # The stages of move generation in search.
+    ("get_capture_moves", "neat_strat.network.search", "get_capture_moves"),
+    ("get_quiet_moves", "neat_strat.network.search", "get_quiet_moves"),
+    ("make_move", "neat_strat.network.game_state", "make_move"),
+    ("undo_move", "neat_strat.network.game_state", "undo_move"),
+    # Evaluations of synchronous searches, and the batches of games in lockstep.
+    ("evaluate", "neat_strat.network.search", "run_steps"),
+    ("evaluate", "neat_strat.network.lockstep", "evaluate_batch"),
+    ("play_games", "neat_strat.network.neural_network", "play_genomes_games"),
+)
+
+
+class ProfileMode(StrEnum):
+    TIMERS = auto()
+    # Timers, and a sampling profiler of the stacks of the main thread.
+    SAMPLE = auto()
+
+
+@dataclass
+class TimerStats:
+    calls: int = 0
+    seconds: float = 0.0
+
+
+def time_function(function: Callable, stats: TimerStats) -> Callable:
+    @functools.wraps(function)
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            stats.calls += 1
+            stats.seconds += time.perf_counter() - start
+
+    return timed
+
+
+def time_evaluations(run_steps: Callable, stats: TimerStats) -> Callable:
+    # Searches drive their steps with `run_steps`, so timing its evaluator times
+    # every evaluation of a synchronous search.
+    @functools.wraps(run_steps)
+    def timed(steps, evaluator):
+        return run_steps(steps, time_function(evaluator, stats))
+
+    return timed
+
+
+def time_steps(function: Callable, stats: TimerStats) -> Callable:
+    # Steps are resumed by whoever evaluates their inputs, e.g. along with the
+    # steps of other games, so only the time spent in the steps themselves is
+    # counted, once per run of the steps.
+    @functools.wraps(function)
+    def timed(*args, **kwargs):
+        steps = function(*args, **kwargs)
+        stats.calls += 1
+        outputs = None
+        while True:
+            start = time.perf_counter()
+            try:
+                inputs = steps.send(outputs)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                stats.seconds += time.perf_counter() - start
+            outputs = yield inputs
+
+    return timed
+
+
+def get_timer(function: Callable, stats: TimerStats) -> Callable:
+    if function.__name__ == "run_steps":
+        return time_evaluations(function, stats)
+    if inspect.isgeneratorfunction(function):
+        return time_steps(function, stats)
+    return time_function(function, stats)
+
+
+def get_stack(frame: Optional[FrameType]) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        module = frame.f_globals.get("__name__", "?")
+        names.append(f"{module}:{code.co_name}")
+        frame = frame.f_back
+
+    return ";".join(reversed(names))
+
+
+class Profiler:
+    """
+    Timers around the functions of `TIMED_FUNCTIONS`. They're installed by
+    replacing the functions in every loaded module of the package, so nothing
+    changes while profiling is off. Every process dumps its own results, which
+    `write_report` merges.
+    """
+
+    def __init__(self, mode: ProfileMode, directory: Path | str):
+        self.mode = mode
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.timers: dict[str, TimerStats] = {}
+        self.stacks: Counter[str] = Counter()
+        self._stacks_lock = threading.Lock()
+        self._patches: list[tuple[Any, str, Any]] = []
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.pid = os.getpid()
+
+    @property
+    def path(self) -> Path:
+        return self.directory / f"{PROCESS_PREFIX}{os.getpid()}.json"
+
+    def start(self):
+        for name, module_name, attribute in TIMED_FUNCTIONS:
+            try:
+                module = importlib.import_module(module_name)
+            except ImportError:
+                # e.g. training modules without neat installed.
+                continue
+
+            stats = self.timers.setdefault(name, TimerStats())
+            owner_name, _, function_name = attribute.rpartition(".")
+            if owner_name:
+                owner = getattr(module, owner_name)
+                function = getattr(owner, function_name)
+                self._patch(owner, function_name, get_timer(function, stats))
+                continue
+
+            function = getattr(module, function_name)
+            timed = get_timer(function, stats)
+            # Modules that imported the function have their own reference to it.
+            for loaded in list(sys.modules.values()):
+                if getattr(loaded, "__name__", "").startswith("neat_strat") and (
+                    getattr(loaded, function_name, None) is function
+                ):
+                    self._patch(loaded, function_name, timed)
+
+        if self.mode == ProfileMode.SAMPLE:
+            self._start_sampler(threading.main_thread().ident)
+
+    def stop(self):
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+
+        for owner, name, original in reversed(self._patches):
+            setattr(owner, name, original)
+        self._patches.clear()
+
+    def restart_in_child(self):
+        # A forked worker inherits the timers, but not the sampler thread, and
+        # its results start from zero.
+        self.pid = os.getpid()
+        for stats in self.timers.values():
+            stats.calls = 0
+            stats.seconds = 0.0
+        self._stacks_lock = threading.Lock()
+        self.stacks.clear()
+        self._sampler = None
+        if self.mode == ProfileMode.SAMPLE:
+            self._start_sampler(threading.main_thread().ident)
+
+    def dump(self):
+        # Results are cumulative, so every dump replaces the previous one.
+        with self._stacks_lock:
+            stacks = dict(self.stacks)
+        timers = {
+            name: [stats.calls, stats.seconds] for name, stats in self.timers.items()
+        }
+        data = {"timers": timers, "stacks": stacks}
+        temporary = self.path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(data))
+        temporary.replace(self.path)
+
+    def _patch(self, owner: Any, name: str, replacement: Any):
+        self._patches.append((owner, name, getattr(owner, name)))
+        setattr(owner, name, replacement)
+
+    def _start_sampler(self, thread_id: Optional[int]):
+        def sample():
+            while not self._stop.wait(SAMPLE_INTERVAL):
+                frame = sys._current_frames().get(thread_id)
+                if frame is not None:
+                    stack = get_stack(frame)
+                    with self._stacks_lock:
+                        self.stacks[stack] += 1
+
+        self._stop.clear()
+        self._sampler = threading.Thread(target=sample, daemon=True)
+        self._sampler.start()
+
+
+_profiler: Optional[Profiler] = None
+
+
+def get_profiler() -> Optional[Profiler]:
+    return _profiler
+
+
+def enable(
+    mode: ProfileMode | str, directory: Path | str = DEFAULT_PROFILE_DIR
+) -> Profiler:
+    global _profiler
+    if _profiler is not None:
+        if _profiler.pid != os.getpid():
+            _profiler.restart_in_child()
+        return _profiler
+
+    _profiler = Profiler(ProfileMode(mode), directory)
+    _profiler.start()
+    return _profiler
+
+
+def enable_from_environment() -> Optional[Profiler]:
+    mode = os.environ.get(PROFILE_ENV)
+    if not mode:
+        return None
+
+    return enable(mode, os.environ.get(PROFILE_DIR_ENV, DEFAULT_PROFILE_DIR))
+
+
+def disable():
+    global _profiler
+    if _profiler is not None:
+        _profiler.stop()
+        _profiler = None
+
+
+def dump():
+    if _profiler is not None:
+        _profiler.dump()
+
+
+def merge_profiles(
+    directory: Path | str,
+) -> tuple[dict[str, TimerStats], Counter[str]]:
+    timers: dict[str, TimerStats] = {}
+    stacks: Counter[str] = Counter()
+    for path in sorted(Path(directory).glob(f"{PROCESS_PREFIX}*.json")):
+        data = json.loads(path.read_text())
+        for name, (calls, seconds) in data["timers"].items():
+            stats = timers.setdefault(name, TimerStats())
+            stats.calls += calls
+            stats.seconds += seconds
+        stacks.update(data["stacks"])
+
+    return timers, stacks
+
+
+def format_report(timers: dict[str, TimerStats], samples: int) -> str:
+    lines = [f"{'timer':<20} {'calls':>12} {'seconds':>10} {'us/call':>10}"]
+    for name, stats in sorted(
+        timers.items(), key=lambda item: item[1].seconds, reverse=True
+    ):
+        per_call = 1e6 * stats.seconds / stats.calls if stats.calls else 0.0
+        lines.append(
+            f"{name:<20} {stats.calls:>12} {stats.seconds:>10.3f} {per_call:>10.2f}"
+        )
+    lines.append(f"{samples} stack samples")
+    return "\n".join(lines) + "\n"
+
+
+def write_report(directory: Optional[Path | str] = None) -> tuple[Path, Path]:
+    """
+    Merges the results of every process into a report of the timers and a file of
+    collapsed stacks that flame graph tools read. Timers measure inclusive time,
+    so nested timers, e.g. `make_move` in `search`, are counted in both. Only
+    evaluations are left out of `search`, see `time_steps`.
+    """
+    if _profiler is not None:
+        _profiler.dump()
+        directory = directory if directory is not None else _profiler.directory
+    directory = Path(directory if directory is not None else DEFAULT_PROFILE_DIR)
+
+    timers, stacks = merge_profiles(directory)
+    report_path = directory / REPORT_FILENAME
+    report_path.write_text(format_report(timers, sum(stacks.values())))
+    stacks_path = directory / STACKS_FILENAME
+    stacks_path.write_text(
+        "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+    )
+    return report_path, stacks_path
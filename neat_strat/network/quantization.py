@@ -0,0 +1,95 @@
+import math
+import random
+from dataclasses import dataclass
+
+import numpy as np
+from nptyping import NDArray
+
+from .constants import BOARD_SIZE, EndgameState, Evaluator
+from .game_state import make_move
+from .search import (
+    EVALUATION_OFFSET,
+    format_board_for_evaluation,
+    get_default_state,
+    get_endgame_state,
+    get_possible_moves,
+)
+from .transposition_table import QUANTIZED_WIN_SCORE_BOUND, is_win_score
+
+# Quantized evaluations are clamped to this bound, so that they fit in 16 bits
+# along with the wins of the transposition table.
+QUANTIZED_EVALUATION_LIMIT = QUANTIZED_WIN_SCORE_BOUND - 1
+# Calibration scales evaluations so that the evaluations of most positions are
+# within this many units, i.e. hundredths of a typical evaluation.
+CALIBRATED_UNITS = 1_000
+CALIBRATION_PERCENTILE = 99
+CALIBRATION_POSITIONS = 64
+CALIBRATION_PLIES = 24
+CALIBRATION_SEED = 0
+# Evaluations that span the whole range of the sigmoid use the smallest scale.
+MIN_SCALE = CALIBRATED_UNITS / EVALUATION_OFFSET
+MAX_SCALE = 1e7
+
+
+@dataclass(frozen=True)
+class Quantization:
+    """
+    Maps evaluations, already shifted by `EVALUATION_OFFSET`, to integers, so that
+    searches compare integers and their null windows are exact. `scale` is the
+    number of units of one unit of the evaluation.
+    """
+
+    scale: float
+
+    def quantize(self, evaluation: float) -> int:
+        score = round(evaluation * self.scale)
+        limit = QUANTIZED_EVALUATION_LIMIT
+        return max(-limit, min(score, limit))
+
+    def dequantize(self, score: int) -> float:
+        return score if is_win_score(score) else score / self.scale
+
+    def quantize_margin(self, margin: float) -> int:
+        # Margins never round to an empty window.
+        return max(math.ceil(margin * self.scale), 1)
+
+    @classmethod
+    def from_outputs(cls, outputs: list[float]) -> "Quantization":
+        if not outputs:
+            return cls(MIN_SCALE)
+
+        evaluations = np.abs(np.asarray(outputs) - EVALUATION_OFFSET)
+        spread = float(np.percentile(evaluations, CALIBRATION_PERCENTILE))
+        if spread <= 0.0:
+            return cls(MAX_SCALE)
+
+        return cls(min(max(CALIBRATED_UNITS / spread, MIN_SCALE), MAX_SCALE))
+
+
+def get_calibration_inputs(
+    board_size: int = BOARD_SIZE,
+    positions: int = CALIBRATION_POSITIONS,
+    plies: int = CALIBRATION_PLIES,
+    seed: int = CALIBRATION_SEED,
+) -> NDArray:
+    # Network inputs of positions of random games, from the point of view of the
+    # side to move.
+    rng = random.Random(seed)
+    inputs = []
+    for _ in range(positions):
+        state = get_default_state(board_size)
+        for _ in range(rng.randrange(plies + 1)):
+            moves = get_possible_moves(state.board, state.player_to_move)
+            make_move(state, rng.choice(moves))
+            if get_endgame_state(state.board) != EndgameState.ONGOING:
+                break
+
+        inputs.append(format_board_for_evaluation(state.board, state.player_to_move))
+
+    return np.stack(inputs)
+
+
+def calibrate(evaluator: Evaluator, board_size: int = BOARD_SIZE) -> Quantization:
+    """The quantization of the evaluations of a network, e.g. of one genome."""
+    inputs = get_calibration_inputs(board_size)
+    return Quantization.from_outputs([float(sum(evaluator(row))) for row in inputs])
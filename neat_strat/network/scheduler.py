@@ -0,0 +1,217 @@
+import math
+import statistics
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Hashable, Optional, Sequence
+
+# One sided z-score of the confidence intervals used to decide races (95%).
+RACING_CONFIDENCE_Z = 1.645
+MIN_GAMES = 2
+GAMES_PER_ROUND = 2
+# Games every genome used to play, before racing.
+BASELINE_GAMES = 5
+MAX_GAMES = 2 * BASELINE_GAMES
+
+# (opponent index, opponent starts)
+Game = tuple[int, bool]
+
+
+@dataclass
+class GenomeRace:
+    fitnesses: list[float] = field(default_factory=list)
+    # Set once the genome is confidently inside or outside the survivors.
+    decided: bool = False
+    # Games of the genome, if it plays fewer than the other genomes.
+    max_games: Optional[int] = None
+    # Genome whose games stand for the games of this genome, e.g. a duplicate.
+    copy_of: Optional[int] = None
+
+    @property
+    def games(self) -> int:
+        return len(self.fitnesses)
+
+    @property
+    def mean(self) -> float:
+        return statistics.fmean(self.fitnesses) if self.fitnesses else 0.0
+
+
+class RacingScheduler:
+    """
+    Plays games in rounds and stops evaluating genomes once their fitness is
+    confidently above or below the survival threshold (racing). NEAT selects the
+    survivors of every species, so genomes only race the genomes of their
+    `species`, of which the best `survival_rate` survive. Genomes without species
+    race as one. The games that aren't played by decided genomes go to the
+    genomes that are still contenders, which play up to `max_games` games. An
+    optional `games_budget` caps the games of all rounds together. Genomes can be
+    given fewer games beforehand (`limit_games`), or share the games of another
+    genome (`copy_games`).
+    """
+
+    def __init__(
+        self,
+        genomes_count: int,
+        opponents_count: int,
+        survival_rate: float,
+        min_games: int = MIN_GAMES,
+        max_games: int = MAX_GAMES,
+        games_per_round: int = GAMES_PER_ROUND,
+        games_budget: Optional[int] = None,
+        confidence_z: float = RACING_CONFIDENCE_Z,
+        species: Optional[Sequence[Hashable]] = None,
+    ):
+        self.opponents_count = opponents_count
+        self.min_games = min_games
+        self.max_games = max_games
+        self.games_per_round = games_per_round
+        self.games_budget = games_budget
+        self.confidence_z = confidence_z
+        self.races = [GenomeRace() for _ in range(genomes_count)]
+        self.species = list(species) if species is not None else [0] * genomes_count
+        self.members: dict[Hashable, list[int]] = defaultdict(list)
+        for index, key in enumerate(self.species):
+            self.members[key].append(index)
+        self.survivors_counts = {
+            key: min(max(math.ceil(survival_rate * len(members)), 1), len(members))
+            for key, members in self.members.items()
+        }
+        self.games_played = 0
+        self.rounds = 0
+
+    @property
+    def fitnesses(self) -> list[float]:
+        return [self._get_race(index).mean for index in range(len(self.races))]
+
+    @property
+    def contenders(self) -> list[int]:
+        return [
+            index
+            for index, race in enumerate(self.races)
+            if not race.decided and race.games < self._get_max_games(race)
+        ]
+
+    def limit_games(self, genome_index: int, max_games: int):
+        self.races[genome_index].max_games = max_games
+
+    def copy_games(self, genome_index: int, source_index: int):
+        race = self.races[genome_index]
+        race.copy_of = source_index
+        race.decided = True
+
+    def next_round(self) -> dict[int, list[Game]]:
+        if self.rounds == 0:
+            games = {
+                index: min(self.min_games, self._get_max_games(race))
+                for index, race in enumerate(self.races)
+                if race.copy_of is None
+            }
+        else:
+            self._decide_races()
+            games = {index: self.games_per_round for index in self.contenders}
+
+        budget = (
+            self.games_budget - self.games_played
+            if self.games_budget is not None
+            else math.inf
+        )
+        if self.rounds and sum(games.values()) > budget:
+            # Spend what is left on the contenders that are closest to the threshold.
+            thresholds = self._get_thresholds()
+            ranked = sorted(
+                games,
+                key=lambda i: abs(self.races[i].mean - thresholds[self.species[i]]),
+            )
+            games = {}
+            for index in ranked:
+                count = min(self.games_per_round, budget)
+                if count <= 0:
+                    break
+                games[index] = count
+                budget -= count
+
+        self.rounds += 1
+        return {
+            index: self._schedule_games(index, count)
+            for index, count in games.items()
+            if count > 0
+        }
+
+    def record(self, genome_index: int, fitnesses: list[float]):
+        self.races[genome_index].fitnesses.extend(fitnesses)
+        self.games_played += len(fitnesses)
+
+    def _schedule_games(self, genome_index: int, count: int) -> list[Game]:
+        # Every opponent is played from both sides before any opponent is repeated.
+        race = self.races[genome_index]
+        played = race.games
+        return [
+            ((game // 2) % self.opponents_count, bool(game % 2))
+            for game in range(
+                played, min(played + count, self._get_max_games(race))
+            )
+        ]
+
+    def _get_race(self, genome_index: int) -> GenomeRace:
+        race = self.races[genome_index]
+        return race if race.copy_of is None else self.races[race.copy_of]
+
+    def _get_max_games(self, race: GenomeRace) -> int:
+        return self.max_games if race.max_games is None else race.max_games
+
+    def _get_thresholds(self) -> dict[Hashable, float]:
+        fitnesses = self.fitnesses
+        thresholds = {}
+        for key, members in self.members.items():
+            means = sorted((fitnesses[index] for index in members), reverse=True)
+            thresholds[key] = means[self.survivors_counts[key] - 1]
+        return thresholds
+
+    def _get_pooled_stdev(self) -> float:
+        variances = [
+            statistics.variance(race.fitnesses)
+            for race in self.races
+            if race.games >= 2
+        ]
+        if variances:
+            return math.sqrt(statistics.fmean(variances))
+
+        fitnesses = [f for race in self.races for f in race.fitnesses]
+        return statistics.stdev(fitnesses) if len(fitnesses) >= 2 else 0.0
+
+    def _get_bounds(self, race: GenomeRace, pooled_stdev: float) -> tuple[float, float]:
+        stdev = statistics.stdev(race.fitnesses) if race.games >= 2 else pooled_stdev
+        # Small samples underestimate the spread, so never trust less than the
+        # spread of the whole population.
+        stdev = max(stdev, pooled_stdev)
+        margin = self.confidence_z * stdev / math.sqrt(max(race.games, 1))
+        return race.mean - margin, race.mean + margin
+
+    def _decide_races(self):
+        # Games are as noisy in every species, so their spread is pooled over all.
+        pooled_stdev = self._get_pooled_stdev()
+        bounds = [
+            self._get_bounds(self._get_race(index), pooled_stdev)
+            for index in range(len(self.races))
+        ]
+        for key, members in self.members.items():
+            lower_bounds = sorted((bounds[i][0] for i in members), reverse=True)
+            upper_bounds = sorted((bounds[i][1] for i in members), reverse=True)
+
+            survivors = self.survivors_counts[key]
+            # Genomes below this bound are out, since at least `survivors` genomes
+            # of their species are confidently better than them.
+            exclusion_bound = lower_bounds[survivors - 1]
+            # Genomes above this bound are in, since less than `survivors` other
+            # genomes of their species can still be better than them.
+            inclusion_bound = (
+                upper_bounds[survivors] if survivors < len(upper_bounds) else -math.inf
+            )
+
+            for index in members:
+                race = self.races[index]
+                if race.decided:
+                    continue
+
+                lower, upper = bounds[index]
+                if upper < exclusion_bound or lower > inclusion_bound:
+                    race.decided = True
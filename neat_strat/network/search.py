@@ -1,32 +1,93 @@
-import math
-from typing import Optional, Self
+import random
+from dataclasses import dataclass, field
+from functools import partial
+from typing import TYPE_CHECKING, Generator, Iterator, Optional, TypeVar
 
 import numpy as np
 from nptyping import NDArray
 
-from .constants import MAX_TROOPS, Board, Coords, EndgameState, Evaluator, Move
-from .game_state import GameState, Player, make_move, undo_move
-from .neighbours_table import lookup_neighbours
-from .transposition_table import NodeFlag, TranspositionTable, evaluate_entry
-from .zobrist import compute_zobri_hash
-
-STORAGE_SIZE_MB = 1024
+from .compiled_network import IncrementalEvaluator
+from .constants import (
+    BOARD_SIZE,
+    INFINITE_SCORE,
+    MAX_TROOPS,
+    WIN_SCORE,
+    Board,
+    Coords,
+    EndgameState,
+    Evaluator,
+    Move,
+)
+from .game_state import GameState, Player, is_repetition, make_move, undo_move
+from .search_state import SearchStack
+from .trace import NodeKind, TraceReason
+from .topology import get_topology
+from .transposition_table import (
+    NodeFlag,
+    TranspositionTable,
+    evaluate_entry,
+    is_win_score,
+    score_from_tt,
+    score_to_tt,
+)
+from .zobrist import compute_zobri_hash, compute_zobri_hashes
+
+if TYPE_CHECKING:
+    from .adjudication import Adjudicator
+    from .metrics import WorkerStats
+    from .quantization import Quantization
+    from .trace import TraceRecorder
+
+# Largest table of a single searcher, which searches of MAX_DEPTH barely fill.
+STORAGE_SIZE_MB = 16
 SINGULAR_MOVE_MARGIN = 1.0
 SINGULAR_EXTENSION_DEPTH_LIMIT = 3
 SINGULAR_MOVE_EXTENSION = 1
 MAX_DEPTH = 10
 IID_DEPTH_LIMIT = 4
-
-
-def get_default_board() -> Board:
-    board = np.zeros((5, 5), dtype=np.int8)
-    board[0][4] = -10
-    board[4][0] = 10
-    return board
-
-
-def get_default_state() -> GameState:
-    board = get_default_board()
+QUIESCENCE = True
+# Networks have a single sigmoid output, so their evaluations are in (0, 1) and an
+# even position evaluates to 0.5. Negamax needs scores where the score of one side
+# is the negation of the score of the other, so evaluations are shifted by it.
+EVALUATION_OFFSET = 0.5
+# Largest change of the evaluation that a capture can cause. A capture clears a
+# single tile, which can decide an even position but not turn a decided one
+# around, so captures change the evaluation by at most half of its range.
+QUIESCENCE_DELTA_MARGIN = EVALUATION_OFFSET
+# Half width of the first root window around the score of the previous iteration.
+ASPIRATION_WINDOW = 0.05
+# Widest half width of a root window. Past the range of the evaluation only wins
+# and losses are left.
+ASPIRATION_WINDOW_LIMIT = 2 * EVALUATION_OFFSET
+# Width of the windows that only test whether a score is above a bound. Scores of
+# evaluations are fractions, so a window of 1 would span all of them.
+NULL_WINDOW = 1e-6
+ASPIRATION_WIDENING = 4
+# Whether the children of depth 1 nodes are made and evaluated together.
+FRONTIER_BATCHING = True
+
+T = TypeVar("T")
+Network = TypeVar("Network")
+# Searches are generators that yield the network input of every position they
+# evaluate, are sent the output of the network, and return their result. So the
+# caller decides how inputs are evaluated, e.g. together with the inputs of other
+# searches. Frontier nodes yield the inputs of all of their children at once, as
+# the rows of one array, and are sent an output per row.
+Steps = Generator[NDArray, list[float], T]
+EvaluationSteps = Steps[float]
+SearchSteps = Steps[Move]
+# Games yield the network of the side to move along with its input.
+PlaySteps = Generator[
+    tuple[Network, NDArray], list[float], tuple[EndgameState, GameState]
+]
+
+
+def get_default_board(size: int = BOARD_SIZE) -> Board:
+    return get_topology(size).get_default_board()
+
+
+def get_default_state(size: int = BOARD_SIZE) -> GameState:
+    board = get_default_board(size)
     return GameState(board, compute_zobri_hash(board, Player.BLUE), Player.BLUE)
 
 
@@ -50,70 +111,224 @@ def get_endgame_state(state: Board) -> EndgameState:
     return EndgameState.DRAW
 
 
-def get_possible_moves(board: Board, player_to_move: Player) -> list[Move]:
-    temp_board = board * player_to_move
-    moves: list[Move] = []
-
-    for index, value in np.ndenumerate(temp_board):
-        if value <= 0:
+def get_terminal_score(endgame_state: EndgameState, player: Player, ply: int) -> float:
+    # Scored from the point of view of `player`. The closer the win, the higher
+    # the score, so that the search prefers the fastest win and the slowest loss.
+    if endgame_state in (EndgameState.DRAW, EndgameState.REPETITION):
+        return 0
+
+    winner = Player.BLUE if endgame_state == EndgameState.BLUE_WON else Player.RED
+    score = WIN_SCORE - ply
+    return score if winner == player else -score
+
+
+def get_possible_moves(
+    board: Board, player_to_move: Player, moves: Optional[list[Move]] = None
+) -> list[Move]:
+    # Moves are taken from the tables of the topology, so generating them doesn't
+    # create any new tuples. If a list is passed, it's cleared and reused.
+    topology = get_topology(board.shape[0])
+    values = board.ravel().tolist()
+    if moves is None:
+        moves = []
+    else:
+        moves.clear()
+
+    for tile, value in enumerate(values):
+        troops = value * player_to_move
+        if troops <= 0:
             continue
 
-        if value < MAX_TROOPS:
-            moves.append((Coords(index), Coords(index)))
+        if troops < MAX_TROOPS:
+            moves.append(topology.production_moves[tile])
 
-        for neighbor in lookup_neighbours(*index):
-            troops_capacity = MAX_TROOPS - temp_board[neighbor]
+        reposition_moves = topology.reposition_moves[tile]
+        for slot, neighbor in enumerate(topology.neighbour_tiles[tile]):
+            troops_capacity = MAX_TROOPS - values[neighbor] * player_to_move
 
             if troops_capacity == 0:
                 continue
 
-            troops = temp_board[index]
-            troops_transfers_to_consider = [troops, 1]
+            transfers = reposition_moves[slot]
+            moves.append(transfers[min(troops_capacity, troops) * player_to_move])
+            moves.append(transfers[min(troops_capacity, 1) * player_to_move])
             if troops > 2:
-                troops_transfers_to_consider.append(troops - 1)
+                troops_to_transfer = min(troops_capacity, troops - 1)
+                moves.append(transfers[troops_to_transfer * player_to_move])
+
+    return moves
+
 
-            for troops_to_transfer in troops_transfers_to_consider:
-                troops = min(troops_capacity, troops_to_transfer) * player_to_move
-                moves.append((Coords(index), neighbor, int(troops)))
+def get_capture_moves(
+    board: Board,
+    player_to_move: Player,
+    moves: Optional[list[Move]] = None,
+    clearing_only: bool = False,
+) -> list[Move]:
+    # Reposition moves into tiles of the opponent. Unlike `get_possible_moves`,
+    # every move appears once. With `clearing_only`, only captures that leave no
+    # enemy troops on the tile are generated.
+    topology = get_topology(board.shape[0])
+    values = board.ravel().tolist()
+    if moves is None:
+        moves = []
+    else:
+        moves.clear()
+
+    for tile, value in enumerate(values):
+        troops = value * player_to_move
+        if troops <= 0:
+            continue
+
+        reposition_moves = topology.reposition_moves[tile]
+        for slot, neighbor in enumerate(topology.neighbour_tiles[tile]):
+            enemy_troops = -values[neighbor] * player_to_move
+            if enemy_troops <= 0:
+                continue
+
+            least_troops = enemy_troops if clearing_only else 1
+            transfers = reposition_moves[slot]
+            if troops >= least_troops:
+                moves.append(transfers[troops * player_to_move])
+            if troops > 1 and least_troops == 1:
+                moves.append(transfers[player_to_move])
+            if troops > 2 and troops - 1 >= least_troops:
+                moves.append(transfers[(troops - 1) * player_to_move])
 
     return moves
 
 
-def order_moves(moves: list[Move], player_to_move: Player) -> list[Move]:
-    scores = np.zeros(shape=(len(moves)), dtype=np.int8)
+def get_quiet_moves(
+    board: Board, player_to_move: Player, moves: Optional[list[Move]] = None
+) -> list[Move]:
+    # Every move of `get_possible_moves` that isn't a capture, once.
+    topology = get_topology(board.shape[0])
+    values = board.ravel().tolist()
+    if moves is None:
+        moves = []
+    else:
+        moves.clear()
+
+    for tile, value in enumerate(values):
+        troops = value * player_to_move
+        if troops <= 0:
+            continue
 
-    target = 0 if player_to_move == Player.RED else 10
-    for index, move in enumerate(moves):
-        score = 0
+        if troops < MAX_TROOPS:
+            moves.append(topology.production_moves[tile])
 
-        if len(move) == 2:
-            score += 5
+        reposition_moves = topology.reposition_moves[tile]
+        for slot, neighbor in enumerate(topology.neighbour_tiles[tile]):
+            troops_capacity = MAX_TROOPS - values[neighbor] * player_to_move
+            if troops_capacity == 0 or troops_capacity > MAX_TROOPS:
+                continue
 
-        if len(move) == 3:
-            score += 3
+            transfers = reposition_moves[slot]
+            all_troops = min(troops_capacity, troops)
+            moves.append(transfers[all_troops * player_to_move])
+            if all_troops > 1:
+                moves.append(transfers[player_to_move])
+            if troops > 2:
+                troops_to_transfer = min(troops_capacity, troops - 1)
+                if 1 < troops_to_transfer < all_troops:
+                    moves.append(transfers[troops_to_transfer * player_to_move])
 
-        score_lost_due_to_position = target - move[1][0] - move[1][1]
-        score += 5 - score_lost_due_to_position
+    return moves
 
-        scores[index] = score
 
-    return [x for _, x in sorted(zip(scores, moves), reverse=True)]
+def is_capture(board: Board, move: Move) -> bool:
+    return len(move) == 3 and board[move[1]] * move[2] < 0
+
+
+def is_possible_move(board: Board, player_to_move: Player, move: Move) -> bool:
+    # Whether `get_possible_moves` generates the move in this position. Moves
+    # from the transposition table and killer moves come from other positions.
+    source_troops = board[move[0]] * player_to_move
+    if source_troops <= 0:
+        return False
+
+    if len(move) == 2:
+        return source_troops < MAX_TROOPS
+
+    troops_capacity = MAX_TROOPS - board[move[1]] * player_to_move
+    if troops_capacity <= 0:
+        return False
+
+    troops = move[2] * player_to_move
+    return (
+        troops == min(troops_capacity, source_troops)
+        or troops == 1
+        or (source_troops > 2 and troops == min(troops_capacity, source_troops - 1))
+    )
+
+
+def pick_moves(
+    state: GameState,
+    tt_move: Optional[Move],
+    killers: list[Optional[Move]],
+    captures: list[Move],
+    quiets: list[Move],
+) -> Iterator[Move]:
+    # =====================================================================#
+    # STAGED MOVE GENERATION: Moves are generated in stages, from the ones  #
+    # most likely to cause a cutoff to the least likely. The move of the   #
+    # transposition table needs no generation at all, and a cutoff skips   #
+    # the generation and sorting of every stage after it. Every move is    #
+    # returned once.                                                       #
+    # =====================================================================#
+
+    board = state.board
+    player = state.player_to_move
+    if tt_move is not None and is_possible_move(board, player, tt_move):
+        yield tt_move
+    else:
+        tt_move = None
+
+    get_capture_moves(board, player, captures)
+    order_captures(captures, board)
+    for move in captures:
+        if move != tt_move:
+            yield move
+
+    for i, killer in enumerate(killers):
+        if (
+            killer is not None
+            and killer != tt_move
+            and killer not in killers[:i]
+            and not is_capture(board, killer)
+            and is_possible_move(board, player, killer)
+        ):
+            yield killer
+
+    get_quiet_moves(board, player, quiets)
+    order_moves(quiets, player, state.topology.size)
+    for move in quiets:
+        if move != tt_move and move not in killers:
+            yield move
+
 
+def order_captures(moves: list[Move], board: Board) -> list[Move]:
+    # Most valuable victim first, then least valuable attacker.
+    def get_score(move: Move) -> int:
+        return abs(int(board[move[1]])) * 2 * MAX_TROOPS - abs(move[2])
+
+    moves.sort(key=get_score, reverse=True)
+    return moves
 
-class PVLine:
-    def __init__(self):
-        self.moves: list[Move] = []
 
-    def update(self, move: Move, new_pv_line: Self):
-        self.clear()
-        self.moves.append(move)
-        self.moves.extend(new_pv_line.moves)
+def order_moves(
+    moves: list[Move], player_to_move: Player, size: int = BOARD_SIZE
+) -> list[Move]:
+    # Sorts the moves in place and returns them.
+    target = 0 if player_to_move == Player.RED else 2 * size
 
-    def get_pv_move(self) -> Move:
-        return self.moves[0]
+    def get_score(move: Move) -> int:
+        score = 5 if len(move) == 2 else 3
+        score_lost_due_to_position = target - move[1][0] - move[1][1]
+        return score + 5 - score_lost_due_to_position
 
-    def clear(self):
-        self.moves.clear()
+    moves.sort(key=get_score, reverse=True)
+    return moves
 
 
 def format_board_for_evaluation(board: Board, side: Player) -> NDArray:
@@ -123,21 +338,273 @@ def format_board_for_evaluation(board: Board, side: Player) -> NDArray:
     return board.flatten() * side
 
 
+def pack_moves(moves: list[Move], player_to_move: Player, size: int) -> NDArray:
+    # Source tile, target tile, troops taken from the source and troops added to
+    # the target, of every move. Productions add a troop to their own tile.
+    packed = np.empty((len(moves), 4), dtype=np.intp)
+    for row, move in enumerate(moves):
+        (source_x, source_y), (target_x, target_y) = move[0], move[1]
+        if len(move) == 2:
+            packed[row] = (0, source_x * size + source_y, 0, player_to_move)
+        else:
+            troops = move[2]
+            packed[row] = (
+                source_x * size + source_y,
+                target_x * size + target_y,
+                troops,
+                troops,
+            )
+    return packed
+
+
+def get_child_boards(board: Board, moves: NDArray) -> NDArray:
+    # The flattened boards after every packed move, one per row.
+    children = np.repeat(board.reshape(1, -1), len(moves), axis=0)
+    rows = np.arange(len(moves))
+    children[rows, moves[:, 0]] -= moves[:, 2].astype(children.dtype)
+    children[rows, moves[:, 1]] += moves[:, 3].astype(children.dtype)
+    return children
+
+
+def format_boards_for_evaluation(boards: NDArray, side: Player) -> NDArray:
+    # `format_board_for_evaluation` of flattened boards, one per row.
+    if side == Player.RED:
+        boards = boards[:, ::-1]
+
+    return np.multiply(boards, side, dtype=np.float64)
+
+
+def evaluate_inputs(evaluator: Evaluator, inputs: NDArray) -> list:
+    # For evaluators of a single input, which evaluate the rows of frontiers one
+    # by one.
+    if inputs.ndim == 2:
+        return [evaluator(row) for row in inputs]
+    return evaluator(inputs)
+
+
+def run_steps(steps: Steps[T], evaluator: Evaluator) -> T:
+    try:
+        inputs = next(steps)
+        while True:
+            inputs = steps.send(evaluator(inputs))
+    except StopIteration as stop:
+        return stop.value
+
+
+def tag_steps(
+    steps: Steps[T], network: Network
+) -> Generator[tuple[Network, NDArray], list[float], T]:
+    try:
+        inputs = next(steps)
+        while True:
+            inputs = steps.send((yield network, inputs))
+    except StopIteration as stop:
+        return stop.value
+
+
+@dataclass
+class Frontier:
+    """
+    Children of a node at depth 1, which are leaves. Every child that isn't
+    terminal or a repetition has its static evaluation, from the point of view of
+    the side to move in it.
+    """
+
+    moves: list[Move]
+    scores: list[Optional[float]] = field(default_factory=list)
+    evaluations: list[float] = field(default_factory=list)
+    # Index of the child that is being searched.
+    index: int = 0
+
+
+@dataclass(frozen=True)
+class RootMove:
+    move: Move
+    score: float
+    pv: list[Move]
+
+
 class Searcher:
-    def __init__(self, storage_size_MB: int, depth: int):
+    def __init__(
+        self,
+        storage_size_MB: float,
+        depth: int,
+        quiescence: bool = QUIESCENCE,
+        quantization: Optional["Quantization"] = None,
+    ):
         self.depth = depth
-        self.pvline = PVLine()
+        self.quiescence = quiescence
+        self.evaluation_offset = EVALUATION_OFFSET
+        # With a quantization, evaluations and every score of the search are
+        # integers, see `quantization.Quantization`.
+        self.quantization = quantization
+        if quantization is None:
+            self.delta_margin = QUIESCENCE_DELTA_MARGIN
+            self.singular_margin = SINGULAR_MOVE_MARGIN
+            self.aspiration_window = ASPIRATION_WINDOW
+            self.aspiration_window_limit = ASPIRATION_WINDOW_LIMIT
+            self.null_window = NULL_WINDOW
+        else:
+            self.delta_margin = quantization.quantize_margin(QUIESCENCE_DELTA_MARGIN)
+            self.singular_margin = quantization.quantize_margin(SINGULAR_MOVE_MARGIN)
+            self.aspiration_window = quantization.quantize_margin(ASPIRATION_WINDOW)
+            self.aspiration_window_limit = quantization.quantize_margin(
+                ASPIRATION_WINDOW_LIMIT
+            )
+            self.null_window = 1
+        self.nodes = 0
+        # Nodes of the quiescence search, which aren't part of `nodes`.
+        self.qnodes = 0
+        # Score of the last search, from the point of view of the side that moved,
+        # in units of the evaluation.
+        self.score = 0.0
         self.best_move: Optional[Move] = None
-        self.storage = TranspositionTable(storage_size_MB)
+        self.storage = TranspositionTable(storage_size_MB, quantization is not None)
+        self.stack: Optional[SearchStack] = None
+        # Records every node of the searches, see `trace.TraceRecorder`.
+        self.trace: Optional["TraceRecorder"] = None
+        self.frontier_batching = FRONTIER_BATCHING
 
     def reset(self):
         self.storage.clear()
 
+    def prepare(self, state: GameState) -> SearchStack:
+        size = state.topology.size
+        if self.stack is None or self.stack.size != size:
+            self.stack = SearchStack(size)
+
+        self.stack.evaluation.bind(state.board)
+        return self.stack
+
     def search(self, evaluator: Evaluator, state: GameState) -> Move:
-        pvline = PVLine()
-        depth = self.depth
-        self.pvs(evaluator, state, depth, 0, -math.inf, math.inf, pvline, None, False)
-        return pvline.get_pv_move()
+        if isinstance(evaluator, IncrementalEvaluator):
+            with evaluator.attach(state):
+                return run_steps(self.search_steps(state), evaluator)
+
+        return run_steps(self.search_steps(state), partial(evaluate_inputs, evaluator))
+
+    def search_steps(self, state: GameState) -> SearchSteps:
+        # Iterative deepening. Every iteration fills the transposition table and
+        # the killer moves that order the moves of the next one.
+        endgame_state = get_endgame_state(state.board)
+        if endgame_state != EndgameState.ONGOING:
+            raise ValueError(f"the game is over: {endgame_state.name}")
+
+        stack = self.prepare(state)
+        self.nodes = 0
+        self.qnodes = 0
+        stack.clear_killers()
+        # The rows of the table outlive searches, so the root line of the previous
+        # search must not be mistaken for a result of this one.
+        stack.pv.clear(0)
+        score = 0
+        for depth in range(1, self.depth + 1):
+            score = yield from self.aspiration_steps(state, depth, score)
+
+        self.score = self._get_score(score)
+        move = stack.pv.get_pv_move()
+        if move is None:
+            raise ValueError("the search found no move")
+        return move
+
+    def _get_score(self, score: float) -> float:
+        if self.quantization is None:
+            return score
+        return self.quantization.dequantize(score)
+
+    def aspiration_steps(
+        self, state: GameState, depth: int, previous_score: float
+    ) -> EvaluationSteps:
+        # =====================================================================#
+        # ASPIRATION WINDOWS: The score rarely changes much between iterations, #
+        # so search the root with a narrow window around the previous score,   #
+        # which cuts off more of the tree. If the score falls outside of the   #
+        # window, widen the window on that side and search again.              #
+        # =====================================================================#
+
+        if depth == 1 or is_win_score(previous_score):
+            return (
+                yield from self.pvs_steps(
+                    state, depth, 0, -INFINITE_SCORE, INFINITE_SCORE, None, False
+                )
+            )
+
+        lower_window = upper_window = self.aspiration_window
+        while True:
+            alpha = previous_score - lower_window
+            beta = previous_score + upper_window
+            score = yield from self.pvs_steps(state, depth, 0, alpha, beta, None, False)
+            if score <= alpha:
+                lower_window = self._widen(lower_window)
+            elif score >= beta:
+                upper_window = self._widen(upper_window)
+            else:
+                return score
+
+    def _widen(self, window: float) -> float:
+        window *= ASPIRATION_WIDENING
+        return window if window <= self.aspiration_window_limit else INFINITE_SCORE
+
+    def search_multipv(
+        self, evaluator: Evaluator, state: GameState, count: int
+    ) -> list[RootMove]:
+        # =====================================================================#
+        # MULTI-PV: Finds the `count` best root moves, with exact scores and   #
+        # principal variations, in one search. A root move only has to be     #
+        # searched with a full window if it can beat the worst of the best    #
+        # moves found so far, every other move is refuted with alpha set to   #
+        # that score.                                                         #
+        # =====================================================================#
+
+        self.prepare(state)
+        self.nodes = 0
+        self.qnodes = 0
+        self.stack.clear_killers()
+        root_moves = list(pick_moves(state, None, [None, None], [], []))
+        best_moves: list[RootMove] = []
+        for depth in range(1, self.depth + 1):
+            best_moves = self._search_root_moves(
+                evaluator, state, depth, root_moves, count
+            )
+            # The best moves of this iteration are searched first in the next.
+            best = [root_move.move for root_move in best_moves]
+            root_moves = best + [move for move in root_moves if move not in best]
+
+        best_moves = [
+            RootMove(root_move.move, self._get_score(root_move.score), root_move.pv)
+            for root_move in best_moves
+        ]
+        self.score = best_moves[0].score if best_moves else 0.0
+        return best_moves
+
+    def _search_root_moves(
+        self,
+        evaluator: Evaluator,
+        state: GameState,
+        depth: int,
+        root_moves: list[Move],
+        count: int,
+    ) -> list[RootMove]:
+        best_moves: list[RootMove] = []
+        for move in root_moves:
+            alpha = -INFINITE_SCORE
+            if len(best_moves) >= count:
+                alpha = best_moves[-1].score
+            make_move(state, move)
+            score = -self.pvs(
+                evaluator, state, depth - 1, 1, -INFINITE_SCORE, -alpha, None, False
+            )
+            if score > alpha:
+                pv = [move, *self.stack.pv.get_pv(1)]
+                best_moves.append(RootMove(move, score, pv))
+                best_moves.sort(key=lambda root_move: root_move.score, reverse=True)
+                del best_moves[count:]
+            undo_move(state)
+
+        return best_moves
+
+    def evaluate(self, evaluator: Evaluator, state: GameState) -> float:
+        return run_steps(self.evaluate_steps(state), evaluator)
 
     def pvs(
         self,
@@ -147,18 +614,102 @@ class Searcher:
         ply: int,
         alpha: float,
         beta: float,
-        pvline: PVLine,
         move_to_skip: Optional[Move],
         is_extended: bool,
+        is_pv_node: bool = True,
     ) -> float:
+        return run_steps(
+            self.pvs_steps(
+                state, depth, ply, alpha, beta, move_to_skip, is_extended, is_pv_node
+            ),
+            partial(evaluate_inputs, evaluator),
+        )
+
+    def quiesce(
+        self,
+        evaluator: Evaluator,
+        state: GameState,
+        ply: int,
+        alpha: float,
+        beta: float,
+    ) -> float:
+        return run_steps(self.quiesce_steps(state, ply, alpha, beta), evaluator)
+
+    def evaluate_steps(self, state: GameState) -> EvaluationSteps:
+        if state.accumulator is not None:
+            output = state.accumulator.evaluate(state.player_to_move)
+        else:
+            # The network input is reused, so it's only valid until the search
+            # resumes.
+            output = yield self.stack.evaluation.fill(state.player_to_move)
+
+        evaluation = float(sum(output)) - self.evaluation_offset
+        if self.quantization is not None:
+            return self.quantization.quantize(evaluation)
+        return evaluation
+
+    def pvs_steps(
+        self,
+        state: GameState,
+        depth: int,
+        ply: int,
+        alpha: float,
+        beta: float,
+        move_to_skip: Optional[Move],
+        is_extended: bool,
+        is_pv_node: bool = True,
+    ) -> EvaluationSteps:
+        # `is_pv_node` is passed down rather than derived from the width of the
+        # window, which rounding makes unreliable for the null windows of floats.
+        self.nodes += 1
+        stack = self.stack
+        stack.pv.clear(ply)
+        trace = self.trace
+        window = (alpha, beta)
         endgame_state = get_endgame_state(state.board)
-        if depth <= 0 or endgame_state != EndgameState.ONGOING or ply >= MAX_DEPTH:
-            board = format_board_for_evaluation(state.board, state.player_to_move)
-            return float(sum(evaluator(board)))
+        if endgame_state != EndgameState.ONGOING:
+            score = get_terminal_score(endgame_state, state.player_to_move, ply)
+            if trace is not None:
+                self._trace(state, ply, depth, window, score, TraceReason.TERMINAL)
+            return score
 
         is_root = ply == 0
-        is_pv_node = beta - alpha != 1
-        child_pvline = PVLine()
+        # Searching a repeated position again would only repeat the cycle.
+        if not is_root and is_repetition(state):
+            score = get_terminal_score(
+                EndgameState.REPETITION, state.player_to_move, ply
+            )
+            if trace is not None:
+                self._trace(state, ply, depth, window, score, TraceReason.REPETITION)
+            return score
+
+        if depth <= 0 or ply >= MAX_DEPTH:
+            # The quiescence search records the node itself.
+            if self.quiescence:
+                return (yield from self.quiesce_steps(state, ply, alpha, beta))
+
+            score = yield from self.evaluate_steps(state)
+            if trace is not None:
+                self._trace(state, ply, depth, window, score, TraceReason.EVALUATION)
+            return score
+
+        null_window = self.null_window
+
+        # =====================================================================#
+        # MATE DISTANCE PRUNING: Even winning with the next move scores less   #
+        # than a win that was already found closer to the root, and losing     #
+        # right now scores more than a loss that was already found. If the     #
+        # window becomes empty, nothing below this node can change the result. #
+        # =====================================================================#
+
+        alpha = max(alpha, -(WIN_SCORE - ply))
+        beta = min(beta, WIN_SCORE - ply - 1)
+        if alpha >= beta and not is_root:
+            if trace is not None:
+                self._trace(
+                    state, ply, depth, window, alpha, TraceReason.MATE_DISTANCE
+                )
+            return alpha
 
         # =====================================================================#
         # TRANSPOSITION TABLE PROBING: Probe the transposition table to see if #
@@ -167,9 +718,21 @@ class Searcher:
         # =====================================================================#
 
         entry = self.storage.get(state.hash)
-        tt_score, tt_can_be_used, tt_move = evaluate_entry(entry, depth, alpha, beta)
+        tt_score, tt_can_be_used, tt_move = evaluate_entry(
+            entry, depth, alpha, beta, ply
+        )
 
         if tt_can_be_used and not is_root and move_to_skip != tt_move:
+            if trace is not None:
+                self._trace(
+                    state,
+                    ply,
+                    depth,
+                    window,
+                    tt_score,
+                    TraceReason.TT_CUTOFF,
+                    entry.flag,
+                )
             return tt_score
 
         if (
@@ -177,33 +740,49 @@ class Searcher:
             and (is_pv_node or (entry and entry.flag == NodeFlag.LOWER_BOUND))
             and not tt_move
         ):
-            self.pvs(
-                evaluator,
+            yield from self.pvs_steps(
                 state,
                 depth - IID_DEPTH_LIMIT - 1,
                 ply + 1,
                 -beta,
                 -alpha,
-                child_pvline,
                 None,
                 is_extended,
+                is_pv_node,
             )
 
-            if child_pvline.moves:
-                tt_move = child_pvline.get_pv_move()
-                child_pvline.clear()
+            if stack.pv.lengths[ply + 1]:
+                tt_move = stack.pv.get_pv_move(ply + 1)
 
-        moves = get_possible_moves(state.board, state.player_to_move)
-        moves = order_moves(moves, state.player_to_move)
+        killers = stack.killers[ply]
+        moves = pick_moves(
+            state, tt_move, killers, stack.captures[ply], stack.moves[ply]
+        )
 
-        if tt_move is not None:
-            moves.insert(0, tt_move)
+        # =====================================================================#
+        # FRONTIER BATCHING: The children of depth 1 nodes are leaves, so      #
+        # instead of making every move to evaluate its child, all the children #
+        # are built from the board at once and evaluated in one batch. Only    #
+        # the children that need a quiescence search are made.                 #
+        # =====================================================================#
+
+        frontier = None
+        search_child = self.pvs_steps
+        if (
+            depth == 1
+            and self.frontier_batching
+            and trace is None
+            and state.accumulator is None
+        ):
+            moves = [move for move in moves if move != move_to_skip]
+            frontier = yield from self._frontier_steps(state, moves, ply)
+            search_child = partial(self._frontier_child_steps, frontier)
 
         best_move = None
-        best_score = -math.inf
+        best_score = -INFINITE_SCORE
         node_type = NodeFlag.UPPER_BOUND
         do_full_search = True
-        for move in moves:
+        for index, move in enumerate(moves):
             if move == move_to_skip:
                 continue
             # =====================================================================#
@@ -217,7 +796,10 @@ class Searcher:
             # accurate score for the move.                                         #
             # =====================================================================#
 
-            make_move(state, move)
+            if frontier is None:
+                make_move(state, move)
+            else:
+                frontier.index = index
             if do_full_search:
                 next_depth = depth - 1
                 # =====================================================================#
@@ -245,18 +827,19 @@ class Searcher:
                     and entry.flag in (NodeFlag.LOWER_BOUND, NodeFlag.EXACT)
                 ):
                     undo_move(state)
-                    score_to_beat = tt_score - SINGULAR_MOVE_MARGIN
+                    score_to_beat = (
+                        score_from_tt(entry.score, ply) - self.singular_margin
+                    )
                     r = 3 + depth // 6
-                    next_best_score = self.pvs(
-                        evaluator,
+                    next_best_score = yield from self.pvs_steps(
                         state,
                         depth - 1 - r,
                         ply + 1,
                         score_to_beat,
-                        score_to_beat + 1,
-                        PVLine(),
+                        score_to_beat + null_window,
                         move,
                         True,
+                        False,
                     )
 
                     # If the next best score is less than or equal to the score to beat,
@@ -268,67 +851,74 @@ class Searcher:
 
                     make_move(state, move)
 
-                score = -self.pvs(
-                    evaluator,
-                    state,
-                    next_depth,
-                    ply + 1,
-                    -beta,
-                    -alpha,
-                    child_pvline,
-                    move_to_skip,
-                    is_extended,
+                score = -(
+                    yield from search_child(
+                        state,
+                        next_depth,
+                        ply + 1,
+                        -beta,
+                        -alpha,
+                        move_to_skip,
+                        is_extended,
+                        is_pv_node,
+                    )
                 )
             else:
                 # Search with a null window.
-                score = -self.pvs(
-                    evaluator,
-                    state,
-                    depth - 1,
-                    ply + 1,
-                    -alpha - 1,
-                    -alpha,
-                    child_pvline,
-                    move_to_skip,
-                    is_extended,
-                )
-
-                if alpha < score < beta:
-                    # If it failed high, do a full search.
-                    score = -self.pvs(
-                        evaluator,
+                score = -(
+                    yield from search_child(
                         state,
                         depth - 1,
                         ply + 1,
-                        -beta,
+                        -alpha - null_window,
                         -alpha,
-                        child_pvline,
                         move_to_skip,
                         is_extended,
+                        False,
                     )
-            undo_move(state)
+                )
+
+                if alpha < score < beta:
+                    # If it failed high, do a full search.
+                    score = -(
+                        yield from search_child(
+                            state,
+                            depth - 1,
+                            ply + 1,
+                            -beta,
+                            -alpha,
+                            move_to_skip,
+                            is_extended,
+                            is_pv_node,
+                        )
+                    )
+            if frontier is None:
+                undo_move(state)
 
             if score > best_score:
                 best_score = score
                 best_move = move
                 do_full_search = False
 
-            # If we have a beta-cutoff (i.e this move gives us a score better than what
-            # our opponent can already guarantee early in the tree), return beta and
-            # the move that caused the cutoff as the best move.
-            if score >= beta:
-                node_type = NodeFlag.LOWER_BOUND
-                break
-
             # If the score of this move is better than alpha (i.e better than the score
             # we can currently guarantee), set alpha to be the score and the best move
             # to be the move that raised alpha.
             if score > alpha:
                 alpha = score
                 node_type = NodeFlag.EXACT
-                pvline.update(move, child_pvline)
+                stack.pv.update(ply, move)
 
-        child_pvline.clear()
+            # If we have a beta-cutoff (i.e this move gives us a score better than what
+            # our opponent can already guarantee early in the tree), return beta and
+            # the move that caused the cutoff as the best move.
+            if score >= beta:
+                node_type = NodeFlag.LOWER_BOUND
+                # Quiet moves that cause a cutoff are likely to cause one in
+                # sibling positions too (killer moves).
+                if move != killers[0] and not is_capture(state.board, move):
+                    killers[1] = killers[0]
+                    killers[0] = move
+                break
 
         if (
             best_move
@@ -337,9 +927,242 @@ class Searcher:
         ):
             raise RuntimeError(f"{state.player_to_move}: {self.best_move}")
 
-        self.storage.add(state.hash, beta, best_move, depth, node_type)
+        # A search that skips a move doesn't know the real score of the position.
+        if move_to_skip is None:
+            self.storage.add(
+                state.hash, score_to_tt(best_score, ply), best_move, depth, node_type
+            )
+        if trace is not None:
+            reason = TraceReason.SEARCHED
+            if node_type == NodeFlag.LOWER_BOUND:
+                reason = TraceReason.BETA_CUTOFF
+            self._trace(state, ply, depth, window, best_score, reason, node_type)
+        return best_score
+
+    def _frontier_steps(
+        self, state: GameState, moves: list[Move], ply: int
+    ) -> Steps[Frontier]:
+        board = state.board
+        size = board.shape[0]
+        side = -state.player_to_move
+        frontier = Frontier(moves, [None] * len(moves), [0.0] * len(moves))
+        if not moves:
+            return frontier
+
+        packed = pack_moves(moves, state.player_to_move, size)
+        children = get_child_boards(board, packed)
+        has_blue = (children > 0).any(axis=1)
+        has_red = (children < 0).any(axis=1)
+        for index in np.flatnonzero(~(has_blue & has_red)):
+            endgame_state = EndgameState.DRAW
+            if has_blue[index]:
+                endgame_state = EndgameState.BLUE_WON
+            elif has_red[index]:
+                endgame_state = EndgameState.RED_WON
+            frontier.scores[index] = get_terminal_score(endgame_state, side, ply + 1)
+
+        # Only children of reversible moves can repeat, see `is_repetition`.
+        reversible_plies = state.reversible_plies[-1] + 1
+        if reversible_plies >= 4:
+            hashes = [*state.hashes, state.hash]
+            repeated = {hashes[-plies] for plies in range(4, reversible_plies + 1, 2)}
+            reversible = [
+                index
+                for index, move in enumerate(moves)
+                if frontier.scores[index] is None
+                and len(move) == 3
+                and not is_capture(board, move)
+            ]
+            if reversible:
+                child_hashes = compute_zobri_hashes(
+                    children[reversible].reshape(-1, size, size),
+                    [side] * len(reversible),
+                )
+                for index, child_hash in zip(reversible, child_hashes.tolist()):
+                    if child_hash in repeated:
+                        frontier.scores[index] = get_terminal_score(
+                            EndgameState.REPETITION, side, ply + 1
+                        )
+
+        evaluated = [i for i, score in enumerate(frontier.scores) if score is None]
+        if not evaluated:
+            return frontier
+
+        outputs = yield format_boards_for_evaluation(children[evaluated], side)
+        quantization = self.quantization
+        for index, output in zip(evaluated, outputs):
+            evaluation = float(sum(output)) - self.evaluation_offset
+            if quantization is not None:
+                evaluation = quantization.quantize(evaluation)
+            frontier.evaluations[index] = evaluation
+        return frontier
+
+    def _frontier_child_steps(
+        self,
+        frontier: Frontier,
+        state: GameState,
+        depth: int,
+        ply: int,
+        alpha: float,
+        beta: float,
+        move_to_skip: Optional[Move],
+        is_extended: bool,
+        is_pv_node: bool,
+    ) -> EvaluationSteps:
+        # Scores the child like `pvs_steps` at depth 0.
+        self.nodes += 1
+        self.stack.pv.clear(ply)
+        index = frontier.index
+        score = frontier.scores[index]
+        if score is not None:
+            return score
+
+        stand_pat = frontier.evaluations[index]
+        if not self.quiescence:
+            return stand_pat
+
+        if stand_pat >= beta or ply >= len(self.stack.moves) - 1:
+            self.qnodes += 1
+            return stand_pat
+
+        make_move(state, frontier.moves[index])
+        score = yield from self.quiesce_steps(state, ply, alpha, beta, stand_pat)
+        undo_move(state)
+        return score
+
+    def _trace(
+        self,
+        state: GameState,
+        ply: int,
+        depth: int,
+        window: tuple[float, float],
+        score: float,
+        reason: TraceReason,
+        flag: int = 0,
+        kind: NodeKind = NodeKind.PVS,
+    ):
+        move = state.history[-1] if state.history else None
+        self.trace.record(
+            state.hash, ply, depth, kind, reason, flag, *window, score, move
+        )
+
+    def quiesce_steps(
+        self,
+        state: GameState,
+        ply: int,
+        alpha: float,
+        beta: float,
+        stand_pat: Optional[float] = None,
+    ) -> EvaluationSteps:
+        # =====================================================================#
+        # QUIESCENCE SEARCH: Evaluating in the middle of an exchange misjudges  #
+        # the position, since the next capture can change it completely. So   #
+        # at the horizon, keep searching captures until the position is quiet. #
+        # A capture removes as many troops from each side, so only captures    #
+        # that clear the tile of the opponent change the balance, and only     #
+        # those are searched. The side to move doesn't have to capture, so the #
+        # static evaluation is a lower bound of the score (stand pat). Every   #
+        # capture removes troops from the board, so the search always ends.    #
+        # =====================================================================#
+
+        self.qnodes += 1
+        stack = self.stack
+        stack.pv.clear(ply)
+        trace = self.trace
+        window = (alpha, beta)
+        kind = NodeKind.QUIESCENCE
+        endgame_state = get_endgame_state(state.board)
+        if endgame_state != EndgameState.ONGOING:
+            score = get_terminal_score(endgame_state, state.player_to_move, ply)
+            if trace is not None:
+                self._trace(
+                    state, ply, 0, window, score, TraceReason.TERMINAL, kind=kind
+                )
+            return score
+
+        # The static evaluation can be known already, e.g. from a frontier.
+        if stand_pat is None:
+            stand_pat = yield from self.evaluate_steps(state)
+        if stand_pat >= beta or ply >= len(stack.moves) - 1:
+            if trace is not None:
+                self._trace(
+                    state, ply, 0, window, stand_pat, TraceReason.STAND_PAT, kind=kind
+                )
+            return stand_pat
+
+        # =====================================================================#
+        # DELTA PRUNING: If even the largest swing of the evaluation can't     #
+        # raise the score to alpha, only a capture that wins the game could.   #
+        # =====================================================================#
+
+        if stand_pat + self.delta_margin < alpha:
+            moves = self._get_winning_captures(state, stack.moves[ply])
+        else:
+            moves = get_capture_moves(
+                state.board, state.player_to_move, stack.moves[ply], True
+            )
+            order_captures(moves, state.board)
+
+        best_score = stand_pat
+        alpha = max(alpha, stand_pat)
+        for move in moves:
+            make_move(state, move)
+            score = -(yield from self.quiesce_steps(state, ply + 1, -beta, -alpha))
+            undo_move(state)
+
+            if score > best_score:
+                best_score = score
+            if score > alpha:
+                alpha = score
+            if score >= beta:
+                break
+
+        if trace is not None:
+            reason = TraceReason.SEARCHED
+            if best_score >= beta:
+                reason = TraceReason.BETA_CUTOFF
+            self._trace(state, ply, 0, window, best_score, reason, kind=kind)
         return best_score
 
+    def _get_winning_captures(
+        self, state: GameState, moves: list[Move]
+    ) -> list[Move]:
+        # A capture can only win if the opponent has a single tile left.
+        board = state.board
+        if np.count_nonzero(board * state.player_to_move < 0) != 1:
+            moves.clear()
+            return moves
+
+        return get_capture_moves(board, state.player_to_move, moves, True)
+
+
+def sample_opening(
+    evaluator: Evaluator,
+    plies: int,
+    count: int,
+    depth: int,
+    margin: float,
+    seed: Optional[int] = None,
+    board_size: int = BOARD_SIZE,
+) -> GameState:
+    # Plays `plies` moves, each picked at random from the `count` best moves that
+    # score within `margin` of the best one.
+    rng = random.Random(seed)
+    state = get_default_state(board_size)
+    searcher = Searcher(STORAGE_SIZE_MB, depth)
+    for _ in range(plies):
+        best_moves = searcher.search_multipv(evaluator, state, count)
+        if not best_moves:
+            break
+
+        best_score = best_moves[0].score
+        candidates = [m for m in best_moves if m.score >= best_score - margin]
+        make_move(state, rng.choice(candidates).move)
+        if get_endgame_state(state.board) != EndgameState.ONGOING:
+            break
+
+    return state
+
 
 def play(
     player: Evaluator,
@@ -347,19 +1170,86 @@ def play(
     opponent_starts: bool,
     rounds: int,
     depth: int,
+    board_size: int = BOARD_SIZE,
+    adjudicator: Optional["Adjudicator"] = None,
+    adjudicate: bool = True,
+    position: Optional[tuple[Board, Player]] = None,
 ) -> tuple[EndgameState, GameState]:
-    game_state = get_default_state()
-    evaluator = opponent if opponent_starts else player
+    # If an adjudicator is given, the game stops as soon as it can be decided and
+    # the adjudicated result is returned. With `adjudicate` off, the game is played
+    # out and the adjudicator only records its verdict.
+    steps = play_steps(
+        player,
+        opponent,
+        opponent_starts,
+        rounds,
+        depth,
+        board_size,
+        adjudicator,
+        adjudicate,
+        position=position,
+    )
+    return run_steps(steps, evaluate_tagged)
+
+
+def evaluate_tagged(request: tuple[Evaluator, NDArray]) -> list[float]:
+    evaluator, inputs = request
+    return evaluate_inputs(evaluator, inputs)
+
+
+def play_steps(
+    player: Network,
+    opponent: Network,
+    opponent_starts: bool,
+    rounds: int,
+    depth: int,
+    board_size: int = BOARD_SIZE,
+    adjudicator: Optional["Adjudicator"] = None,
+    adjudicate: bool = True,
+    storage_size_MB: float = STORAGE_SIZE_MB,
+    stats: Optional["WorkerStats"] = None,
+    position: Optional[tuple[Board, Player]] = None,
+) -> PlaySteps:
+    # `play` as a generator, see `PlaySteps`. The networks are only passed along
+    # with their inputs, so they can be anything that identifies them. Games start
+    # from the default board, or from `position` and the side to move in it, in
+    # which case the first network to move plays that side.
+    if position is None:
+        game_state = get_default_state(board_size)
+    else:
+        board, side = position
+        board = board.copy()
+        game_state = GameState(board, compute_zobri_hash(board, side), side)
+    network = opponent if opponent_starts else player
     endgame_state = EndgameState.ONGOING
-    searcher = Searcher(STORAGE_SIZE_MB, depth)
+    searcher = Searcher(storage_size_MB, depth)
+    if adjudicator is not None:
+        adjudicator.reset()
 
     for _ in range(rounds):
-        move = searcher.search(evaluator, game_state)
+        mover = game_state.player_to_move
+        move = yield from tag_steps(searcher.search_steps(game_state), network)
         make_move(game_state, move)
+        if stats is not None:
+            stats.searches += 1
+            stats.nodes += searcher.nodes + searcher.qnodes
         endgame_state = get_endgame_state(game_state.board)
 
         if endgame_state != EndgameState.ONGOING:
             break
 
-        evaluator = player if evaluator != player else opponent
+        if is_repetition(game_state):
+            endgame_state = EndgameState.REPETITION
+            break
+
+        if adjudicator is not None:
+            verdict = adjudicator.update(game_state, mover, searcher.score)
+            if verdict is not None and adjudicate:
+                if stats is not None:
+                    stats.add_table(searcher.storage)
+                return verdict, game_state
+
+        network = player if network is not player else opponent
+    if stats is not None:
+        stats.add_table(searcher.storage)
     return endgame_state, game_state
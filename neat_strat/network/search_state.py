@@ -0,0 +1,85 @@
+from typing import Optional
+
+import numpy as np
+from nptyping import NDArray
+
+from .constants import Board, Move, Player
+
+# Upper bound of the distance from the root that any node of a search can have.
+MAX_PLY = 64
+
+
+class PVTable:
+    """
+    Triangular principal variation table. Row `ply` holds the principal variation
+    found from a node at that ply, and has room for the `MAX_PLY - ply` moves
+    that can follow it.
+    """
+
+    def __init__(self, max_ply: int = MAX_PLY):
+        self.moves: list[list[Optional[Move]]] = [
+            [None] * (max_ply - ply) for ply in range(max_ply)
+        ]
+        self.lengths = [0] * (max_ply + 1)
+
+    def clear(self, ply: int):
+        self.lengths[ply] = 0
+
+    def update(self, ply: int, move: Move):
+        # The line of a node is its best move followed by the line of its child.
+        row = self.moves[ply]
+        child_row = self.moves[ply + 1]
+        length = self.lengths[ply + 1]
+
+        row[0] = move
+        for i in range(length):
+            row[i + 1] = child_row[i]
+        self.lengths[ply] = length + 1
+
+    def get_pv_move(self, ply: int = 0) -> Optional[Move]:
+        return self.moves[ply][0] if self.lengths[ply] else None
+
+    def get_pv(self, ply: int = 0) -> list[Move]:
+        return self.moves[ply][: self.lengths[ply]]
+
+
+class EvaluationBuffer:
+    """
+    Reusable network input. The board is written in place, from the point of
+    view of the side to move, so no temporaries are created per evaluation.
+    """
+
+    def __init__(self, size: int):
+        self.board: NDArray = np.zeros((size, size), dtype=np.float64)
+        self.input: NDArray = self.board.reshape(-1)
+        self._views: tuple[Board, Board] | None = None
+
+    def bind(self, board: Board):
+        # RED sees the board rotated by 180 degrees. Views follow every in place
+        # change of the board, so they only have to be created once per search.
+        self._views = (board, board[::-1, ::-1])
+
+    def fill(self, side: Player) -> NDArray:
+        assert self._views is not None
+        view = self._views[1] if side == Player.RED else self._views[0]
+        np.multiply(view, side, out=self.board)
+        return self.input
+
+
+class SearchStack:
+    """Buffers that are allocated once and reused by every node of a search."""
+
+    def __init__(self, size: int, max_ply: int = MAX_PLY):
+        self.size = size
+        self.pv = PVTable(max_ply)
+        self.moves: list[list[Move]] = [[] for _ in range(max_ply)]
+        self.captures: list[list[Move]] = [[] for _ in range(max_ply)]
+        # Two quiet moves per ply that recently caused a beta cutoff.
+        self.killers: list[list[Optional[Move]]] = [
+            [None, None] for _ in range(max_ply)
+        ]
+        self.evaluation = EvaluationBuffer(size)
+
+    def clear_killers(self):
+        for killers in self.killers:
+            killers[0] = killers[1] = None
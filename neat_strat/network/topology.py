@@ -0,0 +1,97 @@
+from functools import cache
+
+import numpy as np
+from nptyping import Int, NDArray
+
+from .constants import BOARD_SIZE, MAX_TROOPS, Board, Coords, Move
+from .neighbours_table import compute_neighbors
+from .zobrist import get_piece_index, get_zobri_keys
+
+# A hex tile has at most 6 neighbours.
+MAX_NEIGHBOURS = 6
+
+
+class Topology:
+    """
+    Board size dependent tables, built once per board size and shared by the
+    search, the GUI and the training code. Use `get_topology` to get one.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.num_tiles = size * size
+
+        self.tile_coords: list[Coords] = [
+            (x, y) for x in range(size) for y in range(size)
+        ]
+        # Neighbours of every tile, indexed by the flat tile index.
+        self.neighbours: list[list[Coords]] = [
+            compute_neighbors(x, y, size) for x, y in self.tile_coords
+        ]
+        self.neighbour_tiles: list[list[int]] = [
+            [self.get_index(*coords) for coords in neighbours]
+            for neighbours in self.neighbours
+        ]
+        self.neighbour_indices: NDArray = np.full(
+            (self.num_tiles, MAX_NEIGHBOURS), -1, dtype=np.int16
+        )
+        self.neighbour_counts: NDArray = np.zeros(self.num_tiles, dtype=np.int8)
+        for index, neighbours in enumerate(self.neighbours):
+            self.neighbour_counts[index] = len(neighbours)
+            for i, coords in enumerate(neighbours):
+                self.neighbour_indices[index, i] = self.get_index(*coords)
+
+        self.zobrist_table, self.side_to_move_hash = get_zobri_keys(size)
+
+        # Every move that can be played on the board, created once so that move
+        # generation can reuse them. `reposition_moves[tile][slot][troops]` moves
+        # `troops` to the neighbour at `slot`. Negative (RED) troops index the list
+        # from its end.
+        self.production_moves: list[Move] = [
+            (coords, coords) for coords in self.tile_coords
+        ]
+        self.reposition_moves: list[list[list[Move]]] = [
+            [
+                [
+                    (self.tile_coords[tile], neighbour, self._wrap_troops(i))
+                    for i in range(2 * MAX_TROOPS + 1)
+                ]
+                for neighbour in self.neighbours[tile]
+            ]
+            for tile in range(self.num_tiles)
+        ]
+
+    @staticmethod
+    def _wrap_troops(index: int) -> int:
+        return index if index <= MAX_TROOPS else index - (2 * MAX_TROOPS + 1)
+
+    def get_index(self, x: int, y: int) -> int:
+        return x * self.size + y
+
+    def get_coords(self, index: int) -> Coords:
+        return divmod(index, self.size)
+
+    def lookup_neighbours(self, x: int, y: int) -> list[Coords]:
+        return self.neighbours[x * self.size + y]
+
+    def get_hash(self, x: int, y: int, troops: int) -> int:
+        return self.zobrist_table[x][y][get_piece_index(troops)]
+
+    def is_valid(self, x: int, y: int) -> bool:
+        return 0 <= x < self.size and 0 <= y < self.size
+
+    def get_default_board(self) -> Board:
+        # Each player starts with a full tile on opposite corners of the board.
+        board: NDArray[Int] = np.zeros((self.size, self.size), dtype=np.int8)
+        board[0][self.size - 1] = -MAX_TROOPS
+        board[self.size - 1][0] = MAX_TROOPS
+        return board
+
+    @property
+    def centre(self) -> Coords:
+        return (self.size // 2, self.size // 2)
+
+
+@cache
+def get_topology(size: int = BOARD_SIZE) -> Topology:
+    return Topology(size)
@@ -0,0 +1,308 @@
+import struct
+from collections import Counter
+from dataclasses import dataclass, field
+from enum import IntEnum, auto
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from .constants import Move
+
+TRACE_CAPACITY = 1 << 20
+# Events buffered before they're written, when they're streamed to a file.
+TRACE_BLOCK_EVENTS = 1 << 12
+NO_COORD = 255
+
+# hash, ply, depth, kind, reason, flag, alpha, beta, score, and the move that led
+# to the node: source and target coordinates and troops.
+TRACE_EVENT = struct.Struct("<QBbBBBfffBBBBb")
+
+
+class NodeKind(IntEnum):
+    PVS = auto()
+    QUIESCENCE = auto()
+
+
+class TraceReason(IntEnum):
+    # Why the search of a node ended.
+    SEARCHED = auto()
+    BETA_CUTOFF = auto()
+    TT_CUTOFF = auto()
+    TERMINAL = auto()
+    REPETITION = auto()
+    MATE_DISTANCE = auto()
+    EVALUATION = auto()
+    STAND_PAT = auto()
+
+
+@dataclass(frozen=True)
+class TraceEvent:
+    hash: int
+    ply: int
+    depth: int
+    kind: NodeKind
+    reason: TraceReason
+    # `NodeFlag` of the score, or 0 if the node isn't stored.
+    flag: int
+    alpha: float
+    beta: float
+    score: float
+    move: Optional[Move]
+
+
+def pack_event(
+    zobri_hash: int,
+    ply: int,
+    depth: int,
+    kind: NodeKind,
+    reason: TraceReason,
+    flag: int,
+    alpha: float,
+    beta: float,
+    score: float,
+    move: Optional[Move],
+) -> bytes:
+    if move is None:
+        coords = (NO_COORD, NO_COORD, NO_COORD, NO_COORD, 0)
+    else:
+        (source_x, source_y), (target_x, target_y) = move[0], move[1]
+        troops = move[2] if len(move) == 3 else 0
+        coords = (source_x, source_y, target_x, target_y, troops)
+    return TRACE_EVENT.pack(
+        zobri_hash, ply, depth, kind, reason, flag, alpha, beta, score, *coords
+    )
+
+
+def unpack_events(buffer: bytes) -> Iterator[TraceEvent]:
+    for (
+        zobri_hash,
+        ply,
+        depth,
+        kind,
+        reason,
+        flag,
+        alpha,
+        beta,
+        score,
+        source_x,
+        source_y,
+        target_x,
+        target_y,
+        troops,
+    ) in TRACE_EVENT.iter_unpack(buffer):
+        move: Optional[Move] = None
+        if source_x != NO_COORD:
+            move = ((source_x, source_y), (target_x, target_y))
+            if troops:
+                move = (*move, troops)
+        yield TraceEvent(
+            zobri_hash,
+            ply,
+            depth,
+            NodeKind(kind),
+            TraceReason(reason),
+            flag,
+            alpha,
+            beta,
+            score,
+            move,
+        )
+
+
+class TraceRecorder:
+    """
+    Records an event for every node of a search when it returns, so a node comes
+    after the nodes of its subtree. Events are kept in a ring buffer of `capacity`
+    events, so only the latest ones are kept. With `path`, events are streamed to
+    the file instead, whenever the buffer is full.
+    """
+
+    def __init__(
+        self, capacity: Optional[int] = None, path: Optional[Path | str] = None
+    ):
+        if capacity is None:
+            capacity = TRACE_CAPACITY if path is None else TRACE_BLOCK_EVENTS
+        self.capacity = capacity
+        self.path = Path(path) if path is not None else None
+        self.events = 0
+        self._buffer = bytearray(capacity * TRACE_EVENT.size)
+        self._count = 0
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_bytes(b"")
+
+    def __enter__(self) -> "TraceRecorder":
+        return self
+
+    def __exit__(self, *_):
+        self.flush()
+
+    def record(
+        self,
+        zobri_hash: int,
+        ply: int,
+        depth: int,
+        kind: NodeKind,
+        reason: TraceReason,
+        flag: int,
+        alpha: float,
+        beta: float,
+        score: float,
+        move: Optional[Move],
+    ):
+        if self._count == self.capacity:
+            if self.path is not None:
+                self.flush()
+            else:
+                self._count = 0
+        offset = self._count * TRACE_EVENT.size
+        self._buffer[offset : offset + TRACE_EVENT.size] = pack_event(
+            zobri_hash, ply, depth, kind, reason, flag, alpha, beta, score, move
+        )
+        self._count += 1
+        self.events += 1
+
+    def flush(self):
+        if self.path is None or not self._count:
+            return
+
+        with open(self.path, "ab") as f:
+            f.write(self._buffer[: self._count * TRACE_EVENT.size])
+        self._count = 0
+
+    def get_bytes(self) -> bytes:
+        # The events of the buffer, oldest first.
+        size = TRACE_EVENT.size
+        if self.path is not None or self.events <= self.capacity:
+            return bytes(self._buffer[: self._count * size])
+        split = self._count * size
+        return bytes(self._buffer[split:] + self._buffer[:split])
+
+    def get_events(self) -> list[TraceEvent]:
+        if self.path is not None:
+            self.flush()
+            return read_trace(self.path)
+        return list(unpack_events(self.get_bytes()))
+
+    def save(self, path: Path | str):
+        if self.path is not None:
+            self.flush()
+            if Path(path) != self.path:
+                Path(path).write_bytes(self.path.read_bytes())
+            return
+        Path(path).write_bytes(self.get_bytes())
+
+
+def read_trace(path: Path | str) -> list[TraceEvent]:
+    raw = Path(path).read_bytes()
+    # A partially written trailing event is ignored.
+    return list(unpack_events(raw[: len(raw) - len(raw) % TRACE_EVENT.size]))
+
+
+@dataclass
+class TraceNode:
+    event: TraceEvent
+    children: list["TraceNode"] = field(default_factory=list)
+    size: int = 1
+
+
+def build_trees(events: Iterable[TraceEvent]) -> list[TraceNode]:
+    """
+    Rebuilds the search trees of the events, e.g. one per iteration. Children are
+    the nodes one ply deeper that returned since the last node of the same ply.
+    Nodes whose parent isn't in the events, e.g. the oldest events of a ring
+    buffer, are roots.
+    """
+    stack: list[TraceNode] = []
+    for event in events:
+        node = TraceNode(event)
+        while stack and stack[-1].event.ply > event.ply:
+            child = stack.pop()
+            node.children.append(child)
+            node.size += child.size
+        node.children.reverse()
+        stack.append(node)
+
+    return stack
+
+
+@dataclass(frozen=True)
+class PlySummary:
+    ply: int
+    nodes: int
+    # Nodes with children, and the mean number of their children.
+    expanded: int
+    branching_factor: float
+
+
+@dataclass(frozen=True)
+class TraceSummary:
+    events: int
+    trees: int
+    plies: list[PlySummary]
+    reasons: dict[str, int]
+    kinds: dict[str, int]
+    # Nodes in the subtrees of the moves of the roots, over every tree.
+    root_moves: list[tuple[Optional[Move], int]]
+
+
+def count_names(values: Iterable[IntEnum]) -> dict[str, int]:
+    return {
+        value.name.lower(): count for value, count in Counter(values).most_common()
+    }
+
+
+def summarise_trace(events: list[TraceEvent]) -> TraceSummary:
+    trees = build_trees(events)
+    nodes: Counter[int] = Counter()
+    expanded: Counter[int] = Counter()
+    children: Counter[int] = Counter()
+    root_moves: Counter[Optional[Move]] = Counter()
+    pending = list(trees)
+    while pending:
+        node = pending.pop()
+        ply = node.event.ply
+        nodes[ply] += 1
+        if node.children:
+            expanded[ply] += 1
+            children[ply] += len(node.children)
+            pending.extend(node.children)
+
+    for tree in trees:
+        for child in tree.children:
+            root_moves[child.event.move] += child.size
+
+    return TraceSummary(
+        len(events),
+        len(trees),
+        [
+            PlySummary(
+                ply,
+                nodes[ply],
+                expanded[ply],
+                children[ply] / expanded[ply] if expanded[ply] else 0.0,
+            )
+            for ply in sorted(nodes)
+        ],
+        count_names(event.reason for event in events),
+        count_names(event.kind for event in events),
+        root_moves.most_common(),
+    )
+
+
+def format_trace_summary(summary: TraceSummary, root_moves: int = 10) -> str:
+    lines = [f"{summary.events} nodes in {summary.trees} trees"]
+    lines.append(f"{'ply':>4} {'nodes':>10} {'expanded':>10} {'branching':>10}")
+    for ply in summary.plies:
+        lines.append(
+            f"{ply.ply:>4} {ply.nodes:>10} {ply.expanded:>10} "
+            f"{ply.branching_factor:>10.2f}"
+        )
+    lines.append(
+        "reasons: " + ", ".join(f"{k} {v}" for k, v in summary.reasons.items())
+    )
+    lines.append("kinds: " + ", ".join(f"{k} {v}" for k, v in summary.kinds.items()))
+    lines.append("nodes by root move:")
+    for move, size in summary.root_moves[:root_moves]:
+        share = size / summary.events if summary.events else 0.0
+        lines.append(f"  {move}: {size} ({share:.1%})")
+    return "\n".join(lines) + "\n"
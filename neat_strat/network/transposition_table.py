@@ -1,9 +1,21 @@
-import sys
+import struct
+from array import array
 from dataclasses import dataclass
 from enum import IntEnum, auto
 from typing import Optional
 
-from .constants import Move
+from .constants import WIN_SCORE, Move
+from .search_state import MAX_PLY
+
+# Scores beyond this bound are wins or losses.
+WIN_SCORE_BOUND = WIN_SCORE - MAX_PLY
+# Quantized scores are stored in 16 bits. Evaluations stay below the wins, which
+# are stored as their distance to it.
+QUANTIZED_WIN_SCORE = 2**15 - 1
+QUANTIZED_WIN_SCORE_BOUND = QUANTIZED_WIN_SCORE - MAX_PLY
+EMPTY = 0
+# Moves are stored as references to the tuples of the move generation.
+POINTER_SIZE = struct.calcsize("P")
 
 
 class NodeFlag(IntEnum):
@@ -21,15 +33,35 @@ class TranspositionEntry:
     flag: NodeFlag
 
 
+# Flags by their stored value.
+FLAGS = {flag.value: flag for flag in NodeFlag}
+
+
 class TranspositionTable:
-    def __init__(self, size_MB: int):
-        size_of_entry = sys.getsizeof(TranspositionEntry)
-        desired_table_size_in_bytes = size_MB * 1024 * 1024
-        num_of_entries = desired_table_size_in_bytes // size_of_entry
+    """
+    Entries are stored in parallel arrays, so that they take a few bytes instead
+    of an object each. With `quantized`, scores are the integers of a quantized
+    search (see `quantization.Quantization`) and take 16 bits. The table holds as
+    many entries as fit in `size_MB`, see `get_entry_size`.
+    """
+
+    def __init__(self, size_MB: float, quantized: bool = False):
+        size_of_entry = get_entry_size(quantized)
+        desired_table_size_in_bytes = int(size_MB * 1024 * 1024)
+        num_of_entries = max(desired_table_size_in_bytes // size_of_entry, 1)
         self.max_entries_count = num_of_entries
-        self.table: list[Optional[TranspositionEntry]] = [
-            None for _ in range(self.max_entries_count)
-        ]
+        self.quantized = quantized
+        self.clear()
+
+    @property
+    def size_MB(self) -> float:
+        arrays = (self.keys, self.scores, self.depths, self.flags)
+        size = sum(a.itemsize * len(a) for a in arrays)
+        return (size + POINTER_SIZE * len(self.moves)) / (1024 * 1024)
+
+    @property
+    def fill(self) -> float:
+        return self.used / self.max_entries_count
 
     def add(
         self,
@@ -39,33 +71,97 @@ class TranspositionTable:
         depth: int,
         flag: NodeFlag,
     ):
-        entry = TranspositionEntry(key, value, best_move, depth, flag)
-        index = self._get_index_from_zobri_key(entry.key)
-        self.table.insert(index, entry)
+        index = self._get_index_from_zobri_key(key)
+        if self.flags[index] == EMPTY:
+            self.used += 1
+        self.keys[index] = key
+        self.scores[index] = pack_score(value) if self.quantized else value
+        self.moves[index] = best_move
+        self.depths[index] = depth
+        self.flags[index] = flag
 
     def get(self, zobri_key: int) -> Optional[TranspositionEntry]:
         index = self._get_index_from_zobri_key(zobri_key)
-        entry = self.table[index]
-
-        if entry is None or entry.key != zobri_key:
+        flag = self.flags[index]
+        if flag == EMPTY or self.keys[index] != zobri_key:
             return None
 
-        return entry
+        score = self.scores[index]
+        return TranspositionEntry(
+            zobri_key,
+            unpack_score(score) if self.quantized else score,
+            self.moves[index],
+            self.depths[index],
+            FLAGS[flag],
+        )
 
     def clear(self):
-        self.table = [None for _ in range(self.max_entries_count)]
+        count = self.max_entries_count
+        self.keys = array("Q", bytes(8 * count))
+        if self.quantized:
+            self.scores = array("h", bytes(2 * count))
+        else:
+            self.scores = array("d", bytes(8 * count))
+        self.depths = array("b", bytes(count))
+        self.flags = array("B", bytes(count))
+        self.moves: list[Optional[Move]] = [None] * count
+        self.used = 0
 
     def _get_index_from_zobri_key(self, zobri_key: int):
         return zobri_key % self.max_entries_count
 
 
+def get_entry_size(quantized: bool = False) -> int:
+    score_size = array("h" if quantized else "d").itemsize
+    return array("Q").itemsize + score_size + 2 * array("b").itemsize + POINTER_SIZE
+
+
+def pack_score(score: int) -> int:
+    if score >= WIN_SCORE_BOUND:
+        return QUANTIZED_WIN_SCORE - max(WIN_SCORE - score, 0)
+    if score <= -WIN_SCORE_BOUND:
+        return -QUANTIZED_WIN_SCORE + max(WIN_SCORE + score, 0)
+    return score
+
+
+def unpack_score(score: int) -> int:
+    if score >= QUANTIZED_WIN_SCORE_BOUND:
+        return WIN_SCORE - (QUANTIZED_WIN_SCORE - score)
+    if score <= -QUANTIZED_WIN_SCORE_BOUND:
+        return -WIN_SCORE + (QUANTIZED_WIN_SCORE + score)
+    return score
+
+
+def is_win_score(score: float) -> bool:
+    return abs(score) >= WIN_SCORE_BOUND
+
+
+def score_to_tt(score: float, ply: int) -> float:
+    # Win scores are relative to the root. Entries are shared by nodes of any ply,
+    # so they store the distance to the win from the node itself.
+    if score >= WIN_SCORE_BOUND:
+        return score + ply
+    if score <= -WIN_SCORE_BOUND:
+        return score - ply
+    return score
+
+
+def score_from_tt(score: float, ply: int) -> float:
+    if score >= WIN_SCORE_BOUND:
+        return score - ply
+    if score <= -WIN_SCORE_BOUND:
+        return score + ply
+    return score
+
+
 def evaluate_entry(
     entry: Optional[TranspositionEntry],
     depth: int,
     alpha: float,
     beta: float,
+    ply: int = 0,
 ) -> tuple[float, bool, Optional[Move]]:
-    adjusted_score = 0.0
+    adjusted_score = 0
     should_use = False
     best_move: Optional[Move] = None
 
@@ -77,7 +173,7 @@ def evaluate_entry(
     if entry.depth < depth:
         return adjusted_score, should_use, best_move
 
-    score = entry.score
+    score = score_from_tt(entry.score, ply)
     if entry.flag == NodeFlag.EXACT:
         adjusted_score = score
         should_use = True
@@ -1,17 +1,24 @@
-import random
+from functools import cache
 
-from .constants import BOARD_SIZE, MAX_TROOPS, Board, Player
+import numpy as np
+from nptyping import NDArray
 
+from .constants import BOARD_SIZE, MAX_TROOPS, Board, Player
 
-def get_random_int() -> int:
-    return random.randint(0, pow(2, 64))
+# Keys are generated from this seed and the board size, so every process has the
+# same keys, and hashes can be shared between processes and stored.
+ZOBRIST_SEED = 0x5EED
 
 
-def initialize_zobri_table() -> list[list[list[int]]]:
-    return [
-        [[get_random_int() for _ in range(2 * MAX_TROOPS)] for _ in range(BOARD_SIZE)]
-        for _ in range(BOARD_SIZE)
-    ]
+def initialize_zobri_table(
+    size: int = BOARD_SIZE, seed: int = ZOBRIST_SEED
+) -> tuple[NDArray, int]:
+    # A key for every troops of every tile, and one for the side to move.
+    rng = np.random.default_rng([seed, size])
+    keys = rng.integers(
+        0, 2**64, size=size * size * 2 * MAX_TROOPS + 1, dtype=np.uint64
+    )
+    return keys[:-1].reshape(size, size, 2 * MAX_TROOPS), int(keys[-1])
 
 
 def get_piece_index(piece: int) -> int:
@@ -21,23 +28,53 @@ def get_piece_index(piece: int) -> int:
     return piece
 
 
-TABLE = initialize_zobri_table()
-SIDE_TO_MOVE = get_random_int()
+def get_piece_indices(boards: NDArray) -> NDArray:
+    # `get_piece_index` of every tile, with RED troops indexing from the end. Empty
+    # tiles get the index of 1 troop, and have to be masked.
+    boards = boards.astype(np.intp)
+    return np.where(boards > 0, boards - 1, boards) % (2 * MAX_TROOPS)
 
 
-def compute_zobri_hash(board: Board, player_to_move: Player) -> int:
-    zhash = 0
-    for i in range(BOARD_SIZE):
-        for j in range(BOARD_SIZE):
-            if board[i][j] != 0:
-                piece = get_piece_index(board[i][j])
-                zhash ^= TABLE[i][j][piece]
+@cache
+def get_zobri_table(size: int = BOARD_SIZE) -> tuple[NDArray, int]:
+    table, side_to_move = initialize_zobri_table(size)
+    table.flags.writeable = False
+    return table, side_to_move
+
+
+# The keys are generated on first use, so importing the module stays cheap. Moves
+# update hashes one key at a time, which is faster with Python ints.
+@cache
+def get_zobri_keys(size: int = BOARD_SIZE) -> tuple[list[list[list[int]]], int]:
+    table, side_to_move = get_zobri_table(size)
+    return table.tolist(), side_to_move
 
+
+def compute_zobri_hash(board: Board, player_to_move: Player) -> int:
+    table, side_to_move = get_zobri_table(board.shape[0])
+    rows, columns = np.nonzero(board)
+    keys = table[rows, columns, get_piece_indices(board[rows, columns])]
+    zhash = int(np.bitwise_xor.reduce(keys)) if len(keys) else 0
     if player_to_move == Player.RED:
-        zhash ^= SIDE_TO_MOVE
+        zhash ^= side_to_move
 
     return zhash
 
 
-def get_hash(x: int, y: int, troops: int) -> int:
-    return TABLE[x][y][get_piece_index(troops)]
+def compute_zobri_hashes(boards: NDArray, players_to_move: NDArray | list) -> NDArray:
+    """Hashes of a batch of boards of the same size, as `uint64`."""
+    boards = np.asarray(boards)
+    count, size = boards.shape[0], boards.shape[1]
+    table, side_to_move = get_zobri_table(size)
+    rows, columns = np.indices((size, size))
+    keys = table[rows, columns, get_piece_indices(boards)]
+    keys[boards == 0] = 0
+    hashes = np.bitwise_xor.reduce(keys.reshape(count, -1), axis=1)
+
+    red = np.asarray(players_to_move) == Player.RED
+    hashes[red] ^= np.uint64(side_to_move)
+    return hashes
+
+
+def get_hash(x: int, y: int, troops: int, size: int = BOARD_SIZE) -> int:
+    return get_zobri_keys(size)[0][x][y][get_piece_index(troops)]
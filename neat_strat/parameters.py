@@ -1,10 +1,32 @@
 import math
 
+from .network.constants import BOARD_SIZE
+
+
+def get_window_size(
+    board_size: int,
+    hex_radius: int,
+    hex_padding: int,
+    board_padding: int,
+    menu_height: int,
+    menu_padding: int,
+) -> tuple[int, int]:
+    hex_s_radius = hex_radius * math.sin(math.radians(60))
+    width = math.ceil(
+        2 * (board_size + 0.5) * hex_s_radius
+        + (board_size + 1) * hex_padding
+        + 2 * board_padding
+    )
+    height = math.ceil(
+        2 * board_size * hex_s_radius + 2 * board_padding + menu_height + menu_padding
+    )
+    return width, height
+
 
 class Params:
     board_title: str = "Neat Strat"
     board_padding: int = 50
-    board_size: int = 5
+    board_size: int = BOARD_SIZE
     menu_height: int = 20
     menu_padding: int = 40
     hex_radius: int = 50
@@ -12,16 +34,22 @@ class Params:
 
     hex_half_radius = hex_radius / 2
     hex_s_radius = hex_radius * math.sin(math.radians(60))
-    board_width = math.ceil(
-        2 * (board_size + 0.5) * hex_s_radius
-        + (board_size + 1) * hex_padding
-        + 2 * board_padding
-    )
-    board_height = math.ceil(
-        2 * board_size * hex_s_radius + 2 * board_padding + menu_height + menu_padding
+    board_width, board_height = get_window_size(
+        board_size, hex_radius, hex_padding, board_padding, menu_height, menu_padding
     )
     menu_width = math.ceil((8 / 10) * board_width - 2 * menu_padding)
     x_step = 2 * hex_s_radius + hex_padding
     y_step = (3 / 2) * hex_radius + hex_padding
     x_offset = x_step / 2
     r_1 = board_padding + hex_s_radius - hex_radius
+
+    @classmethod
+    def window_size(cls, board_size: int) -> tuple[int, int]:
+        return get_window_size(
+            board_size,
+            cls.hex_radius,
+            cls.hex_padding,
+            cls.board_padding,
+            cls.menu_height,
+            cls.menu_padding,
+        )
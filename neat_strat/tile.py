@@ -5,10 +5,17 @@ from arcade.shape_list import create_polygon
 from arcade.types import Color
 
 from .constants import *
+from .network.topology import get_topology
 
 
 class Tile:
-    def __init__(self, coords: Coords, owner: Player = Player.NATURE, troops: int = 0):
+    def __init__(
+        self,
+        coords: Coords,
+        owner: Player = Player.NATURE,
+        troops: int = 0,
+        size: int = BOARD_SIZE,
+    ):
         self.coords = coords
         self.troops = troops
         self.data_coords = self._precompute_data_coords(coords)
@@ -16,7 +23,7 @@ class Tile:
 
         self._owner = owner
         self._color = PLAYER_COLOR[owner]
-        self._neighbors = self._pre_compute_neighbors(coords)
+        self._neighbors = self._pre_compute_neighbors(coords, size)
         self._highlight_color = self._compute_highlight_color(self._color)
         self._shape = create_polygon(self.vertices, self._color)
 
@@ -70,23 +77,9 @@ class Tile:
         arcade.draw_polygon_outline(self.vertices, color, 4)
 
     @staticmethod
-    def _pre_compute_neighbors(coords: Coords) -> list[int]:
-        x, y = coords
-        neighbors = [(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)]
-
-        if not y % 2:
-            neighbors.append((x - 1, y + 1))
-            neighbors.append((x - 1, y - 1))
-        else:
-            neighbors.append((x + 1, y + 1))
-            neighbors.append((x + 1, y - 1))
-
-        def is_neighbor_valid(coord: Coords) -> bool:
-            x, y = coord
-            return x >= 0 and x < BOARD_SIZE and y >= 0 and y < BOARD_SIZE
-
-        neighbors = list(filter(is_neighbor_valid, neighbors))
-        return [Tile.hex_index_from_grid_coords(i) for i in neighbors]
+    def _pre_compute_neighbors(coords: Coords, size: int) -> list[int]:
+        topology = get_topology(size)
+        return [topology.get_index(*i) for i in topology.lookup_neighbours(*coords)]
 
     @staticmethod
     def _precompute_data_coords(coords: Coords) -> Coords:
@@ -122,6 +115,6 @@ class Tile:
         return Color(r, g, b)
 
     @staticmethod
-    def hex_index_from_grid_coords(coords: Coords) -> int:
+    def hex_index_from_grid_coords(coords: Coords, size: int = BOARD_SIZE) -> int:
         x, y = coords
-        return x * BOARD_SIZE + y if x != -1 else -1
+        return x * size + y if x != -1 else -1
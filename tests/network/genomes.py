@@ -0,0 +1,59 @@
+import math
+from types import SimpleNamespace
+
+import numpy as np
+
+INPUTS = 25
+
+
+def get_genome(seed: int = 0) -> SimpleNamespace:
+    # Inputs, one hidden node fed by half of them and the output.
+    rng = np.random.default_rng(seed)
+    nodes = {
+        i: SimpleNamespace(
+            node_type="input",
+            bias=0.0,
+            response=1.0,
+            aggregator="sum",
+            activator="sigmoid",
+        )
+        for i in range(INPUTS)
+    }
+    for i, kind in ((INPUTS, "output"), (INPUTS + 1, "hidden")):
+        nodes[i] = SimpleNamespace(
+            node_type=kind,
+            bias=float(rng.normal()),
+            response=1.0,
+            aggregator="sum",
+            activator="sigmoid",
+        )
+
+    links = {}
+    for i in range(INPUTS):
+        out_node = INPUTS + 1 if i % 2 else INPUTS
+        links[len(links)] = SimpleNamespace(
+            in_node=i, out_node=out_node, weight=float(rng.normal()) / 10, enabled=True
+        )
+    links[len(links)] = SimpleNamespace(
+        in_node=INPUTS + 1, out_node=INPUTS, weight=1.5, enabled=True
+    )
+    links[len(links)] = SimpleNamespace(
+        in_node=0, out_node=INPUTS + 1, weight=100.0, enabled=False
+    )
+    return SimpleNamespace(nodes=nodes, links=links)
+
+
+def get_reference(genome: SimpleNamespace):
+    def activate(inputs) -> list[float]:
+        values = dict(enumerate(inputs))
+        for node_id in (INPUTS + 1, INPUTS):
+            node = genome.nodes[node_id]
+            total = sum(
+                link.weight * values[link.in_node]
+                for link in genome.links.values()
+                if link.enabled and link.out_node == node_id
+            )
+            values[node_id] = 1 / (1 + math.exp(-(node.bias + node.response * total)))
+        return [values[INPUTS]]
+
+    return activate
@@ -0,0 +1,200 @@
+import numpy as np
+
+from neat_strat.network.adjudication import (
+    Adjudicator,
+    ForcedWinRule,
+    MaterialRule,
+    calibrate,
+    get_default_adjudicator,
+)
+from neat_strat.network.constants import WIN_SCORE, EndgameState, Player
+from neat_strat.network.game_state import GameState
+from neat_strat.network.search import play
+from neat_strat.network.zobrist import compute_zobri_hash
+
+
+def get_state(rows: list[list[int]], player: Player) -> GameState:
+    board = np.asarray(rows, dtype=np.int8)
+    return GameState(board, compute_zobri_hash(board, player), player)
+
+
+def material(board) -> list[float]:
+    return [float(board.sum())]
+
+
+def hunter(board) -> list[float]:
+    return [float(board.sum()) - 5.0 * float((board < 0).sum())]
+
+
+def attacker(board) -> list[float]:
+    # Like hunter, but troops are also pushed towards the RED corner.
+    rows = board.reshape(5, 5)
+    progress = np.arange(5)[None, :] - np.arange(5)[:, None]
+    advance = float((np.clip(rows, 0, None) * progress).sum())
+    return [hunter(board)[0] + 0.1 * advance]
+
+
+# Middlegames where one side is ahead, with both sides to move.
+POSITIONS = [
+    (
+        [
+            [0, 0, 0, 0, -3],
+            [0, 0, 0, 0, 0],
+            [0, 0, 6, 0, 0],
+            [0, 0, 0, 0, 0],
+            [8, 0, 0, 0, 0],
+        ],
+        Player.BLUE,
+    ),
+    (
+        [
+            [0, 0, 0, -5, -9],
+            [0, 0, 0, 0, -4],
+            [0, 0, 0, 0, 0],
+            [0, 2, 0, 0, 0],
+            [3, 0, 0, 0, 0],
+        ],
+        Player.BLUE,
+    ),
+    (
+        [
+            [0, 0, 0, -6, -8],
+            [0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0],
+            [9, 1, 0, 0, 0],
+        ],
+        Player.RED,
+    ),
+]
+
+
+def test_material_rule_needs_consecutive_plies():
+    rule = MaterialRule(ratio=2.0, plies=3)
+    winning = get_state(
+        [
+            [0, 0, 0, 0, -2],
+            [0, 0, 0, 0, 0],
+            [0, 0, 4, 0, 0],
+            [0, 0, 0, 0, 0],
+            [6, 0, 0, 0, 0],
+        ],
+        Player.RED,
+    )
+    even = get_state(
+        [
+            [0, 0, 0, 0, -10],
+            [0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0],
+            [10, 0, 0, 0, 0],
+        ],
+        Player.RED,
+    )
+
+    assert rule.update(winning, Player.BLUE, 0.0) is None
+    assert rule.update(winning, Player.BLUE, 0.0) is None
+    assert rule.update(even, Player.BLUE, 0.0) is None
+    assert rule.update(winning, Player.BLUE, 0.0) is None
+    assert rule.update(winning, Player.BLUE, 0.0) is None
+    assert rule.update(winning, Player.BLUE, 0.0) == EndgameState.BLUE_WON
+
+
+def test_forced_win_rule_finds_wipe_out():
+    rule = ForcedWinRule()
+    state = get_state(
+        [
+            [0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0],
+            [0, -2, 0, 0, 0],
+            [7, 0, 0, 0, 0],
+        ],
+        Player.BLUE,
+    )
+    board = state.board.copy()
+
+    assert rule.update(state, Player.RED, 0.0) == EndgameState.BLUE_WON
+    assert np.array_equal(state.board, board)
+    assert not state.history
+
+    state.player_to_move = Player.RED
+    assert rule.update(state, Player.BLUE, 0.0) is None
+
+
+class PlyRule:
+    def __init__(self, ply: int):
+        self.ply = ply
+
+    def reset(self):
+        pass
+
+    def update(self, state: GameState, mover: Player, score: float):
+        return EndgameState.BLUE_WON if len(state.history) >= self.ply else None
+
+
+def test_adjudicated_games_stop_early():
+    adjudicator = Adjudicator([PlyRule(6)])
+    played_out, full_state = play(
+        material, hunter, False, 10, 1, adjudicator=adjudicator, adjudicate=False
+    )
+    assert played_out == EndgameState.ONGOING
+    assert len(full_state.history) == 10
+    assert adjudicator.verdict == EndgameState.BLUE_WON
+    assert adjudicator.verdict_ply == 6
+
+    verdict, state = play(material, hunter, False, 10, 1, adjudicator=adjudicator)
+    assert verdict == EndgameState.BLUE_WON
+    assert len(state.history) == 6
+    assert state.history == full_state.history[:6]
+
+
+def test_calibration_compares_verdicts_to_played_out_games():
+    games = [(material, hunter, False), (hunter, material, True)]
+    report = calibrate(games, 10, 1, Adjudicator([PlyRule(6)]))
+
+    assert report.adjudicated == len(games)
+    # Neither game finishes, so no verdict can be checked.
+    assert report.unresolved == len(games)
+    assert report.agreement == 1.0
+    assert report.plies_played == 20
+    assert report.plies_saved == 8
+
+
+def test_default_adjudicator_agrees_with_played_out_games():
+    positions = [
+        (np.asarray(rows, dtype=np.int8), player) for rows, player in POSITIONS
+    ]
+    report = calibrate(
+        [(attacker, attacker, False)],
+        40,
+        2,
+        get_default_adjudicator(),
+        positions=positions,
+    )
+
+    # Pinned, so a change to the rules or the search shows up as a failure here.
+    assert report.games == len(POSITIONS)
+    assert report.adjudicated == 3
+    assert report.unresolved == 0
+    assert report.agreement == 1.0
+    assert report.plies_played == 76
+    assert report.plies_saved == 57
+
+
+def test_forced_win_rule_trusts_win_scores():
+    rule = ForcedWinRule()
+    state = get_state(
+        [
+            [0, 0, 0, 0, -10],
+            [0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0],
+            [10, 0, 0, 0, 0],
+        ],
+        Player.RED,
+    )
+
+    assert rule.update(state, Player.BLUE, WIN_SCORE - 3) == EndgameState.BLUE_WON
+    assert rule.update(state, Player.BLUE, -WIN_SCORE + 2) == EndgameState.RED_WON
+    assert rule.update(state, Player.BLUE, 0.9) is None
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from neat_strat.network.benchmark import (
+    get_baseline_result,
+    get_synthetic_batch_evaluator,
+    get_synthetic_evaluator,
+    get_training_benchmark_result,
+    load_baseline,
+    run_incremental_benchmark,
+    run_scaling_benchmark,
+    save_baseline,
+)
+from neat_strat.network.search import get_default_state
+
+
+def test_synthetic_batch_evaluator_matches_evaluator():
+    board = get_default_state().board.flatten()
+    inputs = np.stack([board, -board, np.zeros_like(board)])
+
+    outputs = get_synthetic_batch_evaluator(seed=3)(inputs)
+
+    evaluator = get_synthetic_evaluator(seed=3, sigmoid=True)
+    assert outputs.shape == (3, 1)
+    for row, output in zip(inputs, outputs):
+        assert output.tolist() == pytest.approx(evaluator(row))
+
+
+def test_scaling_positions_grow_with_the_board():
+    small, large = run_scaling_benchmark([5, 9], 1, positions=2)
+    assert (small.size, large.size) == (5, 9)
+    assert small.occupied_tiles < large.occupied_tiles
+    assert small.branching_factor < large.branching_factor
+    assert small.effective_branching_factor > 1
+
+
+def test_incremental_searches_match_full_searches():
+    results = run_incremental_benchmark(2)
+    assert [result.position for result in results] == [0, 1, 2, 3]
+    for result in results:
+        assert result.matches
+        assert result.nodes > 0
+        assert result.speedup > 0
+
+
+def test_training_results_are_saved_as_baselines(tmp_path):
+    metrics = [
+        {
+            "games_played": 30,
+            "seconds": 4.0,
+            "phases": {"games": 3.0, "reproduction": 1.0},
+            "cpu_utilisation": 0.5,
+            "peak_worker_rss_MB": 90.0,
+        },
+        {
+            "games_played": 10,
+            "seconds": 1.0,
+            "phases": {"games": 1.0},
+            "cpu_utilisation": 0.9,
+            "peak_worker_rss_MB": 100.0,
+        },
+    ]
+
+    result = get_training_benchmark_result(2, True, metrics)
+    assert result.games == 40
+    assert result.games_per_second == 8.0
+    assert result.generation_seconds == 2.5
+    assert result.cpu_utilisation == pytest.approx(0.6)
+    assert result.peak_worker_rss_MB == 100.0
+
+    save_baseline(tmp_path / "baseline.json", [result])
+    baseline = load_baseline(tmp_path / "baseline.json")
+    assert get_baseline_result(baseline, result) == result
+    other = get_training_benchmark_result(4, True, metrics)
+    assert get_baseline_result(baseline, other) is None
@@ -0,0 +1,61 @@
+import pickle
+
+from neat_strat.network.checkpoint import (
+    INDEX_FILENAME,
+    CheckpointStore,
+    RecordKind,
+    import_legacy_directory,
+)
+
+
+def test_save_and_load_generations(tmp_path):
+    with CheckpointStore(tmp_path) as store:
+        for generation in range(3):
+            population = {"genomes": list(range(generation + 1))}
+            winner = ("winner", generation)
+            stats = {"best_fitness": float(generation)}
+            store.save(generation, population, winner, stats)
+
+    store = CheckpointStore(tmp_path)
+    assert store.generations == [0, 1, 2]
+    assert store.latest_generation() == 2
+    assert store.load_winner(1) == ("winner", 1)
+    assert store.load_winner() == ("winner", 2)
+    assert store.load_stats(0) == {"best_fitness": 0.0}
+    assert store.load_population() == {"genomes": [0, 1, 2]}
+
+
+def test_resaved_generation_replaces_previous_record(tmp_path):
+    with CheckpointStore(tmp_path) as store:
+        store.save(0, winner="first")
+        store.save(0, winner="second")
+
+    assert CheckpointStore(tmp_path).load_winner(0) == "second"
+
+
+def test_truncated_index_entry_is_ignored(tmp_path):
+    with CheckpointStore(tmp_path) as store:
+        store.save(0, winner="first")
+        store.save(1, winner="second")
+
+    index_path = tmp_path / INDEX_FILENAME
+    index_path.write_bytes(index_path.read_bytes()[:-3])
+
+    store = CheckpointStore(tmp_path)
+    assert store.generations == [0]
+    assert store.load_winner() == "first"
+
+
+def test_import_legacy_directory(tmp_path):
+    legacy = tmp_path / "legacy"
+    legacy.mkdir()
+    for generation in range(2):
+        with open(legacy / f"generation_{generation}_winner.pkl", "wb") as f:
+            pickle.dump(("winner", generation), f)
+        with open(legacy / f"generation_{generation}_stats.pkl", "wb") as f:
+            pickle.dump(("stats", generation), f)
+
+    with CheckpointStore(tmp_path / "store") as store:
+        assert import_legacy_directory(legacy, store) == 4
+        assert store.load_winner(1) == ("winner", 1)
+        assert store.load(0, RecordKind.STATS) == ("stats", 0)
@@ -0,0 +1,83 @@
+import math
+import random
+
+import numpy as np
+
+from neat_strat.network.compiled_network import (
+    CompiledNetwork,
+    IncrementalEvaluator,
+    compile_network,
+)
+from neat_strat.network.constants import Player
+from neat_strat.network.game_state import make_move, undo_move
+from neat_strat.network.search import (
+    Searcher,
+    format_board_for_evaluation,
+    get_default_state,
+    get_possible_moves,
+)
+
+from .genomes import INPUTS, get_genome, get_reference
+
+
+def test_compiled_network_matches_genome():
+    genome = get_genome()
+    reference = get_reference(genome)
+    batch = np.random.default_rng(1).integers(-10, 11, size=(8, INPUTS))
+
+    outputs = CompiledNetwork.from_genome(genome).activate_batch(batch)
+    assert outputs.shape == (8, 1)
+    assert np.allclose(outputs[:, 0], [reference(row)[0] for row in batch])
+
+    _, compiled = compile_network(genome, reference)
+    assert compiled
+
+
+def test_compile_network_falls_back_on_mismatch():
+    genome = get_genome()
+
+    def reference(inputs) -> list[float]:
+        return [0.5]
+
+    evaluate_batch, compiled = compile_network(genome, reference)
+    assert not compiled
+    assert evaluate_batch(np.zeros((3, INPUTS))).tolist() == [[0.5]] * 3
+
+
+def test_accumulator_follows_moves():
+    network = CompiledNetwork.from_genome(get_genome())
+    evaluator = IncrementalEvaluator(network)
+    state = get_default_state()
+    rng = random.Random(0)
+
+    def assert_matches_network():
+        for side in (Player.BLUE, Player.RED):
+            inputs = format_board_for_evaluation(state.board, side)
+            assert np.allclose(
+                state.accumulator.evaluate(side), network.activate(inputs)
+            )
+
+    with evaluator.attach(state):
+        for _ in range(12):
+            moves = get_possible_moves(state.board, state.player_to_move)
+            make_move(state, rng.choice(moves))
+            assert_matches_network()
+        for _ in range(6):
+            undo_move(state)
+            assert_matches_network()
+
+    assert state.accumulator is None
+
+
+def test_incremental_search_matches_full_evaluation():
+    network = CompiledNetwork.from_genome(get_genome())
+    state = get_default_state()
+    make_move(state, ((4, 0), (4, 0)))
+
+    full = Searcher(1, 3)
+    incremental = Searcher(1, 3)
+    assert incremental.search(IncrementalEvaluator(network), state) == full.search(
+        network.activate, state
+    )
+    assert math.isclose(incremental.score, full.score, abs_tol=1e-9)
+    assert incremental.nodes == full.nodes
@@ -0,0 +1,137 @@
+import io
+import json
+import math
+import threading
+
+import numpy as np
+import pytest
+
+from neat_strat.network.compiled_network import CompiledNetwork
+from neat_strat.network.constants import Evaluator, Player
+from neat_strat.network.engine import EngineServer, LocalEngineClient
+from neat_strat.network.search import Searcher, get_default_state
+
+from .genomes import get_genome, get_reference
+
+
+def get_engine(searchers: int = 4) -> tuple[EngineServer, Evaluator]:
+    genome = get_genome()
+    engine = EngineServer(searchers, storage_size_MB=1, depth=2)
+    engine.add_network("linear", CompiledNetwork.from_genome(genome).activate_batch)
+    return engine, get_reference(genome)
+
+
+def test_engine_moves_match_searcher():
+    engine, reference = get_engine()
+    client = LocalEngineClient(engine)
+    state = get_default_state()
+
+    move, score = client.get_move("linear", state.board, Player.BLUE)
+
+    searcher = Searcher(1, 2)
+    assert move == searcher.search(reference, state)
+    assert math.isclose(score, searcher.score)
+
+
+def test_concurrent_requests_are_batched():
+    engine, reference = get_engine()
+    client = LocalEngineClient(engine)
+    state = get_default_state()
+    results = []
+
+    def request(depth: int):
+        results.append(client.get_move("linear", state.board, Player.BLUE, depth))
+
+    threads = [threading.Thread(target=request, args=(2,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    expected = Searcher(1, 2).search(reference, state)
+    assert [move for move, _ in results] == [expected] * 4
+    evaluator = engine.networks["linear"]
+    assert evaluator.batches < evaluator.evaluations
+
+    stats = client.get_stats()
+    assert stats["requests"] == 4
+    assert stats["latency"]["p50"] <= stats["latency"]["p99"]
+
+
+def test_engine_serves_streams():
+    engine, _ = get_engine()
+    board = get_default_state().board.tolist()
+    requests = [
+        {"id": 1, "type": "move", "genome": "linear", "board": board, "side": 1},
+        {"id": 2, "type": "move", "genome": "missing", "board": board, "side": 1},
+        {"id": 3, "type": "unknown"},
+    ]
+    reader = io.StringIO("".join(json.dumps(r) + "\n" for r in requests) + "{\n")
+    writer = io.StringIO()
+
+    engine.serve_stream(reader, writer)
+
+    responses = [json.loads(line) for line in writer.getvalue().splitlines()]
+    by_id = {response["id"]: response for response in responses}
+    assert len(responses) == 4
+    assert "move" in by_id[1] and "error" not in by_id[1]
+    assert "error" in by_id[2] and "error" in by_id[3] and "error" in by_id[None]
+
+
+def test_failed_searches_get_error_responses():
+    engine, _ = get_engine(searchers=1)
+
+    def fail(inputs):
+        raise RuntimeError("network failed")
+
+    engine.add_network("broken", fail)
+    board = get_default_state().board.tolist()
+    request = {"id": 1, "genome": "broken", "board": board, "side": 1}
+    assert engine.handle(request) == {"id": 1, "error": "network failed"}
+
+    # The searcher of the failed search is available again.
+    response = engine.handle({**request, "genome": "linear"})
+    assert "move" in response and "error" not in response
+
+
+def test_failed_batches_fail_every_search_of_the_batch():
+    engine, _ = get_engine()
+    batches = []
+
+    def fail(inputs):
+        batches.append(len(inputs))
+        raise RuntimeError("network failed")
+
+    engine.add_network("broken", fail)
+    board = get_default_state().board.tolist()
+    responses = []
+
+    def request(index: int):
+        responses.append(
+            engine.handle({"id": index, "genome": "broken", "board": board, "side": 1})
+        )
+
+    threads = [
+        threading.Thread(target=request, args=(i,), daemon=True) for i in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert not any(thread.is_alive() for thread in threads)
+    assert sorted(response["id"] for response in responses) == list(range(4))
+    assert all(response["error"] == "network failed" for response in responses)
+    assert sum(batches) == 4
+
+
+def test_finished_games_get_error_responses():
+    engine, _ = get_engine()
+    client = LocalEngineClient(engine)
+    client.get_move("linear", get_default_state().board, Player.BLUE)
+
+    # BLUE has no troops left.
+    board = np.zeros((5, 5), dtype=np.int8)
+    board[0, 4] = -3
+    with pytest.raises(RuntimeError, match="RED_WON"):
+        client.get_move("linear", board, Player.BLUE)
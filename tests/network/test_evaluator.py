@@ -1,15 +1,21 @@
 import numpy as np
 
-from src.constants import MAX_TROOPS
-from src.network.constants import Player
-from src.network.game_state import (
+from neat_strat.network.constants import MAX_TROOPS, Player
+from neat_strat.network.game_state import (
     GameState,
     make_move,
     switch_player_to_move,
     undo_move,
 )
-from src.network.search import Searcher, get_default_state, get_possible_moves
-from src.network.zobrist import compute_zobri_hash, get_hash, get_piece_index
+from neat_strat.network.search import Searcher, get_default_state, get_possible_moves
+from neat_strat.network.zobrist import (
+    compute_zobri_hash,
+    compute_zobri_hashes,
+    get_hash,
+    get_piece_index,
+    get_zobri_table,
+    initialize_zobri_table,
+)
 
 
 def a_test_select_best_move():
@@ -70,6 +76,53 @@ def test_zobrist_hash():
         assert new_hash != original_hash
 
 
+def test_zobrist_keys_are_seeded():
+    table, side_to_move = get_zobri_table(5)
+    assert table.dtype == np.uint64
+    assert table.shape == (5, 5, 2 * MAX_TROOPS)
+    other_table, other_side_to_move = initialize_zobri_table(5)
+    assert (table == other_table).all() and side_to_move == other_side_to_move
+    assert not (initialize_zobri_table(5, seed=1)[0] == table).all()
+
+
+def test_zobrist_hashes_match_incremental_hashes():
+    state = GameState(
+        np.asarray(
+            [
+                [0, 0, 0, 0, -1],
+                [0, 0, 0, 0, 0],
+                [0, 0, 0, 1, -10],
+                [0, 1, 0, 0, 0],
+                [8, 0, 0, 0, 0],
+            ],
+            dtype=np.int8,
+        ),
+        0,
+        Player.RED,
+    )
+    state.hash = compute_zobri_hash(state.board, state.player_to_move)
+    original_hash = state.hash
+    boards = [state.board.copy()]
+    players = [state.player_to_move]
+    # The capture empties its target.
+    for move in [((2, 4), (2, 3), -1), ((4, 0), (4, 0)), ((0, 4), (1, 4), -1)]:
+        make_move(state, move)
+        assert state.hash == compute_zobri_hash(state.board, state.player_to_move)
+        boards.append(state.board.copy())
+        players.append(state.player_to_move)
+
+    hashes = compute_zobri_hashes(np.stack(boards), players)
+    assert hashes.dtype == np.uint64
+    assert hashes[-1] == state.hash
+    assert [compute_zobri_hash(b, p) for b, p in zip(boards, players)] == [
+        int(h) for h in hashes
+    ]
+
+    for _ in range(3):
+        undo_move(state)
+    assert state.hash == original_hash
+
+
 def test_switch_current_player():
     state = get_default_state()
     original_hash = state.hash
@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+from neat_strat.network.constants import EndgameState, Player
+from neat_strat.network.game_state import GameState
+from neat_strat.network.zobrist import compute_zobri_hash
+
+pytest.importorskip("neat")
+
+from neat_strat.network.neural_network import get_fitness  # noqa: E402
+
+
+def test_drawn_games_score_like_unfinished_games():
+    board = np.zeros((5, 5), dtype=np.int8)
+    board[4, 0] = 6
+    board[0, 4] = -2
+    state = GameState(board, compute_zobri_hash(board, Player.BLUE), Player.BLUE)
+
+    def fitness(endstate: EndgameState) -> float:
+        return get_fitness(endstate, state, False, 20, 400)
+
+    assert fitness(EndgameState.REPETITION) == fitness(EndgameState.ONGOING)
+    assert fitness(EndgameState.DRAW) == fitness(EndgameState.ONGOING)
+    assert fitness(EndgameState.DRAW) > fitness(EndgameState.RED_WON)
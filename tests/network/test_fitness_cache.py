@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+from neat_strat.network.fingerprint import get_genome_fingerprint
+from neat_strat.network.fitness_cache import FitnessCache, GameKey
+
+
+def make_genome(genome_id: int, weight: float, enabled: bool = True):
+    def node(node_id: int, node_type: str):
+        return SimpleNamespace(
+            id=node_id,
+            node_type=node_type,
+            bias=0.5,
+            response=1.0,
+            activator="sigmoid",
+            aggregator="sum",
+        )
+
+    links = {
+        0: SimpleNamespace(in_node=0, out_node=1, weight=weight, enabled=True),
+        1: SimpleNamespace(in_node=0, out_node=1, weight=3.0, enabled=enabled),
+    }
+    nodes = {0: node(0, "input"), 1: node(1, "output")}
+    return SimpleNamespace(id=genome_id, fitness=None, nodes=nodes, links=links)
+
+
+def test_fingerprint_ignores_identity_and_disabled_links():
+    genome = make_genome(1, 0.25, enabled=False)
+    clone = make_genome(2, 0.25, enabled=False)
+    clone.fitness = 10.0
+    assert get_genome_fingerprint(genome) == get_genome_fingerprint(clone)
+
+    clone.links[1].weight = -7.0
+    assert get_genome_fingerprint(genome) == get_genome_fingerprint(clone)
+
+    assert get_genome_fingerprint(genome) != get_genome_fingerprint(
+        make_genome(1, 0.5, enabled=False)
+    )
+    assert get_genome_fingerprint(genome) != get_genome_fingerprint(
+        make_genome(1, 0.25, enabled=True)
+    )
+
+
+def test_fitness_cache_hits_and_eviction():
+    cache = FitnessCache(max_size=2)
+    keys = [GameKey(str(i), "opponent", False, 3, 20, 5, 1) for i in range(3)]
+
+    assert cache.get(keys[0]) is None
+    cache.add(keys[0], 1.0)
+    cache.add(keys[1], 2.0)
+    assert cache.get(keys[0]) == 1.0
+
+    # The least recently used entry is evicted.
+    cache.add(keys[2], 3.0)
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) == 3.0
+    assert (cache.hits, cache.misses) == (2, 2)
+    assert cache.hit_rate == 0.5
+
+    # Games whose searches had smaller tables are played again.
+    assert cache.get(GameKey("2", "opponent", False, 3, 20, 5, 0.5)) is None
@@ -0,0 +1,90 @@
+from types import SimpleNamespace
+
+import pytest
+
+from neat_strat.network.benchmark import get_synthetic_evaluator
+from neat_strat.network.constants import EndgameState
+from neat_strat.network.game_log import (
+    BLOCK_ENTRY,
+    GAME_HEADER,
+    MAX_BOARD_SIZE,
+    MOVE,
+    GameLogReader,
+    GameLogWriter,
+)
+from neat_strat.network.search import play
+
+PLAYER = "00112233445566778899aabbccddeeff"
+
+
+def play_games(count: int, size: int = 5) -> list[tuple[EndgameState, object]]:
+    games = []
+    for seed in range(count):
+        player = get_synthetic_evaluator(size * size, seed, sigmoid=True)
+        opponent = get_synthetic_evaluator(size * size, seed + 1, sigmoid=True)
+        games.append(play(player, opponent, bool(seed % 2), 8, 1, size))
+    return games
+
+
+def test_logged_games_are_read_back(tmp_path):
+    games = play_games(5)
+    with GameLogWriter(tmp_path, "games-a", block_games=2) as writer:
+        for index, (result, state) in enumerate(games):
+            writer.add(PLAYER, None, bool(index % 2), result, state)
+
+    reader = GameLogReader(tmp_path)
+    assert len(reader.blocks) == 3
+    assert len(reader) == 5
+
+    records = list(reader)
+    for index, ((result, state), record) in enumerate(zip(games, records)):
+        assert record.player == PLAYER
+        assert record.opponent is None
+        assert record.opponent_starts == bool(index % 2)
+        assert record.result == result
+        assert record.captures == (state.captures[1], state.captures[-1])
+        assert record.board_size == 5
+        assert record.moves == state.history
+    assert reader.read_block(2) == records[4:]
+
+    # Moves are packed with a fixed width.
+    data = (tmp_path / "games-a.dat").read_bytes()
+    moves = sum(len(state.history) for _, state in games)
+    assert len(data) == 5 * GAME_HEADER.size + moves * MOVE.size
+
+
+def test_every_writer_has_its_own_files(tmp_path):
+    (result, state), *_ = play_games(1)
+    for name in ("games-1", "games-2"):
+        with GameLogWriter(tmp_path, name) as writer:
+            writer.add(None, PLAYER, False, result, state)
+
+    assert len(GameLogReader(tmp_path)) == 2
+
+
+def test_unflushed_and_partially_indexed_games_are_ignored(tmp_path):
+    (result, state), *_ = play_games(1)
+    writer = GameLogWriter(tmp_path, "games-a")
+    writer.add(PLAYER, PLAYER, False, result, state)
+    writer.flush()
+    writer.add(PLAYER, PLAYER, False, result, state)
+
+    with open(writer.index_path, "ab") as index:
+        index.write(BLOCK_ENTRY.pack(0, 1, 1)[:5])
+
+    assert len(list(GameLogReader(tmp_path))) == 1
+
+
+def test_games_on_large_boards_are_logged(tmp_path):
+    # RED starts on tiles past the first 256.
+    (result, state), *_ = play_games(1, 17)
+    with GameLogWriter(tmp_path, "games-a") as writer:
+        writer.add(PLAYER, None, False, result, state)
+
+    (record,) = GameLogReader(tmp_path)
+    assert record.board_size == 17
+    assert record.moves == state.history
+
+    too_large = SimpleNamespace(topology=SimpleNamespace(size=MAX_BOARD_SIZE + 1))
+    with pytest.raises(ValueError, match="can't be logged"):
+        writer.add(PLAYER, None, False, result, too_large)
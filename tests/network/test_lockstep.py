@@ -0,0 +1,43 @@
+from neat_strat.network.benchmark import get_synthetic_evaluator
+from neat_strat.network.compiled_network import get_fallback_batch_evaluator
+from neat_strat.network.lockstep import LockstepStats, run_lockstep
+from neat_strat.network.search import play, play_steps
+
+ROUNDS = 6
+DEPTH = 2
+
+
+def test_lockstep_games_match_sequential_games():
+    evaluators = [get_synthetic_evaluator(seed=seed, sigmoid=True) for seed in range(3)]
+    networks = {
+        evaluator: get_fallback_batch_evaluator(evaluator) for evaluator in evaluators
+    }
+    games = [
+        (evaluators[0], evaluators[1], False),
+        (evaluators[0], evaluators[2], True),
+        (evaluators[1], evaluators[2], False),
+        (evaluators[2], evaluators[0], True),
+    ]
+
+    stats = LockstepStats()
+    results = run_lockstep(
+        [
+            play_steps(networks[player], networks[opponent], starts, ROUNDS, DEPTH)
+            for player, opponent, starts in games
+        ],
+        stats,
+    )
+
+    for (player, opponent, starts), (endgame_state, state) in zip(games, results):
+        expected_state, expected = play(player, opponent, starts, ROUNDS, DEPTH)
+        assert endgame_state == expected_state
+        assert state.history == expected.history
+    assert stats.batches < stats.evaluations
+
+
+def test_lockstep_returns_games_that_end_without_evaluations():
+    def finished():
+        return "done"
+        yield
+
+    assert run_lockstep([finished()]) == ["done"]
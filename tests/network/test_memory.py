@@ -0,0 +1,47 @@
+import pytest
+
+from neat_strat.network.memory import (
+    MIN_TABLE_SIZE_MB,
+    PROCESS_OVERHEAD_MB,
+    format_memory_plan,
+    get_table_size_MB,
+    plan_memory,
+)
+from neat_strat.network.transposition_table import (
+    NodeFlag,
+    TranspositionTable,
+    get_entry_size,
+)
+
+
+def test_budget_is_split_between_processes():
+    plan = plan_memory(8, 4096)
+    assert plan.process_tables_MB == 4096 / 8 - PROCESS_OVERHEAD_MB
+    assert plan.total_MB == pytest.approx(4096)
+    assert "over budget" not in format_memory_plan(plan)
+
+    # Tables share the memory of their process, within the bounds of a table.
+    assert get_table_size_MB(plan.process_tables_MB, 96, 1) == 1
+    assert get_table_size_MB(plan.process_tables_MB, 1024, 1) == 0.375
+    assert get_table_size_MB(0.0, 10, 1) == MIN_TABLE_SIZE_MB
+
+    crowded = plan_memory(64, 4096)
+    assert crowded.process_tables_MB == 0.0
+    assert "over budget" in format_memory_plan(crowded)
+
+
+def test_table_size_follows_entry_layout():
+    table = TranspositionTable(1)
+    assert table.max_entries_count == 1024 * 1024 // get_entry_size()
+    assert table.size_MB == pytest.approx(1, rel=1e-3)
+    assert TranspositionTable(1, quantized=True).max_entries_count > (
+        table.max_entries_count
+    )
+
+    assert table.used == 0
+    table.add(1, 0.5, None, 1, NodeFlag.EXACT)
+    table.add(1, 0.25, None, 2, NodeFlag.EXACT)
+    assert table.used == 1
+    assert table.fill == 1 / table.max_entries_count
+    table.clear()
+    assert table.used == 0
@@ -0,0 +1,63 @@
+import io
+
+import pytest
+
+from neat_strat.network.benchmark import get_synthetic_evaluator
+from neat_strat.network.metrics import (
+    MetricsLog,
+    PhaseTimer,
+    WorkerStats,
+    get_generation_metrics,
+    read_metrics,
+)
+from neat_strat.network.search import evaluate_tagged, play_steps
+
+
+def test_play_counts_searches_and_nodes():
+    evaluator = get_synthetic_evaluator(sigmoid=True)
+    stats = WorkerStats()
+    steps = play_steps(evaluator, evaluator, False, 6, 2, stats=stats)
+
+    # Every input comes with the network that evaluates it.
+    try:
+        request = next(steps)
+        while True:
+            request = steps.send(evaluate_tagged(request))
+    except StopIteration as stop:
+        _, state = stop.value
+
+    assert stats.searches == len(state.history)
+    assert stats.nodes > stats.searches
+
+
+def test_generation_metrics_are_logged(tmp_path):
+    stats = WorkerStats()
+    stats.add(WorkerStats(4, 40, 4000, 900, 300, 3.0, 2.0, 120.0))
+    stats.add(WorkerStats(2, 20, 2000, 300, 100, 1.0, 0.8, 100.0))
+    timer = PhaseTimer()
+    timer.add("games", 2.0)
+    timer.add("checkpoint", 0.5)
+
+    metrics = get_generation_metrics(0, [1.0, 2.0, 3.0, 10.0], 2, stats, timer, 4)
+    assert metrics.games_played == 6
+    assert metrics.games_per_second == 3.0
+    assert metrics.nodes_per_search == 100.0
+    assert metrics.mean_batch_size == 3.0
+    assert metrics.worker_utilisation == 0.5
+    assert metrics.cpu_utilisation == pytest.approx(0.35)
+    assert metrics.peak_worker_rss_MB == 120.0
+    assert metrics.seconds == 2.5
+    assert metrics.fitness.best == 10.0
+    assert metrics.fitness.mean == 4.0
+    assert metrics.fitness.percentiles["p50"] == pytest.approx(2.5)
+
+    console = io.StringIO()
+    log = MetricsLog(tmp_path / "run" / "metrics.jsonl", console)
+    log.record(metrics)
+    log.record(metrics)
+
+    records = read_metrics(tmp_path / "run" / "metrics.jsonl")
+    assert len(records) == 2
+    assert records[0]["phases"] == {"games": 2.0, "checkpoint": 0.5}
+    assert records[0]["fitness"]["worst"] == 1.0
+    assert console.getvalue().count("generation 0:") == 2
@@ -0,0 +1,40 @@
+import numpy as np
+
+from neat_strat.network.benchmark import get_synthetic_batch_evaluator
+from neat_strat.network.prescreen import (
+    ScreenResult,
+    Screening,
+    get_probe_inputs,
+    get_probe_outputs,
+    screen_networks,
+    screen_outputs,
+)
+
+
+def test_screen_outputs():
+    rng = np.random.default_rng(0)
+    distinct = rng.random((2, 16))
+    outputs = np.stack(
+        [distinct[0], np.full(16, 0.5), distinct[0] + 1e-6, distinct[1]]
+    )
+    assert screen_outputs(outputs) == [
+        ScreenResult(Screening.PLAY),
+        ScreenResult(Screening.DEGENERATE),
+        ScreenResult(Screening.DUPLICATE, 0),
+        ScreenResult(Screening.PLAY),
+    ]
+
+
+def test_probe_outputs_of_networks():
+    probes = get_probe_inputs(5)
+    assert probes is get_probe_inputs(5)
+    assert not probes.flags.writeable
+
+    networks = [get_synthetic_batch_evaluator(25, seed) for seed in (0, 1, 0)]
+    outputs = get_probe_outputs(networks, probes)
+    assert outputs.shape == (3, len(probes))
+    assert [result.screening for result in screen_networks(networks, 5)] == [
+        Screening.PLAY,
+        Screening.PLAY,
+        Screening.DUPLICATE,
+    ]
@@ -0,0 +1,90 @@
+import time
+
+import pytest
+
+from neat_strat.network import game_state, profiling, search
+from neat_strat.network.benchmark import (
+    get_synthetic_batch_evaluator,
+    get_synthetic_evaluator,
+)
+from neat_strat.network.lockstep import run_lockstep
+from neat_strat.network.search import Searcher, get_default_state, play_steps
+
+
+def test_timers_are_installed_and_removed(tmp_path):
+    make_move = search.make_move
+    profiler = profiling.enable(profiling.ProfileMode.TIMERS, tmp_path)
+    try:
+        assert search.make_move is not make_move
+        assert game_state.make_move is not make_move
+        Searcher(1, 2).search(get_synthetic_evaluator(), get_default_state())
+    finally:
+        profiling.disable()
+
+    assert search.make_move is make_move
+    assert game_state.make_move is make_move
+    for name in ("search", "make_move", "undo_move", "get_quiet_moves"):
+        assert profiler.timers[name].calls > 0
+    assert profiler.timers["search"].calls == 1
+    assert profiler.timers["evaluate"].calls > 0
+    assert profiler.timers["make_move"].calls == profiler.timers["undo_move"].calls
+
+
+def test_timers_cover_games_in_lockstep(tmp_path):
+    player = get_synthetic_batch_evaluator(seed=0)
+    opponent = get_synthetic_batch_evaluator(seed=1)
+    profiler = profiling.enable(profiling.ProfileMode.TIMERS, tmp_path)
+    try:
+        games = [play_steps(player, opponent, starts, 4, 2) for starts in (0, 1)]
+        (_, first), (_, second) = run_lockstep(games)
+    finally:
+        profiling.disable()
+
+    searches = len(first.history) + len(second.history)
+    assert profiler.timers["search"].calls == searches
+    assert profiler.timers["search"].seconds > 0
+    assert profiler.timers["evaluate"].calls > 0
+    assert profiler.timers["evaluate"].seconds > 0
+
+
+def test_timers_cover_training_games(tmp_path):
+    pytest.importorskip("neat")
+    from neat_strat.network import neural_network
+
+    profiler = profiling.enable(profiling.ProfileMode.TIMERS, tmp_path)
+    try:
+        # Synthetic networks stand in for the networks of the genomes.
+        tasks = [(None, "00000001", [(0, False), (0, True)])]
+        neural_network.play_genomes_games(
+            tasks, [None], opponent_fingerprints=["00000002"], synthetic=True
+        )
+    finally:
+        profiling.disable()
+
+    assert profiler.timers["play_games"].calls == 1
+    assert profiler.timers["search"].calls > 0
+    assert profiler.timers["search"].seconds > 0
+
+
+def test_reports_merge_processes(tmp_path):
+    profiler = profiling.enable(profiling.ProfileMode.SAMPLE, tmp_path)
+    try:
+        deadline = time.perf_counter() + 0.1
+        while time.perf_counter() < deadline:
+            Searcher(1, 1).search(get_synthetic_evaluator(), get_default_state())
+        profiler.dump()
+        # Another process, with the same results.
+        (tmp_path / "process-0.json").write_text(profiler.path.read_text())
+        report_path, stacks_path = profiling.write_report()
+    finally:
+        profiling.disable()
+
+    timers, stacks = profiling.merge_profiles(tmp_path)
+    assert timers["search"].calls >= 2 * profiler.timers["search"].calls
+    assert "search" in report_path.read_text()
+
+    lines = stacks_path.read_text().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert all(":" in frame for frame in stack.split(";"))
@@ -0,0 +1,60 @@
+import pytest
+
+from neat_strat.network.benchmark import (
+    get_benchmark_positions,
+    get_synthetic_evaluator,
+)
+from neat_strat.network.constants import WIN_SCORE
+from neat_strat.network.game_state import GameState
+from neat_strat.network.quantization import (
+    CALIBRATED_UNITS,
+    QUANTIZED_EVALUATION_LIMIT,
+    Quantization,
+    calibrate,
+)
+from neat_strat.network.search import Searcher
+from neat_strat.network.transposition_table import (
+    NodeFlag,
+    TranspositionTable,
+    score_to_tt,
+)
+from neat_strat.network.zobrist import compute_zobri_hash
+
+
+def test_calibration_scales_typical_evaluations():
+    quantization = Quantization.from_outputs([0.5 + i / 1000 for i in range(-10, 11)])
+    assert quantization.quantize(0.01) == pytest.approx(CALIBRATED_UNITS, abs=1)
+    assert quantization.quantize(1e6) == QUANTIZED_EVALUATION_LIMIT
+    assert quantization.dequantize(quantization.quantize(0.004)) == pytest.approx(
+        0.004, abs=1e-4
+    )
+    assert quantization.dequantize(WIN_SCORE - 3) == WIN_SCORE - 3
+    assert quantization.quantize_margin(1e-9) == 1
+
+
+def test_quantized_scores_fit_in_the_table():
+    table = TranspositionTable(1, quantized=True)
+    scores = [
+        0,
+        QUANTIZED_EVALUATION_LIMIT,
+        -QUANTIZED_EVALUATION_LIMIT,
+        score_to_tt(WIN_SCORE - 7, 2),
+        score_to_tt(-(WIN_SCORE - 7), 2),
+    ]
+    for key, score in enumerate(scores):
+        table.add(key, score, None, 3, NodeFlag.EXACT)
+    assert [table.get(key).score for key in range(len(scores))] == scores
+    assert table.get(len(scores)) is None
+
+
+def test_quantized_search_matches_search():
+    evaluator = get_synthetic_evaluator(sigmoid=True)
+    quantization = calibrate(evaluator)
+    for board, player in get_benchmark_positions():
+        state = GameState(board.copy(), compute_zobri_hash(board, player), player)
+        searcher = Searcher(1, 3)
+        move = searcher.search(evaluator, state)
+        quantized = Searcher(1, 3, quantization=quantization)
+
+        assert quantized.search(evaluator, state) == move
+        assert quantized.score == pytest.approx(searcher.score, abs=1e-2)
@@ -0,0 +1,98 @@
+import math
+import random
+
+from neat_strat.network.scheduler import BASELINE_GAMES, RacingScheduler
+
+GENOMES_COUNT = 100
+SURVIVAL_RATE = 0.2
+
+
+def play_game(skills: list[float], genome: int, game: int) -> float:
+    return skills[genome] + random.Random(genome * 1000 + game).gauss(0, 3)
+
+
+def get_survivors(fitnesses: list[float], count: int) -> set[int]:
+    return set(sorted(range(len(fitnesses)), key=lambda i: -fitnesses[i])[:count])
+
+
+def run_races(scheduler: RacingScheduler, skills: list[float]):
+    while games := scheduler.next_round():
+        for genome, genome_games in games.items():
+            played = scheduler.races[genome].games
+            fitnesses = [
+                play_game(skills, genome, played + i) for i in range(len(genome_games))
+            ]
+            scheduler.record(genome, fitnesses)
+
+
+def test_racing_keeps_survivors_with_fewer_games():
+    # Skills are a few standard deviations of a game apart, so that full
+    # evaluation reliably finds the best genomes.
+    skills = [5.0 * genome for genome in range(GENOMES_COUNT)]
+    random.Random(0).shuffle(skills)
+    survivors_count = math.ceil(SURVIVAL_RATE * GENOMES_COUNT)
+
+    baseline = [
+        sum(play_game(skills, genome, game) for game in range(BASELINE_GAMES))
+        / BASELINE_GAMES
+        for genome in range(GENOMES_COUNT)
+    ]
+
+    scheduler = RacingScheduler(GENOMES_COUNT, 3, SURVIVAL_RATE)
+    run_races(scheduler, skills)
+
+    assert scheduler.games_played <= 0.6 * GENOMES_COUNT * BASELINE_GAMES
+    assert get_survivors(scheduler.fitnesses, survivors_count) == get_survivors(
+        baseline, survivors_count
+    )
+
+
+def test_games_alternate_sides_and_opponents():
+    scheduler = RacingScheduler(1, 2, 1.0, min_games=4)
+    assert scheduler.next_round() == {0: [(0, False), (0, True), (1, False), (1, True)]}
+
+
+def test_limited_and_copied_genomes():
+    scheduler = RacingScheduler(3, 2, 1 / 3, min_games=2, max_games=4)
+    scheduler.limit_games(1, 1)
+    scheduler.copy_games(2, 0)
+    games = scheduler.next_round()
+    assert games == {0: [(0, False), (0, True)], 1: [(0, False)]}
+
+    scheduler.record(0, [3.0, 5.0])
+    scheduler.record(1, [1.0])
+    assert 1 not in scheduler.contenders
+    assert scheduler.fitnesses == [4.0, 1.0, 4.0]
+
+
+def test_genomes_race_within_their_species():
+    # Every genome of the first species is worse than the survivors of the
+    # second, yet the best genomes of the first species survive too, so they race
+    # each other for them.
+    skills = [5.0 * genome for genome in range(GENOMES_COUNT)]
+    half = GENOMES_COUNT // 2
+    species = [genome < half for genome in range(GENOMES_COUNT)]
+    scheduler = RacingScheduler(GENOMES_COUNT, 3, SURVIVAL_RATE, species=species)
+    run_races(scheduler, skills)
+
+    survivors_count = math.ceil(SURVIVAL_RATE * half)
+    fitnesses = scheduler.fitnesses[:half]
+    assert get_survivors(fitnesses, survivors_count) == set(
+        range(half - survivors_count, half)
+    )
+    # The genomes next to the cut of the first species needed more games.
+    cut = half - survivors_count
+    assert scheduler.races[cut - 1].games > scheduler.min_games
+    assert scheduler.races[cut].games > scheduler.min_games
+
+
+def test_games_budget_is_a_ceiling():
+    skills = [float(genome % 3) for genome in range(GENOMES_COUNT)]
+    unbounded = RacingScheduler(GENOMES_COUNT, 3, SURVIVAL_RATE)
+    run_races(unbounded, skills)
+    budget = unbounded.games_played // 2
+    bounded = RacingScheduler(GENOMES_COUNT, 3, SURVIVAL_RATE, games_budget=budget)
+    run_races(bounded, skills)
+
+    assert 2 * GENOMES_COUNT < budget
+    assert bounded.games_played <= budget < unbounded.games_played
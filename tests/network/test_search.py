@@ -0,0 +1,357 @@
+import math
+
+import numpy as np
+import pytest
+
+from neat_strat.network.benchmark import (
+    get_benchmark_positions,
+    get_random_position,
+    get_synthetic_evaluator,
+)
+from neat_strat.network.constants import BOARD_SIZE, WIN_SCORE, EndgameState, Player
+from neat_strat.network.game_state import (
+    GameState,
+    is_repetition,
+    make_move,
+    undo_move,
+)
+from neat_strat.network.search import (
+    Searcher,
+    get_capture_moves,
+    get_default_state,
+    get_endgame_state,
+    get_possible_moves,
+    get_child_boards,
+    get_quiet_moves,
+    is_possible_move,
+    pack_moves,
+    pick_moves,
+    play,
+)
+from neat_strat.network.transposition_table import (
+    NodeFlag,
+    TranspositionEntry,
+    evaluate_entry,
+    score_from_tt,
+    score_to_tt,
+)
+from neat_strat.network.zobrist import compute_zobri_hash
+
+
+def get_state(rows: list[list[int]], player: Player) -> GameState:
+    board = np.asarray(rows, dtype=np.int8)
+    return GameState(board, compute_zobri_hash(board, player), player)
+
+
+def test_search_finds_win_in_one():
+    state = get_state(
+        [
+            [0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0],
+            [0, -2, 0, 0, 0],
+            [7, 0, 0, 0, 0],
+        ],
+        Player.BLUE,
+    )
+
+    for depth in range(1, 5):
+        searcher = Searcher(1, depth)
+        move = searcher.search(get_synthetic_evaluator(), state)
+        assert searcher.score == WIN_SCORE - 1
+
+        make_move(state, move)
+        assert get_endgame_state(state.board) == EndgameState.BLUE_WON
+        undo_move(state)
+
+
+def test_search_scores_unavoidable_loss():
+    # BLUE can't escape, RED captures it with its next move whatever BLUE plays.
+    state = get_state(
+        [
+            [0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0],
+            [-10, -10, 0, 0, 0],
+            [1, -10, 0, 0, 0],
+        ],
+        Player.BLUE,
+    )
+
+    searcher = Searcher(1, 3)
+    searcher.search(get_synthetic_evaluator(), state)
+    assert searcher.score == -(WIN_SCORE - 2)
+
+
+def test_search_never_returns_the_move_of_an_earlier_search():
+    searcher = Searcher(1, 2)
+    searcher.search(get_synthetic_evaluator(), get_default_state())
+
+    # BLUE has no troops left, so there is nothing to search.
+    state = get_state(
+        [
+            [0, 0, 0, 0, -3],
+            [0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0],
+        ],
+        Player.BLUE,
+    )
+    with pytest.raises(ValueError):
+        searcher.search(get_synthetic_evaluator(), state)
+
+
+def test_win_scores_are_stored_relative_to_the_node():
+    score = WIN_SCORE - 5
+    stored = score_to_tt(score, 3)
+    assert stored == WIN_SCORE - 2
+    assert score_from_tt(stored, 1) == WIN_SCORE - 3
+    assert score_from_tt(score_to_tt(-score, 3), 3) == -score
+    assert score_to_tt(0.75, 3) == 0.75
+
+    entry = TranspositionEntry(0, stored, None, 4, NodeFlag.EXACT)
+    assert evaluate_entry(entry, 4, -WIN_SCORE, WIN_SCORE, 1)[:2] == (
+        WIN_SCORE - 3,
+        True,
+    )
+
+
+def test_capture_moves_are_the_captures_of_all_moves():
+    for seed in range(8):
+        state = get_random_position(BOARD_SIZE, 16, seed)
+        board = state.board
+        player = state.player_to_move
+        captures = {
+            move
+            for move in get_possible_moves(board, player)
+            if len(move) == 3 and board[move[1]] * move[2] < 0
+        }
+
+        moves = get_capture_moves(board, player)
+        assert len(moves) == len(set(moves))
+        assert set(moves) == captures
+
+
+def test_quiescence_resolves_captures():
+    # BLUE can take the RED tile next to it.
+    state = get_state(
+        [
+            [0, 0, 0, 0, -10],
+            [0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0],
+            [0, -1, 0, 0, 0],
+            [9, 0, 0, 0, 0],
+        ],
+        Player.BLUE,
+    )
+    board = state.board.copy()
+    evaluator = get_synthetic_evaluator(sigmoid=True)
+    searcher = Searcher(1, 1)
+    searcher.prepare(state)
+
+    stand_pat = searcher.evaluate(evaluator, state)
+    score = searcher.quiesce(evaluator, state, 0, -math.inf, math.inf)
+    assert score > stand_pat
+    assert searcher.qnodes > 1
+    assert np.array_equal(state.board, board)
+
+    # Nothing can be captured on the default board.
+    searcher.qnodes = 0
+    state = get_default_state()
+    searcher.prepare(state)
+    stand_pat = searcher.evaluate(evaluator, state)
+    assert searcher.quiesce(evaluator, state, 0, -math.inf, math.inf) == stand_pat
+    assert searcher.qnodes == 1
+
+
+def test_delta_pruning_skips_captures_that_cant_reach_alpha():
+    # BLUE is far behind, and taking the lone RED troop doesn't win the game.
+    state = get_state(
+        [
+            [0, 0, 0, -3, -10],
+            [0, 0, 0, -6, -8],
+            [0, 0, 0, 0, 0],
+            [0, -1, 0, 0, 0],
+            [2, 0, 0, 0, 0],
+        ],
+        Player.BLUE,
+    )
+    evaluator = get_synthetic_evaluator(sigmoid=True)
+    searcher = Searcher(1, 1)
+    searcher.prepare(state)
+    stand_pat = searcher.evaluate(evaluator, state)
+
+    # Both windows are within the range of the evaluation.
+    for alpha, pruned in ((0.0, False), (0.1, True)):
+        assert (stand_pat + searcher.delta_margin < alpha) == pruned
+        searcher.qnodes = 0
+        score = searcher.quiesce(evaluator, state, 0, alpha, 0.2)
+        assert score == stand_pat
+        assert (searcher.qnodes == 1) == pruned
+
+
+def test_staged_moves_are_the_possible_moves_once():
+    for seed in range(8):
+        state = get_random_position(BOARD_SIZE, 16, seed)
+        board = state.board
+        player = state.player_to_move
+        possible_moves = get_possible_moves(board, player)
+        quiets = get_quiet_moves(board, player)
+        assert len(quiets) == len(set(quiets))
+        assert set(quiets) | set(get_capture_moves(board, player)) == set(
+            possible_moves
+        )
+        assert all(is_possible_move(board, player, move) for move in possible_moves)
+
+        tt_move = possible_moves[-1]
+        killers = [possible_moves[0], ((0, 0), (0, 0))]
+        moves = list(pick_moves(state, tt_move, killers, [], []))
+        assert moves[0] == tt_move
+        assert len(moves) == len(set(moves))
+        assert set(moves) == set(possible_moves)
+
+
+def test_multipv_finds_the_best_root_moves():
+    board, player = get_benchmark_positions()[1]
+    state = get_state(board.tolist(), player)
+    evaluator = get_synthetic_evaluator(sigmoid=True)
+
+    scores = {}
+    for move in set(get_possible_moves(state.board, player)):
+        make_move(state, move)
+        searcher = Searcher(1, 1)
+        searcher.search(evaluator, state)
+        scores[move] = -searcher.score
+        undo_move(state)
+
+    best_moves = Searcher(1, 2).search_multipv(evaluator, state, 3)
+    assert len(best_moves) == 3
+    assert [m.score for m in best_moves] == sorted(scores.values(), reverse=True)[:3]
+    for best_move in best_moves:
+        assert best_move.score == scores[best_move.move]
+        assert best_move.pv[0] == best_move.move
+
+
+def test_aspiration_windows_keep_the_result():
+    evaluator = get_synthetic_evaluator(sigmoid=True)
+    for board, player in get_benchmark_positions():
+        state = get_state(board.tolist(), player)
+        searcher = Searcher(1, 2)
+        searcher.search(evaluator, state)
+
+        full_window = Searcher(1, 2)
+        full_window.prepare(state)
+        score = full_window.pvs(
+            evaluator, state, 2, 0, -math.inf, math.inf, None, False
+        )
+        assert searcher.score == pytest.approx(score)
+
+
+SHUTTLE = [
+    ((4, 0), (3, 0), 5),
+    ((0, 4), (1, 4), -5),
+    ((3, 0), (4, 0), 5),
+    ((1, 4), (0, 4), -5),
+]
+
+
+def test_shuttling_troops_repeats_the_position():
+    state = get_default_state()
+    make_move(state, ((4, 0), (4, 0)))
+    assert state.reversible_plies[-1] == 0
+
+    for move in SHUTTLE[:3]:
+        make_move(state, move)
+        assert not is_repetition(state)
+    make_move(state, SHUTTLE[3])
+    assert state.reversible_plies[-1] == 4
+    assert is_repetition(state)
+
+    undo_move(state)
+    assert not is_repetition(state)
+    assert len(state.hashes) == len(state.history) == 4
+
+
+def test_search_scores_repetitions_as_draws():
+    state = get_default_state()
+    for move in SHUTTLE:
+        make_move(state, move)
+
+    searcher = Searcher(1, 2)
+    searcher.prepare(state)
+    score = searcher.pvs(
+        get_synthetic_evaluator(), state, 2, 1, -math.inf, math.inf, None, False
+    )
+    assert score == 0.0
+    assert searcher.nodes == 1
+
+    # The root itself is searched, even if it repeats a position.
+    searcher.search(get_synthetic_evaluator(), state)
+    assert searcher.nodes > 1
+
+
+def test_play_stops_at_repetitions():
+    def center(board) -> list[float]:
+        return [float(board[12])]
+
+    def spread(board) -> list[float]:
+        return [float((board > 0).sum())]
+
+    endgame_state, state = play(center, spread, False, 20, 1)
+    assert endgame_state == EndgameState.REPETITION
+    assert len(state.history) < 20
+    assert is_repetition(state)
+
+
+def test_child_boards_are_the_boards_after_every_move():
+    state = get_random_position(BOARD_SIZE, 12, 0)
+    moves = get_possible_moves(state.board, state.player_to_move)
+    children = get_child_boards(
+        state.board, pack_moves(moves, state.player_to_move, BOARD_SIZE)
+    )
+    for move, child in zip(moves, children):
+        make_move(state, move)
+        assert np.array_equal(child, state.board.ravel())
+        undo_move(state)
+
+
+@pytest.mark.parametrize("quiescence", [True, False])
+def test_frontier_batching_keeps_the_search(quiescence: bool):
+    # Positions where shuttling troops repeats the position at the frontier too.
+    shuttle = get_default_state()
+    for move in SHUTTLE[:3]:
+        make_move(shuttle, move)
+    states = [
+        get_state(board.tolist(), player)
+        for board, player in get_benchmark_positions()
+    ]
+    evaluator = get_synthetic_evaluator(sigmoid=True)
+    for state in [*states, shuttle]:
+        results = []
+        for frontier_batching in (True, False):
+            searcher = Searcher(1, 3, quiescence)
+            searcher.frontier_batching = frontier_batching
+            move = searcher.search(evaluator, state)
+            results.append(
+                (move, searcher.score, searcher.nodes, searcher.qnodes)
+            )
+        assert results[0] == results[1]
+
+
+def test_scout_searches_are_not_pv_nodes():
+    class RecordingSearcher(Searcher):
+        def pvs_steps(self, state, depth, ply, alpha, beta, *args):
+            windows.append((beta - alpha, args[-1] if len(args) == 3 else True))
+            return super().pvs_steps(state, depth, ply, alpha, beta, *args)
+
+    windows: list[tuple[float, bool]] = []
+    board, player = get_benchmark_positions()[0]
+    searcher = RecordingSearcher(1, 3)
+    state = get_state(board.tolist(), player)
+    searcher.search(get_synthetic_evaluator(sigmoid=True), state)
+
+    assert any(not is_pv_node for _, is_pv_node in windows)
+    assert all(
+        width > 2 * searcher.null_window for width, is_pv_node in windows if is_pv_node
+    )
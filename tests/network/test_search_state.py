@@ -0,0 +1,45 @@
+import numpy as np
+
+from neat_strat.network.benchmark import run_allocation_benchmark
+from neat_strat.network.constants import Player
+from neat_strat.network.search import format_board_for_evaluation, get_default_board
+from neat_strat.network.search_state import EvaluationBuffer, PVTable
+
+
+def test_pv_table_update():
+    pv = PVTable(8)
+    pv.clear(2)
+    pv.update(2, ((0, 0), (0, 0)))
+    pv.update(1, ((1, 0), (1, 1), 3))
+    pv.update(0, ((2, 2), (2, 2)))
+    assert pv.get_pv() == [((2, 2), (2, 2)), ((1, 0), (1, 1), 3), ((0, 0), (0, 0))]
+    assert pv.get_pv_move() == ((2, 2), (2, 2))
+
+    pv.clear(1)
+    pv.update(0, ((3, 3), (3, 3)))
+    assert pv.get_pv() == [((3, 3), (3, 3))]
+
+
+def test_evaluation_buffer_matches_formatted_board():
+    board = get_default_board()
+    board[1][3] = -4
+    board[2][0] = 6
+    buffer = EvaluationBuffer(5)
+    buffer.bind(board)
+
+    for side in (Player.BLUE, Player.RED):
+        expected = format_board_for_evaluation(board, side)
+        assert np.array_equal(buffer.fill(side), expected)
+
+    # The buffer follows in place changes of the bound board.
+    board[2][2] = 3
+    expected = format_board_for_evaluation(board, Player.RED)
+    assert np.array_equal(buffer.fill(Player.RED), expected)
+
+
+def test_search_barely_allocates():
+    results = run_allocation_benchmark(2)
+    nodes = sum(result.nodes for result in results)
+    retained_blocks = sum(result.retained_blocks for result in results)
+    # Only transposition table entries outlive a node.
+    assert retained_blocks / nodes < 0.5
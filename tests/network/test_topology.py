@@ -0,0 +1,58 @@
+import pytest
+
+from neat_strat.network.constants import MAX_TROOPS, Player
+from neat_strat.network.game_state import make_move, undo_move
+from neat_strat.network.search import get_default_state, get_possible_moves
+from neat_strat.network.topology import get_topology
+from neat_strat.network.zobrist import compute_zobri_hash
+
+
+def test_neighbours_of_default_board():
+    topology = get_topology(5)
+    assert topology.lookup_neighbours(0, 0) == [(1, 0), (0, 1)]
+    assert topology.lookup_neighbours(2, 1) == [
+        (3, 1),
+        (1, 1),
+        (2, 2),
+        (2, 0),
+        (3, 2),
+        (3, 0),
+    ]
+    assert topology.lookup_neighbours(4, 4) == [(3, 4), (4, 3), (3, 3)]
+
+
+def test_topology_is_shared():
+    assert get_topology(7) is get_topology(7)
+    assert get_default_state(7).topology is get_topology(7)
+
+
+@pytest.mark.parametrize("size", [5, 7, 9])
+def test_neighbour_tables(size):
+    topology = get_topology(size)
+    for index, neighbours in enumerate(topology.neighbours):
+        count = topology.neighbour_counts[index]
+        assert count == len(neighbours)
+        assert list(topology.neighbour_indices[index, :count]) == [
+            topology.get_index(*coords) for coords in neighbours
+        ]
+        for coords in neighbours:
+            assert topology.is_valid(*coords)
+            assert topology.get_coords(index) in topology.lookup_neighbours(*coords)
+
+
+@pytest.mark.parametrize("size", [7, 9])
+def test_default_state_of_larger_boards(size):
+    state = get_default_state(size)
+    assert state.board.shape == (size, size)
+    assert state.board[size - 1][0] == MAX_TROOPS
+    assert state.board[0][size - 1] == -MAX_TROOPS
+
+    for player in (Player.BLUE, Player.RED):
+        state.player_to_move = player
+        state.hash = compute_zobri_hash(state.board, player)
+        for move in get_possible_moves(state.board, player):
+            original_hash = state.hash
+            make_move(state, move)
+            assert state.hash == compute_zobri_hash(state.board, state.player_to_move)
+            undo_move(state)
+            assert state.hash == original_hash
@@ -0,0 +1,67 @@
+import pytest
+
+from neat_strat.network.benchmark import (
+    get_benchmark_positions,
+    get_synthetic_evaluator,
+)
+from neat_strat.network.game_state import GameState
+from neat_strat.network.search import Searcher
+from neat_strat.network.trace import (
+    NodeKind,
+    TraceReason,
+    TraceRecorder,
+    build_trees,
+    read_trace,
+    summarise_trace,
+)
+from neat_strat.network.zobrist import compute_zobri_hash
+
+
+def trace_search(trace: TraceRecorder, depth: int = 3) -> Searcher:
+    board, player = get_benchmark_positions()[1]
+    state = GameState(board.copy(), compute_zobri_hash(board, player), player)
+    searcher = Searcher(1, depth)
+    searcher.trace = trace
+    searcher.search(get_synthetic_evaluator(sigmoid=True), state)
+    return searcher
+
+
+def test_trace_rebuilds_the_search_trees(tmp_path):
+    with TraceRecorder(path=tmp_path / "trace.bin", capacity=64) as trace:
+        searcher = trace_search(trace)
+    events = read_trace(tmp_path / "trace.bin")
+
+    assert len(events) == trace.events
+    assert sum(e.kind == NodeKind.QUIESCENCE for e in events) == searcher.qnodes
+    trees = build_trees(events)
+    # A tree for every iteration and every search of an aspiration window.
+    assert all(tree.event.ply == 0 for tree in trees)
+    assert len(trees) >= searcher.depth
+    assert sum(tree.size for tree in trees) == len(events)
+    last = trees[-1]
+    assert last.event.depth == searcher.depth
+    # Scores are stored as 32 bit floats.
+    assert last.event.score == pytest.approx(searcher.score, rel=1e-6)
+    assert all(child.event.ply == 1 for child in last.children)
+    assert {child.event.move for child in last.children} >= {
+        searcher.stack.pv.moves[0][0]
+    }
+
+    summary = summarise_trace(events)
+    assert summary.plies[0].nodes == len(trees)
+    assert sum(ply.nodes for ply in summary.plies) == len(events)
+    assert sum(summary.reasons.values()) == len(events)
+    assert summary.reasons[TraceReason.STAND_PAT.name.lower()] > 0
+
+
+def test_ring_buffer_keeps_the_latest_events(tmp_path):
+    with TraceRecorder(path=tmp_path / "trace.bin") as trace:
+        trace_search(trace)
+    events = read_trace(tmp_path / "trace.bin")
+
+    ring = TraceRecorder(capacity=100)
+    trace_search(ring)
+    assert ring.events == len(events)
+    assert ring.get_events() == events[-100:]
+    ring.save(tmp_path / "ring.bin")
+    assert read_trace(tmp_path / "ring.bin") == events[-100:]
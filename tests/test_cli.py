@@ -0,0 +1,50 @@
+import subprocess
+import sys
+
+import pytest
+
+from neat_strat.cli import build_parser
+
+MAX_IMPORT_SECONDS = 0.5
+
+
+def run_python(code: str) -> str:
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip()
+
+
+def test_cli_import_is_lightweight():
+    output = run_python(
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import neat_strat.cli\n"
+        "elapsed = time.perf_counter() - start\n"
+        "heavy = [m for m in ('arcade', 'neat', 'numpy') if m in sys.modules]\n"
+        "print(elapsed, ','.join(heavy))"
+    )
+    elapsed, _, heavy = output.partition(" ")
+    assert heavy == ""
+    assert float(elapsed) < MAX_IMPORT_SECONDS
+
+
+def test_search_does_not_import_gui():
+    output = run_python(
+        "import sys\n"
+        "import neat_strat.network.search\n"
+        "print('arcade' in sys.modules)"
+    )
+    assert output == "False"
+
+
+@pytest.mark.parametrize(
+    "command", ["play", "train", "arena", "analyse", "bench", "trace", "serve"]
+)
+def test_parser_has_subcommand(command):
+    args = {"arena": ["player.pkl", "opponent.pkl"], "trace": ["trace.bin"]}.get(
+        command, []
+    )
+    parsed = build_parser().parse_args([command, *args])
+    assert parsed.command == command
+    assert callable(parsed.handler)